@@ -65,7 +65,11 @@ class BceGAN (GAN):   # TODO add class description
                 g_optimizer ,
                 c_optimizer = None ,
                 d_updt_per_batch = 1 , 
-                g_updt_per_batch = 1 ) -> None:   # TODO complete docstring
+                g_updt_per_batch = 1 ,
+                jit_compile = False ,
+                reuse_updt_outputs = False ,
+                metrics_updt_freq  = 1 ,
+                precision = "float32" ) -> None:   # TODO complete docstring
     """Configure the models for BceGAN training.
     
     Parameters
@@ -81,12 +85,30 @@ class BceGAN (GAN):   # TODO add class description
 
     g_updt_per_batch : `int`, optional
       ... (`1`, by default).
+
+    jit_compile : `bool`, optional
+      If `True`, the train step is compiled with XLA (`False`, by default).
+
+    reuse_updt_outputs : `bool`, optional
+      If `True`, the metric trackers reuse the losses and the generated batch 
+      of the last update step (`False`, by default).
+
+    metrics_updt_freq : `int`, optional
+      Number of batches between two updates of the metric trackers during 
+      training (`1`, by default).
+
+    precision : {'float32', 'mixed_float16', 'mixed_bfloat16'}, optional
+      Keras precision policy of the networks (`'float32'`, by default).
     """
     super().compile ( d_optimizer = d_optimizer , 
                       g_optimizer = g_optimizer , 
                       c_optimizer = c_optimizer ,
                       d_updt_per_batch = d_updt_per_batch , 
-                      g_updt_per_batch = g_updt_per_batch )
+                      g_updt_per_batch = g_updt_per_batch ,
+                      jit_compile = jit_compile ,
+                      reuse_updt_outputs = reuse_updt_outputs ,
+                      metrics_updt_freq  = metrics_updt_freq ,
+                      precision = precision )
 
     self._k_gen = 0.1
     self._k_ref = 0.9
@@ -96,7 +96,8 @@ class CramerGAN (GAN):   # TODO add class description
 
     self._critic_dim = critic_dim
 
-    ## Discriminator sequential model
+    ## Discriminator sequential model (replacing the one of GAN)
+    self._untrack (self._discriminator)
     self._discriminator = Sequential ( name = "discriminator" )
     for d_layer in discriminator:
       self._discriminator . add ( d_layer )
@@ -109,7 +110,11 @@ class CramerGAN (GAN):   # TODO add class description
                 c_optimizer = None ,
                 d_updt_per_batch = 1 ,
                 g_updt_per_batch = 1 ,
-                grad_penalty = 10 ) -> None:   # TODO complete docstring
+                grad_penalty = 10 ,
+                jit_compile = False ,
+                reuse_updt_outputs = False ,
+                metrics_updt_freq  = 1 ,
+                precision = "float32" ) -> None:   # TODO complete docstring
     """Configure the models for CramerGAN training.
     
     Parameters
@@ -128,12 +133,30 @@ class CramerGAN (GAN):   # TODO add class description
 
     grad_penalty : `float`, optional
       ... (`0.001`, by default).
+
+    jit_compile : `bool`, optional
+      If `True`, the train step is compiled with XLA (`False`, by default).
+
+    reuse_updt_outputs : `bool`, optional
+      If `True`, the metric trackers reuse the losses and the generated batch 
+      of the last update step (`False`, by default).
+
+    metrics_updt_freq : `int`, optional
+      Number of batches between two updates of the metric trackers during 
+      training (`1`, by default).
+
+    precision : {'float32', 'mixed_float16', 'mixed_bfloat16'}, optional
+      Keras precision policy of the networks (`'float32'`, by default).
     """
     super().compile ( d_optimizer = d_optimizer , 
                       g_optimizer = g_optimizer ,
                       c_optimizer = c_optimizer ,
                       d_updt_per_batch = d_updt_per_batch ,
-                      g_updt_per_batch = g_updt_per_batch )
+                      g_updt_per_batch = g_updt_per_batch ,
+                      jit_compile = jit_compile ,
+                      reuse_updt_outputs = reuse_updt_outputs ,
+                      metrics_updt_freq  = metrics_updt_freq ,
+                      precision = precision )
     self._critic = Critic ( lambda x : self._discriminator(x) )
 
     ## Data-type control
@@ -7,17 +7,8 @@ from tensorflow.keras.layers import Dense
 from tensorflow.keras.models import Sequential
 
 
-d_loss_tracker = tf.keras.metrics.Mean ( name = "d_loss" )
-"""Metric instance to track the discriminator loss score."""
-
-g_loss_tracker = tf.keras.metrics.Mean ( name = "g_loss" )
-"""Metric instance to track the generator loss score."""
-
-c_loss_tracker = tf.keras.metrics.Mean ( name = "c_loss" )
-"""Metric instance to track the classifier loss score."""
-
-mse_tracker = tf.keras.metrics.MeanSquaredError ( name = "mse" )
-"""Metric instance to track the mean square error."""
+PRECISIONS = ["float32", "mixed_float16", "mixed_bfloat16"]
+"""Precision policies available for training."""
 
 
 class GAN (tf.keras.Model):   # TODO add class description
@@ -76,6 +67,13 @@ class GAN (tf.keras.Model):   # TODO add class description
                  latent_dim = 64 ) -> None:
     super().__init__()
     self._loss_name = "Loss function"
+    self._precision = "float32"
+
+    ## Metric instances (created within the distribution strategy scope, if any)
+    self._d_loss_tracker = tf.keras.metrics.Mean ( name = "d_loss" )
+    self._g_loss_tracker = tf.keras.metrics.Mean ( name = "g_loss" )
+    self._c_loss_tracker = tf.keras.metrics.Mean ( name = "c_loss" )
+    self._mse_tracker = tf.keras.metrics.MeanSquaredError ( name = "mse" )
 
     ## Feature space dimension
     if isinstance ( X_shape, (tuple, list, np.ndarray, tf.Tensor) ):
@@ -126,7 +124,11 @@ class GAN (tf.keras.Model):   # TODO add class description
                 g_optimizer , 
                 c_optimizer = None ,
                 d_updt_per_batch = 1 ,
-                g_updt_per_batch = 1 ) -> None:   # TODO complete docstring
+                g_updt_per_batch = 1 ,
+                jit_compile = False ,
+                reuse_updt_outputs = False ,
+                metrics_updt_freq  = 1 ,
+                precision = "float32" ) -> None:   # TODO complete docstring
     """Configure the models for GAN training.
     
     Parameters
@@ -142,14 +144,50 @@ class GAN (tf.keras.Model):   # TODO add class description
 
     g_updt_per_batch : `int`, optional
       ... (`1`, by default).
+
+    jit_compile : `bool`, optional
+      If `True`, the train step is compiled with XLA, fusing the discriminator 
+      and generator updates of each batch within a single compiled graph 
+      (`False`, by default).
+
+    reuse_updt_outputs : `bool`, optional
+      If `True`, the metric trackers are updated with the losses and the 
+      generated batch of the last update step, instead of computing them 
+      again with further forward passes (`False`, by default).
+
+    metrics_updt_freq : `int`, optional
+      Number of batches between two updates of the metric trackers during 
+      training (`1`, by default).
+
+    precision : {'float32', 'mixed_float16', 'mixed_bfloat16'}, optional
+      Keras precision policy of the discriminator, generator and classifier 
+      (`'float32'`, by default). With mixed precision, the computations run 
+      in half precision while the variables and the output layers, hence 
+      the losses and the penalty terms, are kept in `float32`.
     """
-    super().compile()
+    ## Data-type control
+    if not isinstance (jit_compile, bool):
+      raise TypeError ("The XLA compilation flag should be a boolean.")
+
+    if not isinstance (reuse_updt_outputs, bool):
+      raise TypeError ("The flag to reuse the update outputs should be a boolean.")
+
+    if not isinstance (metrics_updt_freq, int):
+      if isinstance (metrics_updt_freq, float): metrics_updt_freq = int (metrics_updt_freq)
+      else: raise TypeError ("The frequency of metrics updates should be an integer.")
+
+    ## Data-value control
+    if metrics_updt_freq <= 0:
+      raise ValueError ("The frequency of metrics updates should be greater than 0.")
+
+    super().compile ( jit_compile = jit_compile )
 
     ## Build discriminator and generator models
     self._discriminator . build ( input_shape = (None, self._X_shape + self._Y_shape) )
     self._generator . build ( input_shape = (None, self._X_shape + self._latent_dim) )
     if self._classifier is not None:
       self._classifier . build ( input_shape = (None, self._X_shape + self._Y_shape) )
+    self.built = True   # no symbolic build by fit, the batches aren't in (x, y) format
 
     ## Data-type control
     if not isinstance (d_updt_per_batch, int):
@@ -170,11 +208,17 @@ class GAN (tf.keras.Model):   # TODO add class description
     self._d_optimizer = d_optimizer
     self._g_optimizer = g_optimizer
     self._c_optimizer = c_optimizer
-    self._d_lr0 = float ( d_optimizer.learning_rate )
-    self._g_lr0 = float ( g_optimizer.learning_rate )
-    self._c_lr0 = float ( c_optimizer.learning_rate ) if (self._c_optimizer is not None) else None
+    self._d_lr0 = float ( tf.convert_to_tensor (d_optimizer.learning_rate) )
+    self._g_lr0 = float ( tf.convert_to_tensor (g_optimizer.learning_rate) )
+    self._c_lr0 = float ( tf.convert_to_tensor (c_optimizer.learning_rate) ) if (self._c_optimizer is not None) else None
     self._d_updt_per_batch = d_updt_per_batch
     self._g_updt_per_batch = g_updt_per_batch
+    self._reuse_updt_outputs = reuse_updt_outputs
+    self._metrics_updt_freq  = metrics_updt_freq
+
+    ## Precision policy (not through the property, since tf.Module skips 
+    ## the assignment of a value identical to the current one)
+    self._set_precision (precision)
 
   def summary (self) -> None:
     """Print a string summary of the discriminator and generator networks."""
@@ -199,80 +243,151 @@ class GAN (tf.keras.Model):   # TODO add class description
     """Train step for Keras APIs."""
     X, Y, w_X, w_Y = self._unpack_data (data)
 
-    ## Discriminator updates per batch
-    for i in range(self._d_updt_per_batch):
-      self._train_d_step (X, Y, w_X, w_Y)
-
-    ## Generator updates per batch
-    for j in range(self._g_updt_per_batch):
-      self._train_g_step (X, Y, w_X, w_Y)
-
-    ## Loss computation
-    ref_sample, gen_sample = self._arrange_samples (X, Y, w_X, w_Y)
-    d_loss = self._compute_d_loss (gen_sample, ref_sample)
-    g_loss = self._compute_g_loss (gen_sample, ref_sample)
-    threshold = self._compute_threshold (ref_sample)
+    ## Discriminator and generator updates per batch
+    updt_outputs = self._update_step (X, Y, w_X, w_Y)
 
-    ## Update metrics state
-    d_loss_tracker . update_state (d_loss + threshold)
-    g_loss_tracker . update_state (g_loss - threshold)
+    ## Classifier update per batch
+    c_loss = None
+    if self._classifier is not None:
+      c_loss = self._train_c_step (X, Y, w_X, w_Y)
 
-    Y_gen = self.generate (X)
-    mse_tracker . update_state (Y, Y_gen, sample_weight = w_Y)
+    if not self._reuse_updt_outputs:
+      updt_outputs = c_loss = None
 
-    if self._classifier is None:
-      return { "mse"    : mse_tracker.result()    ,
-               "d_loss" : d_loss_tracker.result() , 
-               "g_loss" : g_loss_tracker.result() ,
-               "d_lr"   : self._d_optimizer.lr    ,
-               "g_lr"   : self._g_optimizer.lr    }
-
-    ## If classifier enabled
+    ## Update metrics state (once every `metrics_updt_freq` batches)
+    if self._metrics_updt_freq == 1:
+      self._update_metrics (X, Y, w_X, w_Y, updt_outputs, c_loss)
     else:
-      self._train_c_step (X, Y, w_X, w_Y)
-      c_loss = self._compute_c_loss (gen_sample, ref_sample)
-      c_loss_tracker . update_state (c_loss)
-      return { "mse"    : mse_tracker.result()    ,
-               "c_loss" : c_loss_tracker.result() ,
-               "d_loss" : d_loss_tracker.result() , 
-               "g_loss" : g_loss_tracker.result() ,
-               "d_lr"   : self._d_optimizer.lr    ,
-               "g_lr"   : self._g_optimizer.lr    }
+      step = self._g_optimizer.iterations // self._g_updt_per_batch
+      tf.cond ( tf.equal ( (step - 1) % self._metrics_updt_freq, 0 ) , 
+                lambda: self._update_metrics (X, Y, w_X, w_Y, updt_outputs, c_loss) , 
+                lambda: None )
+
+    return self._metrics_results()
 
   def test_step (self, data) -> dict:
     """Test step for Keras APIs."""
     X, Y, w_X, w_Y = self._unpack_data (data)
+    self._update_metrics (X, Y, w_X, w_Y)
+    return self._metrics_results()
+
+  def _update_metrics ( self , X , Y , 
+                        w_X = None , 
+                        w_Y = None , 
+                        updt_outputs = None , 
+                        c_loss = None ) -> None:
+    """Update the state of the metric trackers.
+
+    If the outputs of the last update step are passed, the losses and 
+    the generated batch are reused, otherwise they are computed again 
+    from a new arrangement of the reference and generated samples.
+
+    Parameters
+    ----------
+    X : `tf.Tensor`
+      ...
+
+    Y : `tf.Tensor`
+      ...
 
+    w_X : `tf.Tensor`, optional
+      ... (`None`, by default).
+
+    w_Y : `tf.Tensor`, optional
+      ... (`None`, by default).
+
+    updt_outputs : `tuple` of `tf.Tensor`, optional
+      Discriminator loss, generator loss, reference and generated samples 
+      returned by `_update_step` (`None`, by default).
+
+    c_loss : `tf.Tensor`, optional
+      Classifier loss returned by `_train_c_step` (`None`, by default).
+    """
     ## Loss computation
-    ref_sample, gen_sample = self._arrange_samples (X, Y, w_X, w_Y)
-    d_loss = self._compute_d_loss (gen_sample, ref_sample)
-    g_loss = self._compute_g_loss (gen_sample, ref_sample)
+    if updt_outputs is not None:
+      d_loss, g_loss, ref_sample, gen_sample = updt_outputs
+    else:
+      ref_sample, gen_sample = self._arrange_samples (X, Y, w_X, w_Y)
+      d_loss = self._compute_d_loss (gen_sample, ref_sample)
+      g_loss = self._compute_g_loss (gen_sample, ref_sample)
     threshold = self._compute_threshold (ref_sample)
 
     ## Update metrics state
-    d_loss_tracker . update_state (d_loss + threshold)
-    g_loss_tracker . update_state (g_loss - threshold)
+    self._d_loss_tracker . update_state (d_loss + threshold)
+    self._g_loss_tracker . update_state (g_loss - threshold)
+
+    if updt_outputs is not None:
+      ## Generated half-batch of the last update step
+      batch_size = tf.shape ( gen_sample[0] )[0]
+      Y_gen = gen_sample[0][:,self._X_shape:]
+      Y_ref = Y[batch_size:batch_size*2]
+      w_ref = w_Y[batch_size:batch_size*2] if (w_Y is not None) else None
+      self._mse_tracker . update_state (Y_ref, Y_gen, sample_weight = w_ref)
+    else:
+      Y_gen = self.generate (X)
+      self._mse_tracker . update_state (Y, Y_gen, sample_weight = w_Y)
 
-    Y_gen = self.generate (X)
-    mse_tracker . update_state (Y, Y_gen, sample_weight = w_Y)
+    ## If classifier enabled
+    if self._classifier is not None:
+      if c_loss is None:
+        c_loss = self._compute_c_loss (gen_sample, ref_sample)
+      self._c_loss_tracker . update_state (c_loss)
 
+  def _metrics_results (self) -> dict:
+    """Return the current values of the metric trackers and learning rates."""
     if self._classifier is None:
-      return { "mse"    : mse_tracker.result()    ,
-               "d_loss" : d_loss_tracker.result() , 
-               "g_loss" : g_loss_tracker.result() ,
-               "d_lr"   : self._d_optimizer.lr    ,
-               "g_lr"   : self._g_optimizer.lr    }
-               
+      return { "mse"    : self._mse_tracker.result()    ,
+               "d_loss" : self._d_loss_tracker.result() , 
+               "g_loss" : self._g_loss_tracker.result() ,
+               "d_lr"   : self._d_optimizer.learning_rate ,
+               "g_lr"   : self._g_optimizer.learning_rate }
+
     ## If classifier enabled
     else:
-      c_loss = self._compute_c_loss (gen_sample, ref_sample)
-      c_loss_tracker . update_state (c_loss)
-      return { "mse"    : mse_tracker.result()    ,
-               "c_loss" : c_loss_tracker.result() ,
-               "d_loss" : d_loss_tracker.result() , 
-               "g_loss" : g_loss_tracker.result() ,
-               "d_lr"   : self._d_optimizer.lr    ,
-               "g_lr"   : self._g_optimizer.lr    }
+      return { "mse"    : self._mse_tracker.result()    ,
+               "c_loss" : self._c_loss_tracker.result() ,
+               "d_loss" : self._d_loss_tracker.result() , 
+               "g_loss" : self._g_loss_tracker.result() ,
+               "d_lr"   : self._d_optimizer.learning_rate ,
+               "g_lr"   : self._g_optimizer.learning_rate }
+
+  def _update_step (self, X, Y, w_X = None, w_Y = None) -> tuple:
+    """Run the discriminator and generator updates for one batch.
+
+    The update loops are plain Python loops over the configured number of 
+    updates per batch, hence they are unrolled when the train step is traced 
+    and all the updates end up within the same graph (compiled as a whole 
+    by XLA when `jit_compile` is enabled).
+
+    Parameters
+    ----------
+    X : `tf.Tensor`
+      ...
+
+    Y : `tf.Tensor`
+      ...
+
+    w_X : `tf.Tensor`, optional
+      ... (`None`, by default).
+
+    w_Y : `tf.Tensor`, optional
+      ... (`None`, by default).
+
+    Returns
+    -------
+    updt_outputs : `tuple` of `tf.Tensor`
+      Discriminator loss of the last discriminator update, and generator 
+      loss, reference and generated samples of the last generator update.
+    """
+    ## Discriminator updates per batch
+    for i in range(self._d_updt_per_batch):
+      d_loss = self._train_d_step (X, Y, w_X, w_Y)
+
+    ## Generator updates per batch
+    for j in range(self._g_updt_per_batch):
+      g_loss, ref_sample, gen_sample = self._train_g_step (X, Y, w_X, w_Y)
+
+    return d_loss, g_loss, ref_sample, gen_sample
 
   def _arrange_samples (self, X, Y, w_X = None, w_Y = None) -> tuple:   # TODO complete docstring
     """Arrange the reference and generated samples.
@@ -324,7 +439,7 @@ class GAN (tf.keras.Model):   # TODO add class description
     gen_sample = ( XY_gen, w_gen )
     return ref_sample, gen_sample
 
-  def _train_d_step (self, X, Y, w_X = None, w_Y = None) -> None:   # TODO complete docstring
+  def _train_d_step (self, X, Y, w_X = None, w_Y = None) -> tf.Tensor:   # TODO complete docstring
     """Training step for the discriminator.
     
     Parameters
@@ -340,12 +455,20 @@ class GAN (tf.keras.Model):   # TODO add class description
 
     w_Y : `tf.Tensor`, optional
       ... (`None`, by default).
+
+    Returns
+    -------
+    d_loss : `tf.Tensor`
+      Discriminator loss computed for the update.
     """
     with tf.GradientTape() as tape:
       ref_sample, gen_sample = self._arrange_samples (X, Y, w_X, w_Y)
       d_loss = self._compute_d_loss ( gen_sample, ref_sample )
-    grads = tape.gradient ( d_loss, self._discriminator.trainable_weights )
+      scaled_loss = self._scale_loss ( self._d_optimizer, d_loss )
+    grads = tape.gradient ( scaled_loss, self._discriminator.trainable_weights )
+    grads = self._unscale_grads ( self._d_optimizer, grads )
     self._d_optimizer.apply_gradients ( zip (grads, self._discriminator.trainable_weights) )
+    return d_loss
 
   def _compute_d_loss (self, gen_sample, ref_sample) -> tf.Tensor:   # TODO complete docstring
     """Return the discriminator loss.
@@ -365,7 +488,7 @@ class GAN (tf.keras.Model):   # TODO add class description
     """
     return - self._compute_g_loss (gen_sample, ref_sample)
 
-  def _train_g_step (self, X, Y, w_X = None, w_Y = None) -> None:   # TODO complete docstring
+  def _train_g_step (self, X, Y, w_X = None, w_Y = None) -> tuple:   # TODO complete docstring
     """Training step for the generator.
     
     Parameters
@@ -381,12 +504,26 @@ class GAN (tf.keras.Model):   # TODO add class description
 
     w_Y : `tf.Tensor`, optional
       ... (`None`, by default).
+
+    Returns
+    -------
+    g_loss : `tf.Tensor`
+      Generator loss computed for the update.
+
+    ref_sample : `tuple` of `tf.Tensor`
+      Reference sample used for the update.
+
+    gen_sample : `tuple` of `tf.Tensor`
+      Generated sample used for the update.
     """
     with tf.GradientTape() as tape:
       ref_sample, gen_sample = self._arrange_samples (X, Y, w_X, w_Y)
       g_loss = self._compute_g_loss ( gen_sample, ref_sample )
-    grads = tape.gradient ( g_loss, self._generator.trainable_weights )
+      scaled_loss = self._scale_loss ( self._g_optimizer, g_loss )
+    grads = tape.gradient ( scaled_loss, self._generator.trainable_weights )
+    grads = self._unscale_grads ( self._g_optimizer, grads )
     self._g_optimizer.apply_gradients ( zip (grads, self._generator.trainable_weights) )
+    return g_loss, ref_sample, gen_sample
 
   def _compute_g_loss (self, gen_sample, ref_sample) -> tf.Tensor:   # TODO complete docstring
     """Return the generator loss.
@@ -449,7 +586,7 @@ class GAN (tf.keras.Model):   # TODO add class description
               w_ref_2 * tf.math.log ( tf.clip_by_value ( 1 - D_ref_2 , 1e-12 , 1.0 ) )
     return tf.reduce_mean (th_loss)
 
-  def _train_c_step (self, X, Y, w_X = None, w_Y = None) -> None:   # TODO complete docstring
+  def _train_c_step (self, X, Y, w_X = None, w_Y = None) -> tf.Tensor:   # TODO complete docstring
     """Training step for the classifier.
     
     Parameters
@@ -465,12 +602,20 @@ class GAN (tf.keras.Model):   # TODO add class description
 
     w_Y : `tf.Tensor`, optional
       ... (`None`, by default).
+
+    Returns
+    -------
+    c_loss : `tf.Tensor`
+      Classifier loss computed for the update.
     """
     with tf.GradientTape() as tape:
       ref_sample, gen_sample = self._arrange_samples (X, Y, w_X, w_Y)
       c_loss = self._compute_c_loss ( gen_sample, ref_sample )
-    grads = tape.gradient ( c_loss, self._classifier.trainable_weights )
+      scaled_loss = self._scale_loss ( self._c_optimizer, c_loss )
+    grads = tape.gradient ( scaled_loss, self._classifier.trainable_weights )
+    grads = self._unscale_grads ( self._c_optimizer, grads )
     self._c_optimizer.apply_gradients ( zip (grads, self._classifier.trainable_weights) )
+    return c_loss
 
   def _compute_c_loss (self, gen_sample, ref_sample) -> tf.Tensor:   # TODO complete docstring
     """Return the classifier loss.
@@ -505,6 +650,112 @@ class GAN (tf.keras.Model):   # TODO add class description
              w_ref * (1 - k_ref) * tf.math.log ( tf.clip_by_value ( 1 - C_ref , 1e-12 , 1.0 ) ) 
     return - tf.reduce_mean (c_loss)
 
+  @staticmethod
+  def _scale_loss (optimizer, loss) -> tf.Tensor:
+    """Return the loss scaled for the gradient computation.
+
+    Within a distribution strategy the gradients are summed across the 
+    replicas, hence the per-replica loss is divided by the number of 
+    replicas to match the global-batch loss. Then the loss is scaled by 
+    the loss-scale optimizer (if any).
+    """
+    num_replicas = tf.distribute.get_strategy() . num_replicas_in_sync
+    if num_replicas > 1:
+      loss = loss / num_replicas
+    if isinstance (optimizer, tf.keras.mixed_precision.LossScaleOptimizer):
+      if not hasattr (optimizer, "scale_loss"):   # legacy tf.keras 2 optimizers
+        return optimizer.get_scaled_loss (loss)
+      return optimizer.scale_loss (loss)
+    return loss
+
+  @staticmethod
+  def _unscale_grads (optimizer, grads) -> list:
+    """Return the gradients unscaled by the loss-scale optimizer (if any).
+
+    With Keras 3 the loss-scale optimizer unscales the gradients itself 
+    when applying them, so they are returned unchanged. Since it checks 
+    the gradients of the first replica only to skip a non-finite step, 
+    within a distribution strategy all the gradients are made non-finite 
+    if any replica has non-finite gradients.
+    """
+    if isinstance (optimizer, tf.keras.mixed_precision.LossScaleOptimizer):
+      if hasattr (optimizer, "get_unscaled_gradients"):   # legacy tf.keras 2 optimizers
+        return optimizer.get_unscaled_gradients (grads)
+      replica_ctx = tf.distribute.get_replica_context()
+      if (replica_ctx is not None) and (replica_ctx.num_replicas_in_sync > 1):
+        n_nonfinite = tf.add_n ( [ tf.reduce_sum ( tf.cast ( ~ tf.math.is_finite (g), tf.float32 ) ) 
+                                   for g in grads if g is not None ] )
+        n_nonfinite = replica_ctx.all_reduce ( tf.distribute.ReduceOp.SUM, n_nonfinite )
+        grads = [ g if g is None else tf.where ( n_nonfinite > 0.0, tf.constant (float("nan"), g.dtype), g ) 
+                  for g in grads ]
+    return grads
+
+  @staticmethod
+  def _cast_model (model, input_shape, precision) -> tf.keras.Sequential:
+    """Return a copy of the sequential model with the given precision policy.
+
+    The layers are re-instantiated from their configurations, keeping the 
+    output layer in `float32`, and the weights of the original model (if 
+    already built) are copied to the new one.
+    """
+    casted = Sequential ( name = model.name )
+    for i, layer in enumerate (model.layers):
+      config = layer.get_config()
+      config["dtype"] = precision if ( i < len(model.layers) - 1 ) else "float32"
+      casted . add ( layer.__class__.from_config (config) )
+
+    if model.built:
+      casted . build ( input_shape = input_shape )
+      casted . set_weights ( model.get_weights() )
+    return casted
+
+  @staticmethod
+  def _loss_scaled (optimizer, precision, reset = False) -> tf.keras.optimizers.Optimizer:
+    """Wrap the optimizer with loss scaling, if required by the precision policy.
+
+    If `reset` is `True` (i.e. the networks have been re-instantiated), an 
+    optimizer already built is replaced by a new one with the same 
+    configuration, since its slots refer to the variables of the old networks.
+    """
+    if optimizer is None:
+      return None
+    if isinstance (optimizer, tf.keras.mixed_precision.LossScaleOptimizer):
+      if (precision == "mixed_float16") and not reset:
+        return optimizer
+      optimizer = optimizer.inner_optimizer
+    if reset and getattr (optimizer, "built", False):
+      optimizer = optimizer.__class__.from_config ( optimizer.get_config() )
+    if precision == "mixed_float16":   # bfloat16 has the same dynamic range of float32
+      optimizer = tf.keras.mixed_precision.LossScaleOptimizer (optimizer)
+    return optimizer
+
+  def _untrack (self, network) -> None:
+    """Stop tracking a network that is going to be replaced.
+
+    Keras 3 keeps tracking the layers previously assigned to an attribute, 
+    so the replaced network (possibly not built) would still be listed 
+    within the layers and the weights of the GAN model.
+    """
+    tracker = getattr (self, "_tracker", None)   # Keras 3 only
+    if (tracker is not None) and (network is not None):
+      tracker.untrack (network)
+
+  def _build_optimizers (self) -> None:
+    """Build the optimizers on the trainable variables of their networks.
+
+    The optimizer slots are created here, within the scope of the default 
+    distribution strategy, instead of lazily within the replicated train 
+    step, where they can't be created.
+    """
+    with tf.distribute.get_strategy() . scope():
+      for optimizer, model in [ (self._d_optimizer, self._discriminator) , 
+                                (self._g_optimizer, self._generator) , 
+                                (self._c_optimizer, self._classifier) ]:
+        if (optimizer is None) or (model is None):
+          continue
+        if not getattr (optimizer, "built", True):   # legacy tf.keras 2 optimizers build lazily
+          optimizer . build (model.trainable_variables)
+
   def generate (self, X) -> tf.Tensor:   # TODO complete docstring
     """Method to generate the target variables `Y` given the input features `X`.
     
@@ -593,6 +844,82 @@ class GAN (tf.keras.Model):   # TODO add class description
     """Number of discriminator updates per batch."""
     return self._d_updt_per_batch
 
+  @property
+  def reuse_updt_outputs (self) -> bool:
+    """Whether the metric trackers reuse the outputs of the last update step."""
+    return self._reuse_updt_outputs
+
+  @property
+  def metrics_updt_freq (self) -> int:
+    """Number of batches between two updates of the metric trackers."""
+    return self._metrics_updt_freq
+
+  @property
+  def precision (self) -> str:
+    """Precision policy of the discriminator, generator and classifier."""
+    return self._precision
+
+  @precision.setter
+  def precision (self, precision) -> None:
+    self._set_precision (precision)
+
+  def _set_precision (self, precision) -> None:
+    """Cast the networks to the precision policy and wrap the optimizers 
+    (if already compiled) with loss scaling, if required."""
+    ## data-value control
+    if precision not in PRECISIONS:
+      raise ValueError ( f"The precision policy should be chosen in {PRECISIONS}, "
+                         f"'{precision}' passed." )
+
+    reset = ( precision != self._precision )
+    if reset:
+      for network in [self._discriminator, self._generator, self._classifier]:
+        self._untrack (network)
+      self._discriminator = self._cast_model ( self._discriminator, (None, self._X_shape + self._Y_shape), precision )
+      self._generator = self._cast_model ( self._generator, (None, self._X_shape + self._latent_dim), precision )
+      if self._classifier is not None:
+        self._classifier = self._cast_model ( self._classifier, (None, self._X_shape + self._Y_shape), precision )
+
+    ## Loss scaling of the optimizers (if already compiled)
+    if getattr (self, "_d_optimizer", None) is not None:
+      self._d_optimizer = self._loss_scaled ( self._d_optimizer, precision, reset )
+      self._g_optimizer = self._loss_scaled ( self._g_optimizer, precision, reset )
+      self._c_optimizer = self._loss_scaled ( self._c_optimizer, precision, reset )
+      self._build_optimizers()
+
+    self._precision = precision
+
   @property
   def metrics (self) -> list:
-    return [d_loss_tracker, g_loss_tracker, mse_tracker]
+    if self._classifier is None:
+      return [self._d_loss_tracker, self._g_loss_tracker, self._mse_tracker]
+    return [self._d_loss_tracker, self._g_loss_tracker, self._c_loss_tracker, self._mse_tracker]
+
+
+
+if __name__ == "__main__":
+  ## Two logical CPU devices for data-parallel training
+  cpu = tf.config.list_physical_devices ("CPU") [0]
+  tf.config.set_logical_device_configuration ( cpu, [ tf.config.LogicalDeviceConfiguration() ] * 2 )
+  strategies = { "default"  : tf.distribute.get_strategy() ,
+                 "mirrored" : tf.distribute.MirroredStrategy ( ["/cpu:0", "/cpu:1"] ) }
+
+  ## Smoke fit for each strategy and precision policy
+  X = np.random.normal ( size = (1024, 3) ) . astype (np.float32)
+  Y = np.random.normal ( size = (1024, 2) ) . astype (np.float32)
+  w = np.ones ( (1024, 1), dtype = np.float32 )
+  dataset = tf.data.Dataset.from_tensor_slices ( (X, Y, w, w) ) . batch (128, drop_remainder = True)
+
+  for name, strategy in strategies.items():
+    for precision in PRECISIONS:
+      with strategy.scope():
+        gan = GAN ( X_shape = 3, Y_shape = 2 ,
+                    discriminator = [ Dense (16, activation = "relu") ] ,
+                    generator = [ Dense (16, activation = "relu") ] ,
+                    latent_dim = 4 )
+        gan . compile ( d_optimizer = tf.keras.optimizers.Adam (1e-3) ,
+                        g_optimizer = tf.keras.optimizers.Adam (1e-3) ,
+                        precision = precision )
+      history = gan . fit ( dataset, epochs = 2, verbose = 0 )
+      print ( f"{name:>8s} , {precision:>15s} : d_loss = {history.history['d_loss'][-1]:+.4f} , "
+              f"g_loss = {history.history['g_loss'][-1]:+.4f}" )
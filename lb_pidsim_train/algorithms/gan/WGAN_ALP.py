@@ -63,7 +63,8 @@ class WGAN_ALP (GAN):   # TODO add class description
                        latent_dim    = latent_dim    )
     self._loss_name = "Wasserstein distance"
 
-    ## Discriminator sequential model
+    ## Discriminator sequential model (replacing the one of GAN)
+    self._untrack (self._discriminator)
     self._discriminator = Sequential ( name = "discriminator" )
     for d_layer in discriminator:
       self._discriminator . add ( d_layer )
@@ -77,7 +78,11 @@ class WGAN_ALP (GAN):   # TODO add class description
                 d_updt_per_batch = 1 , 
                 g_updt_per_batch = 1 ,
                 v_adv_dir_updt   = 1 , 
-                adv_lp_penalty = 100 ) -> None:
+                adv_lp_penalty = 100 ,
+                jit_compile = False ,
+                reuse_updt_outputs = False ,
+                metrics_updt_freq  = 1 ,
+                precision = "float32" ) -> None:
     """Configure the models for WGAN-ALP training.
     
     Parameters
@@ -99,12 +104,30 @@ class WGAN_ALP (GAN):   # TODO add class description
 
     adv_lp_penalty : `int`, optional
       ... (`100`, by default).
+
+    jit_compile : `bool`, optional
+      If `True`, the train step is compiled with XLA (`False`, by default).
+
+    reuse_updt_outputs : `bool`, optional
+      If `True`, the metric trackers reuse the losses and the generated batch 
+      of the last update step (`False`, by default).
+
+    metrics_updt_freq : `int`, optional
+      Number of batches between two updates of the metric trackers during 
+      training (`1`, by default).
+
+    precision : {'float32', 'mixed_float16', 'mixed_bfloat16'}, optional
+      Keras precision policy of the networks (`'float32'`, by default).
     """
     super().compile ( d_optimizer = d_optimizer , 
                       g_optimizer = g_optimizer , 
                       c_optimizer = c_optimizer ,
                       d_updt_per_batch = d_updt_per_batch , 
-                      g_updt_per_batch = g_updt_per_batch )
+                      g_updt_per_batch = g_updt_per_batch ,
+                      jit_compile = jit_compile ,
+                      reuse_updt_outputs = reuse_updt_outputs ,
+                      metrics_updt_freq  = metrics_updt_freq ,
+                      precision = precision )
 
     ## Data-type control
     if not isinstance (v_adv_dir_updt, int):
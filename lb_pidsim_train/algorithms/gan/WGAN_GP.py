@@ -62,7 +62,8 @@ class WGAN_GP (GAN):   # TODO add class description
                        latent_dim    = latent_dim    )
     self._loss_name = "Wasserstein distance"
 
-    ## Discriminator sequential model
+    ## Discriminator sequential model (replacing the one of GAN)
+    self._untrack (self._discriminator)
     self._discriminator = Sequential ( name = "discriminator" )
     for d_layer in discriminator:
       self._discriminator . add ( d_layer )
@@ -75,7 +76,11 @@ class WGAN_GP (GAN):   # TODO add class description
                 c_optimizer = None ,
                 d_updt_per_batch = 1 , 
                 g_updt_per_batch = 1 ,
-                grad_penalty = 10 ) -> None:   # TODO complete docstring
+                grad_penalty = 10 ,
+                jit_compile = False ,
+                reuse_updt_outputs = False ,
+                metrics_updt_freq  = 1 ,
+                precision = "float32" ) -> None:   # TODO complete docstring
     """Configure the models for WGAN-GP training.
     
     Parameters
@@ -91,12 +96,30 @@ class WGAN_GP (GAN):   # TODO add class description
 
     g_updt_per_batch : `int`, optional
       ... (`1`, by default).
+
+    jit_compile : `bool`, optional
+      If `True`, the train step is compiled with XLA (`False`, by default).
+
+    reuse_updt_outputs : `bool`, optional
+      If `True`, the metric trackers reuse the losses and the generated batch 
+      of the last update step (`False`, by default).
+
+    metrics_updt_freq : `int`, optional
+      Number of batches between two updates of the metric trackers during 
+      training (`1`, by default).
+
+    precision : {'float32', 'mixed_float16', 'mixed_bfloat16'}, optional
+      Keras precision policy of the networks (`'float32'`, by default).
     """
     super().compile ( d_optimizer = d_optimizer , 
                       g_optimizer = g_optimizer , 
                       c_optimizer = c_optimizer ,
                       d_updt_per_batch = d_updt_per_batch , 
-                      g_updt_per_batch = g_updt_per_batch )
+                      g_updt_per_batch = g_updt_per_batch ,
+                      jit_compile = jit_compile ,
+                      reuse_updt_outputs = reuse_updt_outputs ,
+                      metrics_updt_freq  = metrics_updt_freq ,
+                      precision = precision )
 
     ## Data-type control
     if not isinstance (grad_penalty, float):
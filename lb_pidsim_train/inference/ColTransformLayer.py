@@ -0,0 +1,51 @@
+#from __future__ import annotations
+
+import tensorflow as tf
+from lb_pidsim_train.inference.TfColTransformer import TfColTransformer
+
+
+class ColTransformLayer (tf.keras.layers.Layer):
+  """Keras layer applying a fitted `LbColTransformer` (or its inverse).
+
+  The affine coefficients, the quantile interpolation tables and the
+  column permutation of the transformer are converted into constants by
+  `TfColTransformer`, so that the layer can be chained with the generator
+  and saved within the same SavedModel.
+
+  Parameters
+  ----------
+  transformer : `LbColTransformer` or `ColumnTransformer` or `TfColTransformer`
+    Fitted transformer to apply.
+
+  inverse : `bool`, optional
+    If `True`, the layer applies the inverse transformation (`False`, by
+    default).
+
+  Examples
+  --------
+  >>> from lb_pidsim_train.utils import preprocessor
+  >>> from lb_pidsim_train.inference import ColTransformLayer
+  >>> scaler = preprocessor ( data, strategies = "weighted-quantile" )
+  >>> layer = ColTransformLayer (scaler)
+  >>> data_scaled = layer (data) . numpy()
+  """
+  def __init__ (self, transformer, inverse = False, **kwargs) -> None:
+    kwargs.setdefault ("trainable", False)
+    super().__init__ (**kwargs)
+    if not isinstance (transformer, TfColTransformer):
+      transformer = TfColTransformer (transformer)
+    self._transformer = transformer
+    self._inverse = bool (inverse)
+
+  def call (self, inputs) -> tf.Tensor:
+    if self._inverse:
+      return self._transformer.inverse_transform (inputs)
+    return self._transformer.transform (inputs)
+
+  def compute_output_shape (self, input_shape) -> tuple:
+    return input_shape
+
+  @property
+  def inverse (self) -> bool:
+    """Flag for the inverse transformation."""
+    return self._inverse
@@ -0,0 +1,186 @@
+#from __future__ import annotations
+
+import numpy as np
+import tensorflow as tf
+
+from lb_pidsim_train.inference.GanPipe import GanPipe
+
+
+NP_FLOAT = np.float32
+"""Default data-type for arrays."""
+
+TF_FLOAT = tf.float32
+"""Default data-type for tensors."""
+
+STEPS = ["Rich", "Muon", "GlobalPID", "GlobalMuonId"]
+"""Models chained by the full pipeline."""
+
+MUON_ERROR_CODE = -1000.
+"""Value of the Muon output features for tracks failing `isMuon`."""
+
+
+class FullPipe (tf.Module):
+  """Rich → Muon → GlobalPID → GlobalMuonId chain of `GanPipe`s, fused
+  into a single TensorFlow graph (preprocessing included).
+
+  The input features are `(p, eta, nTracks, charge, isMuon)` and the output
+  ones are the Rich, Muon, GlobalPID and GlobalMuonId features, concatenated
+  in this order. The tracks are processed in batches of fixed size, copied
+  into preallocated buffers, so that the graph is traced only once.
+
+  Parameters
+  ----------
+  rich, muon, gpid, gmuid : `GanPipe`
+    Pipelines of the four models.
+
+  batch_size : `int`, optional
+    Number of tracks processed by each call of the graph (`100000`, by default).
+
+  seed : `int`, optional
+    Seed of the generator of the latent-space points, used when they are
+    not passed to `predict` (`None`, by default).
+
+  Examples
+  --------
+  >>> from lb_pidsim_train.inference import FullPipe
+  >>> pipe = FullPipe.load ("./models/latest_models", "Pion", "2016-MagUp-data")
+  >>> out = pipe.predict ( np.c_ [p, eta, nTracks, charge, isMuon] )
+  """
+  def __init__ ( self ,
+                 rich ,
+                 muon ,
+                 gpid ,
+                 gmuid ,
+                 batch_size = 100000 ,
+                 seed = None ,
+                 name = None ) -> None:
+    super().__init__ (name = name)
+    self._pipes = [rich, muon, gpid, gmuid]
+
+    ## Data-type control
+    try:
+      self._batch_size = int ( batch_size )
+    except:
+      raise TypeError ("The batch size should be an integer.")
+
+    ## Latent-space slices of each model
+    latent_dims = [ pipe.latent_dim for pipe in self._pipes ]
+    self._latent_edges = np.cumsum ( [0] + latent_dims )
+    self._latent_dim = int ( self._latent_edges[-1] )
+    self._out_dim = int ( sum ( pipe.y_dim for pipe in self._pipes ) )
+
+    if seed is not None:
+      self._rng = tf.random.Generator.from_seed (seed)
+    else:
+      self._rng = tf.random.Generator.from_non_deterministic_state()
+
+    x_spec = tf.TensorSpec ( shape = (self._batch_size, 5), dtype = TF_FLOAT )
+    noise_spec = tf.TensorSpec ( shape = (self._batch_size, self._latent_dim), dtype = TF_FLOAT )
+    self._predict_fn  = tf.function ( self._pipeline, input_signature = [x_spec, noise_spec] )
+    self._generate_fn = tf.function ( self._generate, input_signature = [x_spec] )
+
+  @classmethod
+  def load (cls, model_dir, particle, slot, **kwargs):
+    """Load the four models exported as `{model_dir}/{step}_{particle}_{slot}_latest`.
+
+    Parameters
+    ----------
+    model_dir : `str`
+      Directory containing the exported models.
+
+    particle : `str`
+      Particle name (e.g. `'Pion'`).
+
+    slot : `str`
+      Data-taking slot (e.g. `'2016-MagUp-data'`).
+
+    **kwargs :
+      Other arguments passed to the `FullPipe` constructor.
+
+    Returns
+    -------
+    pipe : `FullPipe`
+      Full pipeline ready to use.
+    """
+    pipes = [ GanPipe.load ( f"{model_dir}/{step}_{particle}_{slot}_latest", name = step ) for step in STEPS ]
+    return cls (*pipes, **kwargs)
+
+  def _pipeline (self, x, noise) -> tf.Tensor:
+    """Chain the four models (traced as a single graph)."""
+    rich, muon, gpid, gmuid = self._pipes
+    noises = [ noise[:,start:stop] for start, stop in zip (self._latent_edges[:-1], self._latent_edges[1:]) ]
+    kinematics, is_muon = x[:,:4], x[:,4:5]
+
+    richdll = rich (kinematics, noises[0])
+    muondll = muon (kinematics, noises[1])
+    muondll = tf.concat ( [ muondll[:,:1], muondll[:,:1] - muondll[:,1:2] ], axis = 1 )
+    muondll = tf.where ( is_muon != 0, muondll, MUON_ERROR_CODE )   # Muon error code
+
+    gpid_out  = gpid  ( tf.concat ( [kinematics, richdll, is_muon, muondll], axis = 1 ), noises[2] )
+    gmuid_out = gmuid ( tf.concat ( [kinematics, richdll, muondll], axis = 1 ), noises[3] )
+    return tf.concat ( [richdll, muondll, gpid_out, gmuid_out], axis = 1 )
+
+  def _generate (self, x) -> tf.Tensor:
+    """Chain the four models, sampling the latent-space points within the graph."""
+    noise = self._rng.normal ( shape = (self._batch_size, self._latent_dim), dtype = TF_FLOAT )
+    return self._pipeline (x, noise)
+
+  def predict (self, X, random = None, out = None) -> np.ndarray:
+    """Generate the output features of the full pipeline.
+
+    Parameters
+    ----------
+    X : `np.ndarray`
+      Array containing the input features `(p, eta, nTracks, charge, isMuon)`.
+
+    random : `np.ndarray`, optional
+      Array containing the latent-space points of the four models,
+      concatenated (`None`, by default). If `None` is selected, the
+      points are sampled from a normal distribution within the graph.
+
+    out : `np.ndarray`, optional
+      Preallocated array where the output features are written (`None`,
+      by default). If `None` is selected, a new array is allocated.
+
+    Returns
+    -------
+    out : `np.ndarray`
+      Array containing the output features.
+    """
+    num_rows = len(X)
+    if random is not None and random.shape[1] < self._latent_dim:
+      raise ValueError ( f"The latent-space points should have at least "
+                         f"{self._latent_dim} columns, {random.shape[1]} passed." )
+    if out is None:
+      out = np.empty ( (num_rows, self._out_dim), dtype = NP_FLOAT )
+
+    ## Preallocated batch buffers
+    x_batch = np.zeros ( (self._batch_size, 5), dtype = NP_FLOAT )
+    if random is not None:
+      noise_batch = np.zeros ( (self._batch_size, self._latent_dim), dtype = NP_FLOAT )
+
+    for start in range (0, num_rows, self._batch_size):
+      stop = min (start + self._batch_size, num_rows)
+      x_batch[:stop-start] = X[start:stop]   # last batch padded with the stale rows
+      if random is None:
+        y_batch = self._generate_fn (x_batch)
+      else:
+        noise_batch[:stop-start] = random[start:stop, :self._latent_dim]
+        y_batch = self._predict_fn (x_batch, noise_batch)
+      out[start:stop] = y_batch.numpy() [:stop-start]
+    return out
+
+  @property
+  def batch_size (self) -> int:
+    """Number of tracks processed by each call of the graph."""
+    return self._batch_size
+
+  @property
+  def latent_dim (self) -> int:
+    """Total dimension of the latent spaces of the four models."""
+    return self._latent_dim
+
+  @property
+  def pipes (self) -> list:
+    """Pipelines of the four models."""
+    return self._pipes
@@ -0,0 +1,109 @@
+#from __future__ import annotations
+
+import pickle
+import tensorflow as tf
+
+from lb_pidsim_train.preprocessing import LbColTransformer
+from lb_pidsim_train.inference.TfColTransformer import TfColTransformer
+
+
+TF_FLOAT = tf.float32
+"""Default data-type for tensors."""
+
+
+class GanPipe (tf.Module):
+  """Generator chained with the preprocessing of its input and output
+  features, as TensorFlow ops.
+
+  Parameters
+  ----------
+  generator : `tf.keras.Model`
+    Generator mapping the preprocessed input features, concatenated with
+    the latent-space points, into the preprocessed output features.
+
+  transform_X : `LbColTransformer` or `ColumnTransformer` or `TfColTransformer`, optional
+    Fitted transformer of the input features (`None`, by default). If
+    `None` is selected, the input features are passed as they are.
+
+  transform_Y : `LbColTransformer` or `ColumnTransformer` or `TfColTransformer`, optional
+    Fitted transformer of the output features (`None`, by default). If
+    `None` is selected, the generated features are returned as they are.
+
+  latent_dim : `int`, optional
+    Dimension of the latent space (`None`, by default). If `None` is
+    selected, it is inferred from the input shape of the generator and
+    the number of input features of `transform_X`.
+  """
+  def __init__ ( self ,
+                 generator ,
+                 transform_X = None ,
+                 transform_Y = None ,
+                 latent_dim = None ,
+                 name = None ) -> None:
+    super().__init__ (name = name)
+    self._generator = generator
+    self._transform_X = _as_tf_transformer (transform_X)
+    self._transform_Y = _as_tf_transformer (transform_Y)
+
+    if latent_dim is None:
+      if self._transform_X is None:
+        raise ValueError ("The latent space dimension should be passed if transform_X is not.")
+      latent_dim = generator.input_shape[-1] - self._transform_X.num_features
+    self._latent_dim = int (latent_dim)
+    self._x_dim = generator.input_shape[-1] - self._latent_dim
+    self._y_dim = generator.output_shape[-1]
+
+  @classmethod
+  def load (cls, model_path, name = None):
+    """Load the generator (`saved_generator`) and the transformers
+    (`transform_X.pkl` and `transform_Y.pkl`) exported by `GanTrainer`.
+
+    Parameters
+    ----------
+    model_path : `str`
+      Directory containing the exported model.
+
+    Returns
+    -------
+    pipe : `GanPipe`
+      Pipeline ready to use.
+    """
+    with open (f"{model_path}/transform_X.pkl", "rb") as file:
+      transform_X = LbColTransformer ( pickle.load (file) )
+    with open (f"{model_path}/transform_Y.pkl", "rb") as file:
+      transform_Y = LbColTransformer ( pickle.load (file) )
+    generator = tf.keras.models.load_model (f"{model_path}/saved_generator")
+    return cls (generator, transform_X, transform_Y, name = name)
+
+  def __call__ (self, x, noise) -> tf.Tensor:
+    """Generate the output features given the input features `x` and
+    the latent-space points `noise` (both as tensors)."""
+    x = tf.cast (x, TF_FLOAT)
+    if self._transform_X is not None:
+      x = self._transform_X.transform (x)
+    y = self._generator ( tf.concat ( [x, tf.cast (noise, TF_FLOAT)], axis = 1 ), training = False )
+    if self._transform_Y is not None:
+      y = self._transform_Y.inverse_transform (y)
+    return y
+
+  @property
+  def latent_dim (self) -> int:
+    """Dimension of the latent space."""
+    return self._latent_dim
+
+  @property
+  def x_dim (self) -> int:
+    """Number of input features."""
+    return self._x_dim
+
+  @property
+  def y_dim (self) -> int:
+    """Number of output features."""
+    return self._y_dim
+
+
+def _as_tf_transformer (transformer):
+  """Convert a fitted transformer into `TfColTransformer`, if needed."""
+  if transformer is None or isinstance (transformer, TfColTransformer):
+    return transformer
+  return TfColTransformer (transformer)
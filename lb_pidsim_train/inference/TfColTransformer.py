@@ -0,0 +1,149 @@
+#from __future__ import annotations
+
+import numpy as np
+import tensorflow as tf
+
+from scipy import stats
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import QuantileTransformer, MinMaxScaler, FunctionTransformer
+from lb_pidsim_train.preprocessing import LbColTransformer
+
+BOUNDS_THRESHOLD = 1e-7
+"""Distance from the quantile bounds used by `QuantileTransformer`."""
+
+
+class TfColTransformer (tf.Module):
+  """TensorFlow replica of a fitted `LbColTransformer`.
+
+  The column-permutation plan and the parameters of the fitted scalers
+  (affine coefficients and quantile interpolation tables) are stored as
+  constants, so that `transform` and `inverse_transform` run as plain
+  TensorFlow ops and can be traced within the same graph of the models.
+
+  Parameters
+  ----------
+  transformer : `lb_pidsim_train.preprocessing.LbColTransformer` or `sklearn.compose.ColumnTransformer`
+    Fitted transformer to replicate.
+
+  dtype : `tf.DType`, optional
+    Data-type used to compute the transformations (`tf.float64`, by
+    default), while the outputs are casted to the data-type of the inputs.
+  """
+  def __init__ (self, transformer, dtype = tf.float64, name = None) -> None:
+    super().__init__ (name = name)
+    if isinstance (transformer, ColumnTransformer):
+      transformer = LbColTransformer (transformer)
+    if not isinstance (transformer, LbColTransformer):
+      raise TypeError ("The transformer should be a fitted LbColTransformer or ColumnTransformer.")
+    self._dtype = dtype
+
+    self._steps = list()
+    for key, scaler, cols, sl, affine, inv_affine in transformer._get_plan():
+      cols = np.arange (len(transformer.permutation)) [cols] if isinstance (cols, slice) else cols
+      self._steps . append ( ( cols, sl, self._step_params (key, scaler, affine, inv_affine) ) )
+    self._inverse_perm = np.argsort (transformer.permutation)
+
+  def transform (self, x) -> tf.Tensor:
+    """Transform the columns of `x`, as `LbColTransformer.transform`."""
+    in_dtype = x.dtype
+    x = tf.cast (x, self._dtype)
+    x_tr = [ self._forward ( tf.gather (x, cols, axis = 1), params ) for cols, _, params in self._steps ]
+    return tf.cast ( tf.concat (x_tr, axis = 1), in_dtype )
+
+  def inverse_transform (self, x) -> tf.Tensor:
+    """Transform back the columns of `x`, as `LbColTransformer.inverse_transform`."""
+    in_dtype = x.dtype
+    x = tf.cast (x, self._dtype)
+    x_tr = [ self._inverse ( x[:,sl], params ) for _, sl, params in self._steps ]
+    x_tr = tf.gather ( tf.concat (x_tr, axis = 1), self._inverse_perm, axis = 1 )
+    return tf.cast (x_tr, in_dtype)
+
+  def _step_params (self, key, scaler, affine, inv_affine) -> dict:
+    """Convert the parameters of a fitted scaler into constants."""
+    const = lambda v: tf.constant ( np.asarray (v, dtype = np.float64), dtype = self._dtype )
+
+    if key == "pass_through" or ( isinstance (scaler, FunctionTransformer) and scaler.func is None ):
+      return dict ( kind = "identity" )
+
+    if affine is not None:   # StandardScaler and MinMaxScaler
+      return dict ( kind = "affine" ,
+                    forward = ( const (affine[0]), const (affine[1]) ) ,
+                    inverse = ( const (inv_affine[0]), const (inv_affine[1]) ) )
+
+    if isinstance (scaler, MinMaxScaler):   # clipped MinMaxScaler
+      return dict ( kind = "affine" ,
+                    forward = ( const (scaler.scale_), const (scaler.min_) ) ,
+                    inverse = ( const (1.0 / scaler.scale_), const (- scaler.min_ / scaler.scale_) ) ,
+                    clip = scaler.feature_range )
+
+    if isinstance (scaler, QuantileTransformer):
+      quantiles = np.asarray (scaler.quantiles_, dtype = np.float64) . T   # shape (n_cols, n_quantiles)
+      references = np.broadcast_to ( scaler.references_, quantiles.shape )
+      return dict ( kind = "quantile" ,
+                    normal = ( scaler.output_distribution == "normal" ) ,
+                    clip = float ( stats.norm.ppf ( 1 - (BOUNDS_THRESHOLD - np.spacing(1)) ) ) ,
+                    quantiles = const (quantiles) ,
+                    references = const (references) ,
+                    rev_quantiles = const (- quantiles[:,::-1]) ,
+                    rev_references = const (- references[:,::-1]) )
+
+    raise TypeError ( f"Transformer {type(scaler).__name__} can't be converted to TensorFlow ops." )
+
+  def _forward (self, x, params) -> tf.Tensor:
+    """Forward transformation of a group of columns."""
+    if params["kind"] == "affine":
+      scale, offset = params["forward"]
+      x = x * scale + offset
+      if "clip" in params:
+        x = tf.clip_by_value (x, *params["clip"])   # clipped MinMaxScaler
+      return x
+
+    if params["kind"] == "quantile":   # as QuantileTransformer._transform_col
+      q, r = params["quantiles"], params["references"]
+      y = 0.5 * ( _interp (x, q, r) - _interp (-x, params["rev_quantiles"], params["rev_references"]) )
+      y = tf.where ( x == q[:,-1], tf.ones_like (y), y )
+      y = tf.where ( x == q[:,0], tf.zeros_like (y), y )
+      if params["normal"]:
+        y = tf.clip_by_value ( tf.math.ndtri (y), -params["clip"], params["clip"] )
+      return y
+
+    return x
+
+  def _inverse (self, x, params) -> tf.Tensor:
+    """Inverse transformation of a group of columns."""
+    if params["kind"] == "affine":
+      scale, offset = params["inverse"]
+      return x * scale + offset
+
+    if params["kind"] == "quantile":   # as QuantileTransformer._transform_col (inverse)
+      q, r = params["quantiles"], params["references"]
+      if params["normal"]:
+        x = 0.5 * tf.math.erfc ( - x / np.sqrt(2.0) )
+      y = _interp (x, r, q)
+      y = tf.where ( x + BOUNDS_THRESHOLD > 1.0, tf.broadcast_to (q[:,-1], tf.shape (y)), y )
+      y = tf.where ( x - BOUNDS_THRESHOLD < 0.0, tf.broadcast_to (q[:,0], tf.shape (y)), y )
+      return y
+
+    return x
+
+  @property
+  def num_features (self) -> int:
+    """Number of transformed features."""
+    return len (self._inverse_perm)
+
+
+def _interp (x, xp, fp) -> tf.Tensor:
+  """Column-wise `np.interp` of `x` (shape `(batch, n_cols)`) on the
+  tables `xp` and `fp` (shape `(n_cols, n_points)`)."""
+  n = xp.shape[1]
+  x_t = tf.transpose (x)
+  j = tf.searchsorted (xp, x_t, side = "right") - 1
+  j = tf.clip_by_value (j, 0, n - 2)
+  x0, x1 = tf.gather (xp, j, batch_dims = 1), tf.gather (xp, j + 1, batch_dims = 1)
+  f0, f1 = tf.gather (fp, j, batch_dims = 1), tf.gather (fp, j + 1, batch_dims = 1)
+  t = tf.math.divide_no_nan (x_t - x0, x1 - x0)
+  y = f0 + t * (f1 - f0)
+  y = tf.where ( x_t < xp[:,:1], fp[:,:1], y )     # left bound
+  y = tf.where ( x_t >= xp[:,-1:], fp[:,-1:], y )  # right bound
+  return tf.transpose (y)
+
@@ -0,0 +1,5 @@
+from .TfColTransformer  import TfColTransformer
+from .ColTransformLayer import ColTransformLayer
+from .GanPipe           import GanPipe
+from .FullPipe          import FullPipe
+from .exportGanModel    import buildGanModel, exportGanModel
\ No newline at end of file
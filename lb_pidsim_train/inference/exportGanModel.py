@@ -0,0 +1,114 @@
+#from __future__ import annotations
+
+import tensorflow as tf
+from lb_pidsim_train.inference.ColTransformLayer import ColTransformLayer
+
+
+TF_FLOAT = tf.float32
+"""Default data-type for tensors."""
+
+
+def buildGanModel ( generator ,
+                    transform_X = None ,
+                    transform_Y = None ,
+                    latent_dim = None ) -> tf.keras.Model:
+  """Chain the generator with the preprocessing layers of its input and
+  output features into a single Keras model.
+
+  Parameters
+  ----------
+  generator : `tf.keras.Model`
+    Generator mapping the preprocessed input features, concatenated with
+    the latent-space points, into the preprocessed output features.
+
+  transform_X : `LbColTransformer` or `ColumnTransformer`, optional
+    Fitted transformer of the input features (`None`, by default).
+
+  transform_Y : `LbColTransformer` or `ColumnTransformer`, optional
+    Fitted transformer of the output features, applied inverted
+    (`None`, by default).
+
+  latent_dim : `int`, optional
+    Dimension of the latent space (`None`, by default). If `None` is
+    selected, it is inferred from the input shape of the generator and
+    the number of input features of `transform_X`.
+
+  Returns
+  -------
+  model : `tf.keras.Model`
+    Model with inputs `[x, noise]` returning the output features in
+    their original scale.
+  """
+  x_layer = ColTransformLayer (transform_X, name = "transform_X") if transform_X is not None else None
+  y_layer = ColTransformLayer (transform_Y, inverse = True, name = "inverse_transform_Y") if transform_Y is not None else None
+
+  if latent_dim is None:
+    if x_layer is None:
+      raise ValueError ("The latent space dimension should be passed if transform_X is not.")
+    latent_dim = generator.input_shape[-1] - x_layer._transformer.num_features
+  x_dim = generator.input_shape[-1] - latent_dim
+
+  x_in  = tf.keras.Input ( shape = (x_dim,), dtype = TF_FLOAT, name = "x" )
+  noise = tf.keras.Input ( shape = (latent_dim,), dtype = TF_FLOAT, name = "noise" )
+  x = x_layer (x_in) if x_layer is not None else x_in
+  y = generator ( tf.keras.layers.Concatenate (axis = 1) ( [x, noise] ) )
+  y = y_layer (y) if y_layer is not None else y
+  return tf.keras.Model ( inputs = [x_in, noise], outputs = y, name = "gan_pipe" )
+
+
+def exportGanModel ( export_dir ,
+                     generator ,
+                     transform_X = None ,
+                     transform_Y = None ,
+                     latent_dim = None ,
+                     verbose = 0 ) -> tf.keras.Model:
+  """Save the generator chained with its preprocessing as one SavedModel.
+
+  The SavedModel exposes two signatures: `serving_default`, taking the
+  input features `x` and the latent-space points `noise`, and `generate`,
+  taking only `x` and sampling the latent-space points within the graph.
+
+  Parameters
+  ----------
+  export_dir : `str`
+    Directory where the SavedModel is written.
+
+  generator, transform_X, transform_Y, latent_dim :
+    See `buildGanModel`.
+
+  verbose : `int`, optional
+    Verbosity mode. `0` = silent (default), `1` = a control message is
+    printed once exported.
+
+  Returns
+  -------
+  model : `tf.keras.Model`
+    The exported model.
+
+  Examples
+  --------
+  >>> from lb_pidsim_train.inference import exportGanModel
+  >>> exportGanModel ( "./models/saved_pipeline", generator, scaler_X, scaler_Y )
+  >>> pipe = tf.saved_model.load ("./models/saved_pipeline")
+  >>> Y = pipe.generate ( tf.constant (X, dtype = tf.float32) )
+  """
+  model = buildGanModel (generator, transform_X, transform_Y, latent_dim)
+  x_dim, latent_dim = model.inputs[0].shape[-1], model.inputs[1].shape[-1]
+
+  module = tf.Module()
+  module.model = model
+
+  @tf.function ( input_signature = [ tf.TensorSpec ( (None, x_dim), TF_FLOAT ) ,
+                                     tf.TensorSpec ( (None, latent_dim), TF_FLOAT ) ] )
+  def serve (x, noise):
+    return model ( [x, noise], training = False )
+
+  @tf.function ( input_signature = [ tf.TensorSpec ( (None, x_dim), TF_FLOAT ) ] )
+  def generate (x):
+    noise = tf.random.normal ( shape = (tf.shape(x)[0], latent_dim), dtype = TF_FLOAT )
+    return model ( [x, noise], training = False )
+
+  module.serve, module.generate = serve, generate
+  tf.saved_model.save ( module, export_dir, signatures = dict ( serving_default = serve, generate = generate ) )
+  if (verbose > 0): print ( f"[INFO] Generator and transformers correctly exported to {export_dir}" )
+  return model
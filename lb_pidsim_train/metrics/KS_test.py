@@ -44,6 +44,9 @@ def KS_test ( x_obs ,
   lb_pidsim_train.metrics.KS_test_from_counts :
     Function used to compute the K-S test of two datasets from bin counts.
 
+  lb_pidsim_train.metrics.KS_test_unbinned :
+    Function used to compute the exact K-S test of two datasets without binning.
+
   Notes
   -----
   In statistics, the **Kolmogorov–Smirnov test** (K–S test) is a nonparametric 
@@ -146,6 +149,124 @@ def KS_test_from_counts (f, g):
   return np.absolute (F - G) . max (axis = 1)
 
 
+def KS_test_unbinned ( x_obs , 
+                       x_exp , 
+                       w_obs = None , 
+                       w_exp = None , 
+                       max_samples = None ) -> np.ndarray:
+  """Return the exact Kolmogorov–Smirnov test of the two input datasets.
+
+  The statistic is computed without binning: the observed and expected 
+  values are stacked and sorted together (one `np.argsort` for all the 
+  features), and the difference of the two empirical CDFs is obtained as 
+  cumulative sum of the normalized weights, positive for the observed 
+  entries and negative for the expected ones.
+
+  Parameters
+  ----------
+  x_obs : array_like
+    Array containing the observed dataset.
+
+  x_exp : array_like
+    Array containing the expected dataset.
+
+  w_obs : `int` or `float` or array_like, optional
+    An array of weights, of the same length as `x_obs`. Each value in `x_obs` 
+    only contributes its associated weight towards the CDF (instead of 1).
+
+  w_exp : `int` or `float` or array_like, optional
+    An array of weights, of the same length as `x_exp`. Each value in `x_exp` 
+    only contributes its associated weight towards the CDF (instead of 1).
+
+  max_samples : `int`, optional
+    Maximum number of entries used for each dataset (`None`, by default). 
+    Larger datasets are randomly subsampled without replacement. If `None` 
+    is selected, all the entries are used.
+
+  Returns
+  -------
+  ks_test : `np.ndarray`
+    Array containing the K-S test for each feature of the two input datasets.
+
+  See Also
+  --------
+  lb_pidsim_train.metrics.KS_test :
+    Function used to compute the K-S test of two datasets from bin counts.
+
+  Notes
+  -----
+  The cost is :math:`O(n \\log n)`, with :math:`n` the total number of entries, 
+  and the statistic does not depend on any binning choice. Tied values are 
+  handled by evaluating the CDFs only after the last entry of each group of 
+  equal values.
+
+  Examples
+  --------
+  >>> import numpy as np
+  >>> a = np.random.normal ( 0. , 1., 10000 )
+  >>> b = np.random.normal ( 0.5, 1., 10000 )
+  >>> from lb_pidsim_train.metrics import KS_test_unbinned
+  >>> KS_test_unbinned ( a, b )
+  [0.1991]
+  """
+  ## Input samples --> 2-D Numpy arrays
+  x_obs = np.asarray (x_obs, dtype = np.float64)
+  x_exp = np.asarray (x_exp, dtype = np.float64)
+  if x_obs.ndim == 1: x_obs = x_obs [:,np.newaxis]
+  if x_exp.ndim == 1: x_exp = x_exp [:,np.newaxis]
+
+  if x_obs.shape[1] != x_exp.shape[1]:
+    raise ValueError ( f"The two datasets should have the same number of features, "
+                       f"{x_obs.shape[1]} and {x_exp.shape[1]} passed." )
+
+  w_obs = _weights (w_obs, len(x_obs))
+  w_exp = _weights (w_exp, len(x_exp))
+
+  ## Random subsampling
+  if max_samples is not None:
+    x_obs, w_obs = _subsample (x_obs, w_obs, int(max_samples))
+    x_exp, w_exp = _subsample (x_exp, w_exp, int(max_samples))
+
+  ## Signed normalized weights
+  sum_obs = np.sum (w_obs)
+  sum_exp = np.sum (w_exp)
+  w = np.concatenate ( [ w_obs / (sum_obs if sum_obs != 0 else 1.) ,
+                        -w_exp / (sum_exp if sum_exp != 0 else 1.) ] )
+
+  ## Merged sort of all the features at once
+  x = np.concatenate ([x_obs, x_exp])
+  order = np.argsort (x, axis = 0)
+  x = np.take_along_axis (x, order, axis = 0)
+
+  ## CDFs difference after each group of tied values
+  diff = np.cumsum (w[order], axis = 0)
+  last = np.ones (x.shape, dtype = bool)
+  last[:-1] = ( x[1:] != x[:-1] )
+  return np.where (last, np.absolute (diff), 0.) . max (axis = 0)
+
+
+def _weights (w, length) -> np.ndarray:
+  """Return the weights as a 1-D array of the given length."""
+  if w is None:
+    return np.ones (length, dtype = np.float64)
+  w = np.asarray (w, dtype = np.float64)
+  if w.ndim == 0:
+    return np.full (length, float(w))
+  w = w.ravel()
+  if len(w) != length:
+    raise ValueError ( f"The weights should have the same length of the dataset, "
+                       f"{len(w)} and {length} passed." )
+  return w
+
+
+def _subsample (x, w, max_samples) -> tuple:
+  """Randomly select up to `max_samples` entries without replacement."""
+  if len(x) <= max_samples:
+    return x, w
+  idx = np.sort ( np.random.choice (len(x), max_samples, replace = False) )
+  return x[idx], w[idx]
+
+
 
 if __name__ == "__main__":
   ## SAMPLE N. 1
@@ -162,4 +283,13 @@ if __name__ == "__main__":
   for bins in binnings:
     ks_test = KS_test (sample_1, sample_2, bins)
     print ( "K-S test (bins - {:.2e}) : {}" . format (bins, ks_test) )
-  
\ No newline at end of file
+  
+
+  from time import time
+  start = time()
+  ks_test = KS_test_unbinned (sample_1, sample_2)
+  print ( "K-S test (unbinned)    : {}  [{:.2f} s]" . format (ks_test, time() - start) )
+
+  start = time()
+  ks_test = KS_test_unbinned (sample_1, sample_2, max_samples = int(1e5))
+  print ( "K-S test (subsampled)  : {}  [{:.2f} s]" . format (ks_test, time() - start) )
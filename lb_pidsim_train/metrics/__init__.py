@@ -1,4 +1,5 @@
 from .KL_div    import KL_div, KL_div_from_counts
 from .JS_div    import JS_div, JS_div_from_counts
-from .KS_test   import KS_test, KS_test_from_counts
-from .chi2_test import chi2_test, chi2_test_from_counts
\ No newline at end of file
+from .KS_test   import KS_test, KS_test_from_counts, KS_test_unbinned
+from .chi2_test import chi2_test, chi2_test_from_counts
+from .BinnedComparison import BinnedComparison
\ No newline at end of file
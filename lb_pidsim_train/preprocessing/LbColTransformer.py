@@ -2,7 +2,8 @@
 
 import numpy as np
 from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import QuantileTransformer
+from sklearn.preprocessing import QuantileTransformer, StandardScaler, MinMaxScaler
+from lb_pidsim_train.preprocessing.WeightedQuantileTransformer import WeightedQuantileTransformer
 
 STRATEGIES = ["pass_through", "minmax", "standard", "simple_quantile", "weighted_quantile"]
 
@@ -17,68 +18,253 @@ class LbColTransformer:   # TODO add docstring
 
   def fit (self, X, y = None, sample_weight = None):
     if sample_weight is None:
-      return self._col_transformer.fit (X, y = y)
+      self._col_transformer.fit (X, y = y)
+      self._compile_plan()
+      return self._col_transformer
 
     else:
       transformers = list()
 
       ## ColumnTransformer stuff
-      self._col_transformer . _check_n_features (X, reset = True)
+      _check_n_features (self._col_transformer, X, reset = True)
       self._col_transformer . _validate_transformers()
       self._col_transformer . _validate_column_callables (X)
       self._col_transformer . _validate_remainder (X)
       self._col_transformer . _validate_transformers()
       self._col_transformer . _validate_column_callables (X)
 
+      sample_weight = np.ravel (sample_weight)
       for key, scaler, cols in self._col_transformer.transformers:
-        if key in ["standard", "weighted_quantile"]:   # sample_weight supported
+        if _strategy (key) in ["standard", "weighted_quantile"]:   # sample_weight supported
           scaler . fit ( X = X[:,cols], sample_weight = sample_weight )
         else:
           scaler . fit ( X = X[:,cols] )
         transformers . append ( scaler )   # fitted transformers
 
       self._col_transformer . _update_fitted_transformers (transformers)
+      self._compile_plan()
       return self._col_transformer
 
-  def fit_transform (self, X, y = None, sample_weight = None):
-    if sample_weight is None:
-      return self._col_transformer.fit_transform (X, y = y)
+  def partial_fit (self, X, y = None, sample_weight = None):
+    """Update the transformers with a chunk of data.
+
+    Parameters
+    ----------
+    X : `np.ndarray`
+      The chunk of data, with shape `(n_samples, n_features)`.
+
+    y : None
+      Ignored.
+
+    sample_weight : array_like, optional
+      An array of weights, of the same length as `X` (`None`, by default).
+      The weights are used only by the `'standard'` and `'weighted_quantile'`
+      transformers.
+
+    Returns
+    -------
+    transformer : `sklearn.compose.ColumnTransformer`
+      The wrapped transformer, updated with the new chunk.
+    """
+    first_call = not hasattr (self._col_transformer, "transformers_")
+    if first_call:
+      ## ColumnTransformer stuff
+      _check_n_features (self._col_transformer, X, reset = True)
+      self._col_transformer . _validate_transformers()
+      self._col_transformer . _validate_column_callables (X)
+      self._col_transformer . _validate_remainder (X)
+      transformers_list = self._col_transformer.transformers
     else:
-      return self . fit (X, y = y, sample_weight = sample_weight) . transform (X)
+      _check_n_features (self._col_transformer, X, reset = False)
+      transformers_list = [ t for t in self._col_transformer.transformers_ if not isinstance (t[1], str) ]
 
-  def transform (self, X):
-    X_tr = list()
-    for key, scaler, cols in self._col_transformer.transformers_:
-      if key == "pass_through":
-        X_tr . append ( X[:,cols] )
+    if sample_weight is not None:
+      sample_weight = np.ravel (sample_weight)
+
+    transformers = list()
+    for key, scaler, cols in transformers_list:
+      strategy = _strategy (key)
+      if strategy == "pass_through":
+        if first_call: scaler . fit ( X = X[:,cols] )
+      elif not hasattr (scaler, "partial_fit"):
+        raise TypeError ( f"The transformer '{key}' ({type(scaler).__name__}) can't be fitted "
+                          f"chunk by chunk, `partial_fit` not available." )
+      elif strategy in ["standard", "weighted_quantile"]:   # sample_weight supported
+        scaler . partial_fit ( X[:,cols], sample_weight = sample_weight )
       else:
-        X_tr . append ( scaler . transform (X[:,cols]) )
-    return np.concatenate ( X_tr, axis = 1 )
+        scaler . partial_fit ( X[:,cols] )
+      transformers . append ( scaler )   # fitted transformers
+
+    self._col_transformer . _update_fitted_transformers (transformers)
+    self._compile_plan()
+    return self._col_transformer
+
+  def fit_transform (self, X, y = None, sample_weight = None, out = None):
+    self . fit (X, y = y, sample_weight = sample_weight)
+    return self . transform (X, out = out)
+
+  def transform (self, X, out = None):
+    """Transform `X` column-wise, writing the result into `out`.
+
+    Parameters
+    ----------
+    X : `np.ndarray`
+      Array to transform, with shape `(n_samples, n_features)`.
+
+    out : `np.ndarray`, optional
+      Preallocated array where the transformed columns are written 
+      (`None`, by default). If `None` is selected, a new array is 
+      allocated, with the floating-point data-type of `X`.
+
+    Returns
+    -------
+    out : `np.ndarray`
+      Array containing the transformed columns, ordered as the transformers.
+    """
+    X, out = self._check_arrays (X, out)
+    for key, scaler, cols, sl, affine, _ in self._get_plan():
+      self._apply ( X, out, src = cols, dst = sl, affine = affine, 
+                    func = None if key == "pass_through" else scaler.transform )
+    return out
 
-  def inverse_transform (self, X):
-    perm_indices = list()
-    for _, _, cols in self._col_transformer.transformers_: 
-      perm_indices += list(cols)
+  def inverse_transform (self, X, out = None):
+    """Apply the inverse transformation to `X` column-wise, writing the 
+    result into `out` with the original ordering of the columns.
 
-    X_perm = np.zeros_like (X)
-    for i, j in enumerate(perm_indices):
-      X_perm[:,j] = X[:,i]
+    Parameters
+    ----------
+    X : `np.ndarray`
+      Array to transform back, with shape `(n_samples, n_features)`.
 
-    X_tr = np.zeros_like (X_perm)
+    out : `np.ndarray`, optional
+      Preallocated array where the inverse-transformed columns are written 
+      (`None`, by default). If `None` is selected, a new array is 
+      allocated, with the floating-point data-type of `X`.
+
+    Returns
+    -------
+    out : `np.ndarray`
+      Array containing the inverse-transformed columns.
+    """
+    X, out = self._check_arrays (X, out)
+    for key, scaler, cols, sl, _, affine in self._get_plan():
+      self._apply ( X, out, src = sl, dst = cols, affine = affine, 
+                    func = None if key == "pass_through" else scaler.inverse_transform )
+    return out
+
+  def _compile_plan (self) -> None:
+    """Compute once the column-permutation plan of the fitted transformers.
+
+    Each entry of the plan contains the transformer, the indices of the
+    original columns (as `slice` when contiguous), the slice of the 
+    transformed columns and, for the affine scalers, the coefficients 
+    of the forward and inverse transformations.
+    """
+    n_features = self._col_transformer.n_features_in_
+    plan , perm = list() , list()
     for key, scaler, cols in self._col_transformer.transformers_:
-      if key == "pass_through":
-        X_tr[:,cols] = X_perm[:,cols]
+      if isinstance (scaler, str):
+        if scaler == "drop": continue
+        key = "pass_through"   # remainder = "passthrough"
+      cols = np.arange (n_features) [cols] . astype (np.intp)
+      if len(cols) == 0: continue
+      sl = slice ( len(perm), len(perm) + len(cols) )
+      perm += list (cols)
+      plan . append ( ( key, scaler, _as_slice (cols), sl, *_affine_coeffs (key, scaler) ) )
+    self._plan = plan
+    self._permutation = np.array (perm, dtype = np.intp)
+
+  def _get_plan (self) -> list:
+    """Return the plan, compiling it for wrapped already-fitted transformers."""
+    if getattr (self, "_plan", None) is None:
+      self._compile_plan()
+    return self._plan
+
+  def _check_arrays (self, X, out) -> tuple:
+    """Validate the input array and allocate the output one, if needed."""
+    self._get_plan()
+    X = np.asarray (X)
+    if X.ndim != 2 or X.shape[1] != len(self._permutation):
+      raise ValueError ( f"The array to transform should have shape (n_samples, {len(self._permutation)}), "
+                         f"{X.shape} passed." )
+    if out is None:
+      dtype = X.dtype if np.issubdtype (X.dtype, np.floating) else np.float64
+      out = np.empty (X.shape, dtype = dtype)
+    elif not isinstance (out, np.ndarray) or out.shape != X.shape:
+      raise ValueError ( f"The output array should be a np.ndarray with shape {X.shape}." )
+    return X, out
+
+  @staticmethod
+  def _apply (X, out, src, dst, affine = None, func = None) -> None:
+    """Write the transformed columns `X[:,src]` into `out[:,dst]`."""
+    if affine is not None:
+      scale, offset = affine
+      if isinstance (dst, slice):   # in place, without temporary arrays
+        view = out[:,dst]
+        view[...] = X[:,src]
+        np.multiply (view, scale, out = view)
+        np.add (view, offset, out = view)
       else:
-        X_tr[:,cols] = scaler . inverse_transform (X_perm[:,cols])
+        out[:,dst] = X[:,src] * scale + offset
+    elif func is None:
+      out[:,dst] = X[:,src]
+    else:
+      out[:,dst] = func (X[:,src])
 
-    return X_tr
+  @property
+  def permutation (self) -> np.ndarray:
+    """Indices of the original columns, ordered as the transformed ones."""
+    self._get_plan()
+    return self._permutation
 
   @property
   def sklearn_transformer (self) -> ColumnTransformer:
     for i, transf in enumerate (self._col_transformer.transformers_):
-      if transf[0] == "weighted_quantile":
+      if isinstance (transf[1], WeightedQuantileTransformer):
         downcasted_scaler = QuantileTransformer()   # downcasting to QuantileTransformer
         for k, v in transf[1].__dict__.items():
           downcasted_scaler.__dict__[k] = v
-        self._col_transformer.transformers_[i][1] = downcasted_scaler
+        self._col_transformer.transformers_[i] = ( transf[0], downcasted_scaler, transf[2] )
     return self._col_transformer
+
+
+def _strategy (key) -> str:
+  """Return the strategy of a transformer named after it (e.g. 
+  `'weighted_quantile'` for `'weighted_quantile_10000'`)."""
+  for strategy in STRATEGIES:
+    if key == strategy or key.startswith (f"{strategy}_"):
+      return strategy
+  return key
+
+
+def _check_n_features (transformer, X, reset) -> None:
+  """Set or check the number of input features across Scikit-Learn versions."""
+  if hasattr (transformer, "_check_n_features"):   # scikit-learn < 1.6
+    transformer . _check_n_features (X, reset = reset)
+  else:
+    from sklearn.utils.validation import _check_n_features as check_n_features
+    check_n_features (transformer, X, reset = reset)
+
+
+def _as_slice (cols):
+  """Return `cols` as `slice`, if contiguous, to index views instead of copies."""
+  if np.all ( np.diff (cols) == 1 ):
+    return slice ( int(cols[0]), int(cols[-1]) + 1 )
+  return cols
+
+
+def _affine_coeffs (key, scaler) -> tuple:
+  """Return the `(scale, offset)` coefficients of the forward and inverse 
+  transformations of an affine scaler (`None`, for the other transformers)."""
+  if key == "pass_through":
+    return None, None
+
+  if type(scaler) is StandardScaler:
+    scale = scaler.scale_ if scaler.scale_ is not None else 1.0
+    mean  = scaler.mean_ if scaler.with_mean else 0.0
+    return ( 1.0 / scale, - mean / scale ), ( scale, mean )
+
+  if ( type(scaler) is MinMaxScaler ) and not getattr (scaler, "clip", False):
+    return ( scaler.scale_, scaler.min_ ), ( 1.0 / scaler.scale_, - scaler.min_ / scaler.scale_ )
+
+  return None, None
@@ -1,19 +1,208 @@
 import numpy as np
+from sklearn.utils import check_random_state
 from sklearn.preprocessing import QuantileTransformer
 
+SKETCH_FACTOR = 10
+"""Number of sketch points per quantile interval used by `partial_fit`."""
+
 
 class WeightedQuantileTransformer (QuantileTransformer):
-  def _compute_weight_distortion_1d(self, var, sample_weights):
-    indices = np.argsort (var)
-    cumulative = np.cumsum(sample_weights[indices])
-    cumulative /= cumulative[-1]
-    return np.interp(self.references_, cumulative, var[indices])
-
-  def fit (self, X, y=None, sample_weights=None):
-    QuantileTransformer.fit(self, X, y)
-    if sample_weights is not None:
-      self.quantiles_ = np.array([
-          self._compute_weight_distortion_1d(x, np.asarray(sample_weights)) 
-            for x, q in zip(X.T, self.quantiles_.T)
-          ]).T
+  """Quantile transformer supporting sample weights.
+
+  The quantiles are computed from the cumulative distribution of the
+  weights, sorting each column once (the sort is vectorized across
+  columns). The data can also be fed in chunks with `partial_fit`: each
+  chunk is merged into a weighted sketch of the cumulative distribution,
+  made of `(value, weight)` pairs where the tied values are aggregated, so
+  that the point masses of discrete columns (e.g. `nTracks`) are preserved
+  exactly. The sketch is compacted on a grid of probabilities refining the
+  grid of quantiles, so that `fit` (i.e. a single chunk) returns the exact
+  weighted quantiles. As for `QuantileTransformer`, NaNs are ignored,
+  together with their weights, when computing the quantiles.
+
+  Parameters
+  ----------
+  See `sklearn.preprocessing.QuantileTransformer`.
+  """
+  def fit (self, X, y = None, sample_weight = None):
+    """Compute the weighted quantiles used for transforming.
+
+    Parameters
+    ----------
+    X : array_like
+      The data used to compute the quantiles, with shape `(n_samples, n_features)`.
+
+    y : None
+      Ignored.
+
+    sample_weight : array_like, optional
+      An array of weights, of the same length as `X` (`None`, by default).
+      If `None` is selected, all the samples have unit weight.
+
+    Returns
+    -------
+    self : `WeightedQuantileTransformer`
+      Fitted transformer.
+    """
+    for attr in ["_sketch", "_sketch_weight", "n_samples_seen_"]:
+      if hasattr (self, attr): delattr (self, attr)
+    return self . partial_fit (X, y = y, sample_weight = sample_weight)
+
+  def partial_fit (self, X, y = None, sample_weight = None):
+    """Update the weighted quantiles with a chunk of data.
+
+    Parameters
+    ----------
+    X : array_like
+      The chunk of data, with shape `(n_samples, n_features)`.
+
+    y : None
+      Ignored.
+
+    sample_weight : array_like, optional
+      An array of weights, of the same length as `X` (`None`, by default).
+      If `None` is selected, all the samples have unit weight.
+
+    Returns
+    -------
+    self : `WeightedQuantileTransformer`
+      Transformer updated with the new chunk.
+    """
+    if hasattr (self, "_validate_params"):   # scikit-learn >= 1.2
+      self._validate_params()
+
+    first_call = not hasattr (self, "_sketch")
+    X = self._check_inputs (X, in_fit = first_call, copy = False)
+    if sample_weight is None:
+      sample_weight = np.ones (len(X))
+    sample_weight = np.asarray (sample_weight, dtype = np.float64) . ravel()
+    if len(sample_weight) != len(X):
+      raise ValueError ( f"sample_weight should have the same length as X, "
+                         f"{len(sample_weight)} and {len(X)} passed." )
+
+    ## Subsampling
+    if ( self.subsample is not None ) and ( len(X) > self.subsample ):
+      rng = check_random_state (self.random_state)
+      idx = rng.choice (len(X), size = self.subsample, replace = False)
+      X, sample_weight = X[idx], sample_weight[idx]
+
+    if first_call:
+      self._sketch = [None] * X.shape[1]
+      self._sketch_weight = 0.0
+      self.n_samples_seen_ = 0
+    probs = np.linspace ( 0, 1, SKETCH_FACTOR * (self.n_quantiles - 1) + 1 )
+
+    ## Single sort of the chunk, vectorized across columns
+    indices = np.argsort (X, axis = 0)
+    X_sorted = np.take_along_axis (X, indices, axis = 0)
+    w_sorted = sample_weight[indices]
+
+    for i in range (X.shape[1]):
+      finite = np.isfinite (X_sorted[:,i])   # NaNs ignored, as QuantileTransformer
+      if not np.any (finite): continue
+      sketch = _compact_sketch ( _sorted_sketch ( X_sorted[finite,i], w_sorted[finite,i] ), probs )
+      if self._sketch[i] is not None:   # merge the chunk into the sketch
+        sketch = _compact_sketch ( _merge_sketches ( self._sketch[i], sketch ), probs )
+      self._sketch[i] = sketch
+
+    self._sketch_weight += np.sum (sample_weight)
+    self.n_samples_seen_ += len(X)
+
+    ## Quantiles of reference
+    self.n_quantiles_ = max ( 1, min (self.n_quantiles, self.n_samples_seen_) )
+    self.references_ = np.linspace (0, 1, self.n_quantiles_, endpoint = True)
+    self.quantiles_ = np.array ( [ _sketch_quantiles (sketch, self.references_) if sketch is not None
+                                   else np.full (self.n_quantiles_, np.nan) for sketch in self._sketch ] ) . T
+    self.quantiles_ = np.maximum.accumulate (self.quantiles_)   # ensure monotonicity
     return self
+
+
+def _sorted_sketch (x, w) -> tuple:
+  """Build the sketch `(values, lo, hi)` of a sorted column and its weights.
+
+  The tied values are aggregated: `hi` is the cumulative weight up to each
+  distinct value included, `lo` the one up to its first occurrence, so that
+  the inverse cumulative distribution is flat over `[lo, hi]` and linear
+  between consecutive values (as for the interpolation of sorted samples).
+  """
+  first = np.flatnonzero ( np.r_ [True, x[1:] != x[:-1]] )
+  counts = np.diff ( np.r_ [first, len(x)] )
+  weights = np.add.reduceat (w, first)
+  hi = np.maximum.accumulate ( np.cumsum (weights) )   # negative weights may break monotonicity
+  hi_prev = np.r_ [0.0, hi[:-1]]
+  lo = np.clip ( hi_prev + weights / counts, hi_prev, hi )
+  lo[0] = 0.0
+  return x[first], lo, hi
+
+
+def _sketch_cdf (sketch, x) -> tuple:
+  """Evaluate the cumulative weight of a sketch at `x`, returning the
+  left limits and the values."""
+  values, lo, hi = sketch
+  k = np.searchsorted (values, x, side = "left")
+  kk = np.minimum (k, len(values) - 1)
+  exact = values[kk] == x
+
+  ## Linear interpolation within the gaps between values
+  prev = np.maximum (k - 1, 0)
+  dx = values[kk] - values[prev]
+  t = np.divide ( x - values[prev], dx, out = np.zeros_like (x), where = dx > 0 )
+  gap = hi[prev] + t * (lo[kk] - hi[prev])
+  gap = np.where ( k == 0, 0.0, gap )                 # below the sketch
+  gap = np.where ( k == len(values), hi[-1], gap )    # above the sketch
+
+  return np.where (exact, lo[kk], gap), np.where (exact, hi[kk], gap)
+
+
+def _merge_sketches (a, b) -> tuple:
+  """Merge two sketches, adding their cumulative weights at the union of
+  their values (the tied values being aggregated)."""
+  x = np.union1d (a[0], b[0])
+  lo_a, hi_a = _sketch_cdf (a, x)
+  lo_b, hi_b = _sketch_cdf (b, x)
+  return x, lo_a + lo_b, hi_a + hi_b
+
+
+def _compact_sketch (sketch, probs) -> tuple:
+  """Keep the values bracketing the inverse cumulative distribution on the
+  grid `probs`, so that it is unchanged on the grid. Any value with a weight
+  larger than the grid spacing (e.g. a point mass) is kept."""
+  values, lo, hi = sketch
+  if len(values) <= 2 * len(probs):
+    return sketch
+  keep = np.minimum ( np.searchsorted (hi, probs * hi[-1], side = "left"), len(values) - 1 )
+  keep = np.unique ( np.r_ [0, keep - 1, keep, len(values) - 1] . clip (0) )
+  return values[keep], lo[keep], hi[keep]
+
+
+def _sketch_quantiles (sketch, references) -> np.ndarray:
+  """Inverse cumulative distribution of a sketch at the probabilities `references`."""
+  values, lo, hi = sketch
+  p = references * hi[-1]
+  k = np.minimum ( np.searchsorted (hi, p, side = "left"), len(values) - 1 )
+  prev = np.maximum (k - 1, 0)
+  gap = lo[k] - hi[prev]
+  t = np.divide ( p - hi[prev], gap, out = np.ones_like (p), where = (p < lo[k]) & (gap > 0) )
+  return values[prev] + t * (values[k] - values[prev])
+
+
+
+if __name__ == "__main__":
+  from time import time
+
+  X = np.random.normal (size = (1000000, 4))
+  w = np.random.uniform (0., 1., size = len(X))
+
+  ## Single-pass fit
+  start = time()
+  scaler = WeightedQuantileTransformer (n_quantiles = 1000, subsample = int(1e8))
+  scaler . fit (X, sample_weight = w)
+  print ( f"fit         : {time()-start:.3f} s" )
+
+  ## Chunked fit
+  start = time()
+  chunked = WeightedQuantileTransformer (n_quantiles = 1000, subsample = int(1e8))
+  for X_chunk, w_chunk in zip ( np.array_split (X, 10), np.array_split (w, 10) ):
+    chunked . partial_fit (X_chunk, sample_weight = w_chunk)
+  print ( f"partial_fit : {time()-start:.3f} s" )
+  print ( f"max quantile difference: {np.abs (scaler.quantiles_ - chunked.quantiles_) . max():.2e}" )
@@ -8,10 +8,18 @@ from time import time
 from warnings import warn
 from datetime import datetime
 from lb_pidsim_train.trainers import DataHandler
-from lb_pidsim_train.utils    import pre_preprocessing_step, preprocessor
+from lb_pidsim_train.trainers.DataHandler import _file_signature
+from lb_pidsim_train.utils    import pre_preprocessing_step, preprocessor, DatasetCache
 from lb_pidsim_train.utils    import warn_message as wm
 
 
+SHARED_DIR = "/dev/shm/lb_pidsim_train"
+"""Default directory for the datasets shared across processes."""
+
+SHARED_MAX_AGE = 24 * 3600
+"""Default time (in seconds) after which unused shared datasets are removed."""
+
+
 class BaseTrainer (DataHandler):   # TODO class description
   """Base class for training models.
   
@@ -36,6 +44,10 @@ class BaseTrainer (DataHandler):   # TODO class description
     Verbosity mode. `False` = silent (default), 
     `True` = warning messages are enabled. 
   """
+  _SHARED_ATTRS = [ "_X", "_Y", "_w", "_X_scaled", "_Y_scaled", 
+                    "_scaler_X", "_scaler_Y", "_X_vars", "_Y_vars", "_w_var" ]
+  """Attributes published by `publish_dataset` and restored by `attach_dataset`."""
+
   def __init__ ( self ,
                  name ,
                  export_dir  = None ,
@@ -93,6 +105,7 @@ class BaseTrainer (DataHandler):   # TODO class description
                         X_vars_to_preprocess = None ,
                         Y_vars_to_preprocess = None ,
                         subsample_size = None ,
+                        chunked_fit = False ,
                         save_transformer = True ,
                         verbose = 0 ) -> None:   # TODO fix the attribute types inserted within the docstring
     """Split the data-chunk into X, Y and w, and perform preprocessing.
@@ -121,6 +134,12 @@ class BaseTrainer (DataHandler):   # TODO class description
       Data-chunk subsample size used to compute the preprocessing transformer 
       parameters (`None`, by default).
 
+    chunked_fit : `bool`, optional
+      If `True`, the preprocessing transformers are fitted with `partial_fit` 
+      over a chunked pass of the ROOT files, instead of on the data-chunk 
+      or its subsample (`False`, by default). It requires the streaming mode 
+      enabled by `feed_from_root_files`.
+
     save_transformer : `bool`, optional
       Boolean flag to save and export the transformers, if preprocessing 
       is enabled (`True`, by default).
@@ -130,6 +149,14 @@ class BaseTrainer (DataHandler):   # TODO class description
       transformers saving is printed, `2`= also times for shuffling and 
       preprocessing are printed. 
 
+    Notes
+    -----
+    If the dataset cache is enabled by `feed_from_root_files`, the fitted 
+    transformers and the preprocessed arrays are stored within the cache 
+    entry of the data-chunk, and memory-mapped by later calls with the 
+    same preprocessing configuration and the same row order of the 
+    data-chunk.
+
     See Also
     --------
     lb_pidsim_train.utils.preprocessor :
@@ -138,6 +165,26 @@ class BaseTrainer (DataHandler):   # TODO class description
     super().prepare_dataset (verbose = verbose)
     self._dataset_prepared = False   # switch off dataset prepared flag
     self._params.get ( "subsample_size", subsample_size )
+    self._params.get ( "chunked_fit", chunked_fit )
+    if chunked_fit and not self._streaming:
+      raise RuntimeError ( "Streaming mode not enabled, `feed_from_root_files` "
+                           "should be called with `streaming = True` to fit the "
+                           "transformers chunk by chunk." )
+
+    ## Preprocessed arrays from cache
+    entry = None
+    if self._cache is not None:
+      prep_key = DatasetCache.hash ( dict ( X_preprocessing = X_preprocessing , 
+                                            Y_preprocessing = Y_preprocessing , 
+                                            X_vars_to_preprocess = X_vars_to_preprocess , 
+                                            Y_vars_to_preprocess = Y_vars_to_preprocess , 
+                                            subsample_size = subsample_size , 
+                                            chunked_fit = chunked_fit , 
+                                            weighted = bool (self.w_var) ,
+                                            shuffle_id = self._shuffle_id ) )   # row order of X, Y and w
+      prep_key = f"{self._cache_key}/{prep_key}"
+      entry = self._cache.load (prep_key)
+    deferred_fit = chunked_fit and (entry is None)   # transformers fitted after the chunked pass
 
     ## Preprocessed input array
     if X_preprocessing is not None:
@@ -149,15 +196,21 @@ class BaseTrainer (DataHandler):   # TODO class description
                                                                             all_vars = self.X_vars )
       else:
         X_cols_to_preprocess = None
-      self._scaler_X = preprocessor ( data = self.X[:subsample_size] if subsample_size else self.X ,
-                                      weights = self._w if self.w_var else None , 
-                                      strategies = X_preprocessing , 
-                                      cols_to_transform = X_cols_to_preprocess )
-      self._X_scaled = self._scaler_X . transform (self.X)   # transform the input-set
+      if entry is not None:
+        self._scaler_X = entry["scaler_X"]
+        self._X_scaled = entry["X_scaled"]
+      else:
+        self._scaler_X = preprocessor ( data = self.X[:subsample_size] if subsample_size else self.X ,
+                                        weights = self._w if self.w_var else None , 
+                                        strategies = X_preprocessing , 
+                                        cols_to_transform = X_cols_to_preprocess ,
+                                        fit = not deferred_fit )
+        if not deferred_fit:
+          self._X_scaled = self._scaler_X . transform (self.X)   # transform the input-set
       stop = time()
       if (verbose > 1): 
         print ( f"[INFO] X-features preprocessed in {stop-start:.3f} s" )
-      if save_transformer: 
+      if save_transformer and not deferred_fit: 
         self._save_transformer ( "transform_X" , 
                                  self._scaler_X.sklearn_transformer ,   # saved as Scikit-Learn class
                                  verbose = (verbose > 0) )
@@ -176,15 +229,21 @@ class BaseTrainer (DataHandler):   # TODO class description
                                                                             all_vars = self.Y_vars )
       else:
         Y_cols_to_preprocess = None
-      self._scaler_Y = preprocessor ( data = self.Y[:subsample_size] if subsample_size else self.Y ,
-                                      weights = self._w if self.w_var else None , 
-                                      strategies = Y_preprocessing , 
-                                      cols_to_transform = Y_cols_to_preprocess )
-      self._Y_scaled = self._scaler_Y . transform (self.Y)   # transform the output-set
+      if entry is not None:
+        self._scaler_Y = entry["scaler_Y"]
+        self._Y_scaled = entry["Y_scaled"]
+      else:
+        self._scaler_Y = preprocessor ( data = self.Y[:subsample_size] if subsample_size else self.Y ,
+                                        weights = self._w if self.w_var else None , 
+                                        strategies = Y_preprocessing , 
+                                        cols_to_transform = Y_cols_to_preprocess ,
+                                        fit = not deferred_fit )
+        if not deferred_fit:
+          self._Y_scaled = self._scaler_Y . transform (self.Y)   # transform the output-set
       stop = time()
       if (verbose > 1): 
         print ( f"[INFO] Y-features preprocessed in {stop-start:.3f} s" )
-      if save_transformer:
+      if save_transformer and not deferred_fit:
         self._save_transformer ( "transform_Y" , 
                                  self._scaler_Y.sklearn_transformer ,   # saved as Scikit-Learn class 
                                  verbose = (verbose > 0) )
@@ -193,8 +252,42 @@ class BaseTrainer (DataHandler):   # TODO class description
       self._scaler_Y = None
       self._Y_scaled = self.Y
 
+    ## Transformers fitted over a chunked pass of the ROOT files
+    if deferred_fit:
+      start = time()
+      self._fit_on_datachunks()
+      if self._scaler_X is not None: self._X_scaled = self._scaler_X . transform (self.X)
+      if self._scaler_Y is not None: self._Y_scaled = self._scaler_Y . transform (self.Y)
+      stop = time()
+      if (verbose > 1): 
+        print ( f"[INFO] Transformers fitted over the ROOT files chunk by chunk in {stop-start:.3f} s" )
+      if save_transformer:
+        for name, scaler in [ ("transform_X", self._scaler_X), ("transform_Y", self._scaler_Y) ]:
+          if scaler is not None:
+            self._save_transformer ( name , 
+                                     scaler.sklearn_transformer ,   # saved as Scikit-Learn class
+                                     verbose = (verbose > 0) )
+
+    ## Preprocessed arrays to cache
+    if (self._cache is not None) and (entry is None):
+      items = dict ( scaler_X = self._scaler_X, scaler_Y = self._scaler_Y )
+      if self._scaler_X is not None: items["X_scaled"] = np.asarray (self._X_scaled)
+      if self._scaler_Y is not None: items["Y_scaled"] = np.asarray (self._Y_scaled)
+      self._cache.store (prep_key, **items)
+      if (verbose > 0): print ( f"[INFO] Preprocessed dataset stored to cache {self._cache.cache_dir}/{prep_key}" )
+    elif entry is not None:
+      if (verbose > 0): print ( f"[INFO] Preprocessed dataset loaded from cache {self._cache.cache_dir}/{prep_key}" )
+
     self._dataset_prepared = True   # switch on dataset prepared flag
 
+  def _fit_on_datachunks (self) -> None:
+    """Fit the preprocessing transformers with `partial_fit`, over 
+    a single chunked pass of the ROOT files."""
+    for X, Y, w in self.iterate_datachunks():
+      w = w if self.w_var else None
+      if self._scaler_X is not None: self._scaler_X . partial_fit (X, sample_weight = w)
+      if self._scaler_Y is not None: self._scaler_Y . partial_fit (Y, sample_weight = w)
+
   def _save_transformer (self, name, transformer, verbose = False) -> None:
     """Save the preprocessing transformer.
     
@@ -221,6 +314,158 @@ class BaseTrainer (DataHandler):   # TODO class description
     pickle . dump ( transformer, open (filename, "wb") )
     if verbose: print ( f"[INFO] Transformer correctly exported to {filename}" )
 
+  def publish_dataset ( self , 
+                        name , 
+                        config = None , 
+                        shared_dir = SHARED_DIR , 
+                        max_size = "4 GB" , 
+                        max_age = SHARED_MAX_AGE , 
+                        verbose = 0 ) -> None:
+    """Publish the prepared dataset to memory-mapped files, so that other 
+    trainers on the same node (e.g. concurrent optimization trials) can 
+    attach to it through `attach_dataset`, sharing a single copy of the 
+    arrays. The trainer itself switches to the memory-mapped arrays.
+
+    Parameters
+    ----------
+    name : `str`
+      Name of the shared dataset.
+
+    config : `dict`, optional
+      JSON-serializable configuration that produced the dataset (e.g. 
+      ROOT files, variables, selections and preprocessing strategies), 
+      hashed together with `name` to key the shared dataset (`None`, by 
+      default). The ROOT files listed as `config["root_files"]` are 
+      identified also by size and last modification time, so that any 
+      change produces a different key.
+
+    shared_dir : `str`, optional
+      Directory hosting the shared datasets (`"/dev/shm/lb_pidsim_train"`, 
+      by default). The default directory lives in RAM on Linux systems.
+
+    max_size : `int` or `str`, optional
+      Disk budget of `shared_dir`, beyond which the least recently used 
+      datasets are removed (`"4 GB"`, by default).
+
+    max_age : `float`, optional
+      Time (in seconds) after which the shared datasets not attached 
+      anymore are removed (one day, by default). Use `release_dataset` 
+      to remove the dataset once done.
+
+    verbose : {0, 1}, optional
+      Verbosity mode. `0` = silent (default), `1` = a control message 
+      is printed.
+
+    See Also
+    --------
+    lb_pidsim_train.utils.DatasetCache :
+      On-disk cache of ready-to-train datasets.
+    """
+    if not self._dataset_prepared:
+      raise RuntimeError ("The dataset should be prepared before being published.")
+
+    items = dict()
+    aliases = dict()
+    for attr in self._SHARED_ATTRS:
+      value = getattr (self, attr, None)
+      same = [ k for k, v in items.items() if isinstance (v, np.ndarray) and (v is value) ]
+      if len(same) > 0:
+        aliases[attr] = f"_{same[0]}"   # e.g. `X_scaled` without preprocessing
+      else:
+        items[attr.lstrip("_")] = value
+    items["aliases"] = aliases
+
+    key = _shared_key (name, config)
+    start = time()
+    DatasetCache (shared_dir, max_size = max_size, max_age = max_age) . store (key, **items)
+    stop = time()
+    if (verbose > 0): print ( f"[INFO] Dataset published to {shared_dir}/{key} in {stop-start:.3f} s" )
+
+    self.attach_dataset (name, config = config, shared_dir = shared_dir)   # switch to the shared copy
+
+  def attach_dataset ( self , 
+                       name , 
+                       config = None , 
+                       shared_dir = SHARED_DIR , 
+                       verbose = 0 ) -> bool:
+    """Attach to a dataset published by `publish_dataset`, replacing the 
+    data-chunk loading and the dataset preparation. The arrays are 
+    memory-mapped read-only, so that all the attached trainers share 
+    the same physical memory.
+
+    Parameters
+    ----------
+    name : `str`
+      Name of the shared dataset.
+
+    config : `dict`, optional
+      Configuration passed to `publish_dataset` (`None`, by default). 
+      Only a dataset published with the same name and configuration 
+      is attached.
+
+    shared_dir : `str`, optional
+      Directory hosting the shared datasets (`"/dev/shm/lb_pidsim_train"`, 
+      by default).
+
+    verbose : {0, 1}, optional
+      Verbosity mode. `0` = silent (default), `1` = a control message 
+      is printed.
+
+    Returns
+    -------
+    attached : `bool`
+      Whether the shared dataset was available and has been attached.
+    """
+    if not os.path.exists (shared_dir):
+      return False
+    key = _shared_key (name, config)
+    entry = DatasetCache (shared_dir) . load (key, mmap_mode = "r")
+    if entry is None:
+      return False
+
+    aliases = entry.pop ("aliases")
+    for key, value in entry.items():
+      setattr (self, f"_{key}", value)
+    for attr, other in aliases.items():
+      setattr ( self, attr, getattr (self, other) )
+
+    self._datachunk = None
+    self._arrays = None
+    self._datachunk_filled = True   # switch on datachunk-filled flag
+    self._dataset_prepared = True   # switch on dataset prepared flag
+    if (verbose > 0): print ( f"[INFO] Dataset of {len (self._X)} rows attached from {shared_dir}/{key}" )
+    return True
+
+  def release_dataset ( self , 
+                        name , 
+                        config = None , 
+                        shared_dir = SHARED_DIR , 
+                        verbose = 0 ) -> None:
+    """Remove a dataset published by `publish_dataset`, freeing the memory 
+    as soon as the trainers still attached to it (if any) are done.
+
+    Parameters
+    ----------
+    name : `str`
+      Name of the shared dataset.
+
+    config : `dict`, optional
+      Configuration passed to `publish_dataset` (`None`, by default).
+
+    shared_dir : `str`, optional
+      Directory hosting the shared datasets (`"/dev/shm/lb_pidsim_train"`, 
+      by default).
+
+    verbose : {0, 1}, optional
+      Verbosity mode. `0` = silent (default), `1` = a control message 
+      is printed.
+    """
+    if not os.path.exists (shared_dir):
+      return
+    key = _shared_key (name, config)
+    DatasetCache (shared_dir) . remove (key)
+    if (verbose > 0): print ( f"[INFO] Dataset {shared_dir}/{key} released" )
+
   def train_model (self) -> None:   # TODO add docstring
     """short description"""
     raise NotImplementedError ("error")   # TODO add error message
@@ -245,6 +490,19 @@ class BaseTrainer (DataHandler):   # TODO class description
     """Array containing a preprocessed version of the output-set."""
     return self._Y_scaled
 
+
+
+def _shared_key (name, config = None) -> str:
+  """Return the key of a shared dataset, hashing its configuration."""
+  if config is None:
+    return name
+  config = dict (config)
+  if "root_files" in config:
+    root_files = config["root_files"]
+    root_files = [root_files] if isinstance (root_files, str) else root_files
+    config["root_files"] = [ _file_signature (f) for f in root_files ]
+  return f"{name}-{DatasetCache.hash (config)}"
+
     
 
 if __name__ == "__main__":   # TODO complete __main__
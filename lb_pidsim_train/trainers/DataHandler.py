@@ -1,5 +1,7 @@
 #from __future__ import annotations
 
+import os
+import uuid
 import uproot
 import numpy as np
 import pandas as pd
@@ -7,7 +9,8 @@ import pandas as pd
 from time import time
 from sklearn.utils import shuffle
 from lb_pidsim_train.utils.ParamHandler import getInstance, ParamHandler
-from lb_pidsim_train.utils import data_from_trees, nan_filter
+from lb_pidsim_train.utils import data_from_trees, arrays_from_trees, stream_from_files, nan_filter
+from lb_pidsim_train.utils import DatasetCache
 
 
 NP_FLOAT = np.float32
@@ -22,6 +25,10 @@ class DataHandler:   # TODO add class description
     ## Switch off all flags
     self._datachunk_filled = False
     self._dataset_prepared = False
+    self._streaming = False
+    self._from_cache = False
+    self._cache = None
+    self._shuffle_id = None
 
   def feed_from_root_files ( self ,
                              root_files  , 
@@ -31,6 +38,14 @@ class DataHandler:   # TODO add class description
                              selections = None ,
                              tree_names = None ,
                              chunk_size = None ,
+                             sampling   = "window" ,
+                             fill       = False ,
+                             streaming  = False ,
+                             step_size  = "100 MB" ,
+                             library = "pd" ,
+                             num_workers = None ,
+                             cache_dir  = None ,
+                             cache_size = "20 GB" ,
                              verbose = 0 ) -> None:
     """Feed the training procedure with ROOT files.
     
@@ -63,6 +78,52 @@ class DataHandler:   # TODO add class description
       Total number of instance rows loaded to disk for the training 
       procedure (`None`, by default).
 
+    sampling : {'window', 'baskets', 'entries'}, optional
+      Strategy used to pick the data-chunk entries from each ROOT tree. 
+      With `'window'` (default) a contiguous slice of entries is read, 
+      with `'baskets'` random clusters of baskets are read, while with 
+      `'entries'` random entries are picked reading only the clusters 
+      that include them.
+
+    fill : `bool`, optional
+      If `True`, `chunk_size` refers to the rows passing the `selections`: 
+      the ROOT trees are read in batches, sized on the selection efficiency 
+      measured on the fly, until `chunk_size` selected rows are collected 
+      (`False`, by default).
+
+    streaming : `bool`, optional
+      If `True`, the ROOT files are also prepared to be iterated chunk 
+      by chunk through `iterate_datachunks`, so that the training procedure 
+      can run over samples larger than memory. The data-chunk is still 
+      loaded and used for preprocessing, validation and reports (`False`, 
+      by default).
+
+    step_size : `int` or `str`, optional
+      Number of entries or memory size of each chunk read from disk when 
+      `streaming` is enabled (`"100 MB"`, by default).
+
+    library : {'pd', 'np'}, optional
+      Library used to load the data-chunk. With `'pd'` (default) the 
+      data-chunk is loaded as `pd.DataFrame`, while with `'np'` the 
+      branches are read straight into preallocated `np.float32` arrays 
+      for input, output and weights, bypassing pandas and reducing the 
+      peak memory. In the latter case `datachunk` is `None`.
+
+    num_workers : `int`, optional
+      Number of threads used to read the ROOT trees concurrently and to 
+      decompress the streamed chunks (`None`, by default).
+
+    cache_dir : `str`, optional
+      Directory of the on-disk dataset cache (`None`, by default). If 
+      passed, the shuffled arrays are stored by `prepare_dataset` under 
+      a key hashed from files, input/output/weight variables, library, 
+      selections and sampling options, and repeated calls with the same 
+      configuration memory-map them instead of reading the ROOT files. In that case `datachunk` is `None`.
+
+    cache_size : `int` or `str`, optional
+      Disk budget of the dataset cache, beyond which the least recently 
+      used datasets are evicted (`"20 GB"`, by default).
+
     verbose : {0, 1}, optional
       Verbosity mode. `0` = silent (default), `1` = time for data-chunk 
       loading is printed. 
@@ -71,7 +132,19 @@ class DataHandler:   # TODO add class description
     --------
     lb_pidsim_train.utils.data_from_trees :
       Stratified data shuffling from list of `uproot.TTree`.
+
+    lb_pidsim_train.utils.arrays_from_trees :
+      Stratified data shuffling from list of `uproot.TTree` into NumPy arrays.
+
+    lb_pidsim_train.utils.stream_from_files :
+      Out-of-core data streaming from list of ROOT files.
+
+    lb_pidsim_train.utils.DatasetCache :
+      On-disk cache of ready-to-train datasets.
     """
+    if library not in ["pd", "np"]:
+      raise ValueError ( f"`library` should be chosen in ['pd', 'np'], '{library}' passed." )
+
     ## List data-type promotion
     if isinstance (root_files, str):
       root_files = [root_files]
@@ -111,6 +184,7 @@ class DataHandler:   # TODO add class description
 
     ## ROOT trees extraction
     trees = list()
+    files = list()
     for fname, tname in zip (root_files, tree_names):
       file = uproot.open (fname)
       if tname is not None:
@@ -120,19 +194,81 @@ class DataHandler:   # TODO add class description
         key = key[0] . split (";") [0]   # take the tree name
       t = file [key]
       trees . append (t)
+      files . append ( {fname: key} )
 
     ## Data selection
     if selections:
       selections = "&".join ("(%s)" % s for s in selections)
 
+    ## Streaming settings
+    self._streaming = self._params.get ( "streaming", streaming )
+    if self._streaming:
+      self._stream_kwargs = dict ( files = files , 
+                                   branches = branches ,
+                                   cut = selections ,
+                                   step_size = step_size ,
+                                   num_workers = num_workers )
+
+    chunk_size = self._params.get ( "chunk_size", chunk_size )
+    sampling = self._params.get ( "sampling", sampling )
+    fill = self._params.get ( "fill", fill )
+
+    ## Cached dataset
+    self._from_cache = False
+    self._cache = None
+    if cache_dir is not None:
+      self._cache = DatasetCache (cache_dir, max_size = cache_size)
+      self._cache_key = DatasetCache.hash ( dict ( files = [ _file_signature (f) for f in root_files ] , 
+                                                   tree_names = [ list(f.values())[0] for f in files ] ,
+                                                   X_vars = X_vars , 
+                                                   Y_vars = Y_vars , 
+                                                   w_var = w_var , 
+                                                   library = library , 
+                                                   selections = selections , 
+                                                   chunk_size = chunk_size , 
+                                                   sampling = sampling , 
+                                                   fill = fill ) )
+      start = time()
+      entry = self._cache.load (self._cache_key)
+      if (entry is not None) and ("shuffle_id" in entry):
+        self._datachunk = None
+        self._arrays = ( entry["X"], entry["Y"], entry["w"] )
+        self._shuffle_id = entry["shuffle_id"]
+        self._from_cache = True
+        self._datachunk_filled = True   # switch on datachunk-filled flag
+        stop = time()
+        if (verbose > 0): print ( f"[INFO] Data-chunk of {len (self._arrays[0])} rows"
+                                  f" correctly loaded from cache in {stop-start:.3f} s" )
+        return
+
     start = time()
-    self._datachunk = data_from_trees ( trees = trees , 
-                                        branches = branches ,
-                                        cut = selections    ,
-                                        chunk_size = self._params.get ("chunk_size", chunk_size) )
+    if library == "pd":
+      self._datachunk = data_from_trees ( trees = trees , 
+                                          branches = branches ,
+                                          cut = selections    ,
+                                          chunk_size = chunk_size ,
+                                          sampling = sampling ,
+                                          fill = fill ,
+                                          num_workers = num_workers )
+      self._arrays = None
+      num_rows = len (self._datachunk)
+    else:
+      if (X_vars is None) or (Y_vars is None):
+        raise ValueError ("Both input and output variables should be passed to load the data-chunk as arrays.")
+      self._datachunk = None
+      self._arrays = arrays_from_trees ( trees = trees ,
+                                         X_vars = X_vars ,
+                                         Y_vars = Y_vars ,
+                                         w_var  = w_var  ,
+                                         cut = selections ,
+                                         chunk_size = chunk_size ,
+                                         sampling = sampling ,
+                                         fill = fill ,
+                                         num_workers = num_workers )
+      num_rows = len (self._arrays[0])
     self._datachunk_filled = True   # switch on datachunk-filled flag
     stop = time()
-    if (verbose > 0): print ( f"[INFO] Data-chunk of {len(self.datachunk)} rows"
+    if (verbose > 0): print ( f"[INFO] Data-chunk of {num_rows} rows"
                               f" correctly loaded in {stop-start:.3f} s" )
 
   def prepare_dataset (self, verbose = 0) -> None:
@@ -148,10 +284,16 @@ class DataHandler:   # TODO add class description
       raise RuntimeError ("error")   # TODO implement error
 
     X, Y, w = self._unpack_data()
-    start = time()
-    X, Y, w = shuffle (X, Y, w)
-    stop = time()
-    if verbose: print ( f"[INFO] Whole data-chunk shuffled in {stop-start:.3f} s" )
+    if not self._from_cache:   # cached arrays already shuffled
+      start = time()
+      X, Y, w = shuffle (X, Y, w)
+      self._shuffle_id = uuid.uuid4().hex   # identifies this row order
+      stop = time()
+      if verbose: print ( f"[INFO] Whole data-chunk shuffled in {stop-start:.3f} s" )
+
+      if self._cache is not None:
+        self._cache.store (self._cache_key, X = X, Y = Y, w = w, shuffle_id = self._shuffle_id)
+        if verbose: print ( f"[INFO] Data-chunk stored to cache {self._cache.cache_dir}/{self._cache_key}" )
 
     self._X = X
     self._Y = Y
@@ -159,36 +301,76 @@ class DataHandler:   # TODO add class description
 
     self._dataset_prepared = True   # switch on dataset prepared flag
 
-  def _unpack_data (self) -> tuple:
+  def iterate_datachunks (self):
+    """Iterate over the ROOT files chunk by chunk, yielding shuffled 
+    input, output and weights arrays for each chunk.
+
+    Yields
+    ------
+    X : `np.ndarray`
+      Array containing a shuffled chunk of the input-set.
+
+    Y : `np.ndarray`
+      Array containing a shuffled chunk of the output-set.
+
+    w : `np.ndarray`
+      Array containing a shuffled chunk of the weights (array of ones, 
+      if not available).
+
+    See Also
+    --------
+    lb_pidsim_train.utils.stream_from_files :
+      Out-of-core data streaming from list of ROOT files.
+    """
+    if not self._streaming:
+      raise RuntimeError ( "Streaming mode not enabled, `feed_from_root_files` "
+                           "should be called with `streaming = True`." )
+
+    for datachunk in stream_from_files (**self._stream_kwargs):
+      if len(datachunk) == 0: continue
+      X, Y, w = self._unpack_data (datachunk)
+      yield shuffle (X, Y, w)
+
+  def _unpack_data (self, datachunk = None) -> tuple:
     """Unpack the data-chunk into input, output and weights 
     (array of ones, if not available).
 
+    Parameters
+    ----------
+    datachunk : `pd.DataFrame`, optional
+      Dataframe to unpack (`None`, by default). If `None` is selected, 
+      the data-chunk loaded by `feed_from_root_files` is unpacked.
+
     See Also
     --------
     lb_pidsim_train.utils.nan_filter : 
       Clean arrays from NaN elements.
     """
+    if datachunk is None:
+      if self._datachunk is None:
+        return self._arrays   # already unpacked by `arrays_from_trees`
+      datachunk = self._datachunk
+
     ## Input array
     if self.X_vars is not None:
-      X = nan_filter ( self._datachunk[self.X_vars] . to_numpy() )
+      X = datachunk[self.X_vars] . to_numpy ( dtype = NP_FLOAT, copy = True )
     else:
-      X = nan_filter ( self._datachunk . to_numpy() )
+      X = datachunk . to_numpy ( dtype = NP_FLOAT, copy = True )
+    nan_filter (X, inplace = True)
 
     ## Output array
     if self.Y_vars is not None:
-      Y = nan_filter ( self._datachunk[self.Y_vars] . to_numpy() )
+      Y = datachunk[self.Y_vars] . to_numpy ( dtype = NP_FLOAT, copy = True )
+      nan_filter (Y, inplace = True)
     else:
       raise ValueError ("No variables have been passed to create an output-set.")
 
     ## Weight array
     if self.w_var is not None:
-      w = self._datachunk[self.w_var] . to_numpy()
+      w = datachunk[self.w_var] . to_numpy ( dtype = NP_FLOAT, copy = True )
     else:
       w = np.ones ( shape = (X.shape[0], 1), dtype = NP_FLOAT )
 
-    X . astype ( NP_FLOAT )
-    Y . astype ( NP_FLOAT )
-    w . astype ( NP_FLOAT )
     return X, Y, w
 
   @property
@@ -211,9 +393,19 @@ class DataHandler:   # TODO add class description
     """Name of the weight variable (`None`, if not available)."""
     return self._w_var
 
+  @property
+  def from_cache (self) -> bool:
+    """Whether the data-chunk has been loaded from the dataset cache."""
+    return self._from_cache
+
+  @property
+  def streaming (self) -> bool:
+    """Whether the ROOT files can be iterated chunk by chunk."""
+    return self._streaming
+
   @property
   def datachunk (self) -> pd.DataFrame:
-    """Dataset used for the training procedure."""
+    """Dataset used for the training procedure (`None`, if loaded as arrays)."""
     return self._datachunk
 
   @property
@@ -234,6 +426,14 @@ class DataHandler:   # TODO add class description
 
 
 
+def _file_signature (fname) -> list:
+  """Return name, size and last modification time of a file, to detect changes."""
+  if os.path.exists (fname):
+    return [ fname, os.path.getsize (fname), os.path.getmtime (fname) ]
+  return [ fname ]   # remote file
+
+
+
 if __name__ == "__main__":   # TODO complete __main__
   handler = DataHandler()
   handler . feed_from_root_files ( "../data/Zmumu.root", ["px1", "py1", "pz1"], "E1" )
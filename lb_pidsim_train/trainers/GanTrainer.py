@@ -27,6 +27,7 @@ TF_FLOAT = tf.float32
 
 
 class GanTrainer (TensorTrainer):   # TODO class description
+  _SHARED_ATTRS = TensorTrainer._SHARED_ATTRS + [ "_rw_enabled" ]
 
   def prepare_dataset ( self , 
                         X_preprocessing = None , 
@@ -54,11 +55,20 @@ class GanTrainer (TensorTrainer):   # TODO class description
         with tf.device ("/cpu:0"): 
           X = tf.cast ( tf.convert_to_tensor(self.X_scaled) , dtype = TF_FLOAT )
           self._w_X = reweighter(X) . numpy() . reshape(self._w_Y.shape) . astype(NP_FLOAT)
+        self._reweighter = reweighter
       else:
         print ( "[WARNING] No reweighting strategy available, since there aren't weights to reweight" )
 
     self._rw_enabled = enable_reweights
 
+  def _reweight_datachunk (self, X, w) -> np.ndarray:
+    """Return the weights to assign to the input-set of a streamed chunk."""
+    if self._rw_enabled and (self.w_var is not None):
+      with tf.device ("/cpu:0"):
+        X = tf.cast ( tf.convert_to_tensor(X) , dtype = TF_FLOAT )
+        return self._reweighter(X) . numpy() . reshape(w.shape) . astype(NP_FLOAT)
+    return np.copy (w)
+
   def _train_reweighter ( self ,
                           num_epochs = 1 ,
                           batch_size = None ,
@@ -186,6 +196,7 @@ class GanTrainer (TensorTrainer):   # TODO class description
         with tf.device ("/cpu:0"): 
           X = tf.cast ( tf.convert_to_tensor(self.X_scaled) , dtype = TF_FLOAT )
           self._w_X = reweighter(X) . numpy() . reshape(self._w_Y.shape) . astype(NP_FLOAT)
+        self._reweighter = reweighter
       else:
         print ( "[WARNING] No reweighting strategy available, since there aren't weights to reweight" )
 
@@ -254,13 +265,21 @@ class GanTrainer (TensorTrainer):   # TODO class description
                     validation_split = 0.0 , 
                     callbacks = None , 
                     produce_report = True ,
+                    precision = None ,
+                    shuffle_buffer = None ,
                     verbose = 0 ) -> dict:
+    ## Precision policy of the GAN networks
+    if precision is not None:
+      model.precision = self._params.get ( "precision", precision )
+      if (verbose > 0): print ( f"[INFO] GAN networks trained with '{model.precision}' precision policy" )
+
     return super().train_model ( model = model , 
                                  batch_size = 2 * batch_size if model._loss_name == "Energy distance" else batch_size ,
                                  num_epochs = num_epochs , 
                                  validation_split = validation_split , 
                                  callbacks = callbacks , 
                                  produce_report = produce_report ,
+                                 shuffle_buffer = shuffle_buffer ,
                                  verbose = verbose )
 
   def _report_architecture (self, report, model) -> str:
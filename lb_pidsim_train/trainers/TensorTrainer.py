@@ -1,5 +1,6 @@
 #from __future__ import annotations
 
+import os
 import numpy as np
 import tensorflow as tf
 
@@ -8,9 +9,15 @@ from html_reports import Report
 from lb_pidsim_train.trainers import BaseTrainer
 
 
+NP_FLOAT = np.float32
+"""Default data-type for arrays."""
+
 TF_FLOAT = tf.float32
 """Default data-type for tensors."""
 
+STRATEGIES = [None, "mirrored", "multi_worker"]
+"""Distribution strategies available for training."""
+
 
 class TensorTrainer (BaseTrainer):   # TODO class description
   """Base class for training models in TensorFlow.
@@ -31,13 +38,30 @@ class TensorTrainer (BaseTrainer):   # TODO class description
 
   report_name : `str`, optional
     Report file name for the trained model.
+
+  strategy : {None, 'mirrored', 'multi_worker'}, optional
+    Distribution strategy for data-parallel training (`None`, by default). 
+    With `'mirrored'` the model is replicated over the local GPUs or, if 
+    not available, over `num_devices` logical CPU devices. With 
+    `'multi_worker'` the model is replicated over the nodes listed in the 
+    `TF_CONFIG` environment variable. The strategy is set as default, so 
+    that the models and optimizers created afterwards are distributed.
+
+  num_devices : `int`, optional
+    Number of logical CPU devices used by the `'mirrored'` strategy when 
+    no GPU is available (`None`, by default). If `None` is selected, one 
+    device every 4 CPU cores is used.
   """
+  _SHARED_ATTRS = BaseTrainer._SHARED_ATTRS + [ "_w_X", "_w_Y" ]
+
   def __init__ ( self ,
                  name ,
                  export_dir  = None ,
                  export_name = None ,
                  report_dir  = None ,
                  report_name = None ,
+                 strategy    = None ,
+                 num_devices = None ,
                  verbose = False ) -> None:   # TODO new variable name for warnings
     super().__init__ ( name = name ,
                        export_dir  = export_dir  ,
@@ -46,6 +70,53 @@ class TensorTrainer (BaseTrainer):   # TODO class description
                        report_name = report_name ,
                        verbose = verbose )
     self._model_loaded = False   # switch off a new flag
+    self._strategy = self._create_strategy (strategy, num_devices)
+
+  @staticmethod
+  def _create_strategy (strategy = None, num_devices = None) -> tf.distribute.Strategy:
+    """Create the distribution strategy and set it as default.
+    
+    Parameters
+    ----------
+    strategy : {None, 'mirrored', 'multi_worker'}, optional
+      Distribution strategy for data-parallel training (`None`, by default).
+
+    num_devices : `int`, optional
+      Number of logical CPU devices used by the `'mirrored'` strategy when 
+      no GPU is available (`None`, by default).
+
+    Returns
+    -------
+    strategy : `tf.distribute.Strategy`
+      The distribution strategy (the default one, if `None` is selected).
+    """
+    ## Data-value control
+    if strategy not in STRATEGIES:
+      raise ValueError ( f"The distribution strategy should be chosen in {STRATEGIES}, "
+                         f"'{strategy}' passed." )
+
+    if strategy is None:
+      return tf.distribute.get_strategy()
+
+    if strategy == "mirrored":
+      devices = None   # all the local GPUs
+      if len ( tf.config.list_physical_devices ("GPU") ) == 0:
+        if num_devices is None:
+          num_devices = max ( 1, os.cpu_count() // 4 )
+        cpu = tf.config.list_physical_devices ("CPU") [0]
+        try:
+          tf.config.set_logical_device_configuration ( cpu, [ tf.config.LogicalDeviceConfiguration() 
+                                                              for _ in range (int(num_devices)) ] )
+        except RuntimeError:
+          print ( "[WARNING] TensorFlow runtime already initialized, "
+                  "the logical CPU devices can't be configured" )
+        devices = [ device.name for device in tf.config.list_logical_devices ("CPU") ]
+      strategy = tf.distribute.MirroredStrategy ( devices = devices )
+    else:
+      strategy = tf.distribute.MultiWorkerMirroredStrategy()
+
+    tf.distribute.experimental_set_strategy (strategy)
+    return strategy
 
   def feed_from_root_files ( self , 
                              root_files , 
@@ -55,6 +126,14 @@ class TensorTrainer (BaseTrainer):   # TODO class description
                              selections = None , 
                              tree_names = None , 
                              chunk_size = None ,
+                             sampling   = "window" ,
+                             fill       = False ,
+                             streaming  = False ,
+                             step_size  = "100 MB" ,
+                             library = "pd" ,
+                             num_workers = None ,
+                             cache_dir  = None ,
+                             cache_size = "20 GB" ,
                              verbose = 0 ) -> None:
     """Feed the training procedure with ROOT files.
     
@@ -87,6 +166,43 @@ class TensorTrainer (BaseTrainer):   # TODO class description
       Total number of instance rows loaded to disk as `tf.data.Dataset`
       enabling to handle large amount of data (`None`, by default).
 
+    sampling : {'window', 'baskets', 'entries'}, optional
+      Strategy used to pick the data-chunk entries from each ROOT tree: 
+      a contiguous slice (`'window'`, default), random clusters of baskets 
+      (`'baskets'`) or random entries (`'entries'`).
+
+    fill : `bool`, optional
+      If `True`, `chunk_size` refers to the rows passing the `selections`, 
+      that are read in batches until the data-chunk is filled (`False`, 
+      by default).
+
+    streaming : `bool`, optional
+      If `True`, the training procedure iterates over the whole ROOT 
+      files chunk by chunk, feeding a `tf.data.Dataset` generator with 
+      bounded memory usage. The data-chunk is still loaded and used for 
+      preprocessing, validation and reports (`False`, by default).
+
+    step_size : `int` or `str`, optional
+      Number of entries or memory size of each chunk read from disk when 
+      `streaming` is enabled (`"100 MB"`, by default).
+
+    library : {'pd', 'np'}, optional
+      Library used to load the data-chunk. With `'np'` the branches are 
+      read straight into preallocated `np.float32` arrays, bypassing 
+      pandas (`'pd'`, by default).
+
+    num_workers : `int`, optional
+      Number of threads used to read the ROOT trees concurrently 
+      (`None`, by default).
+
+    cache_dir : `str`, optional
+      Directory of the on-disk cache of the shuffled and preprocessed 
+      datasets, keyed on files, branches, selections and sampling options 
+      (`None`, by default).
+
+    cache_size : `int` or `str`, optional
+      Disk budget of the dataset cache (`"20 GB"`, by default).
+
     verbose : {0, 1}, optional
       Verbosity mode. `0` = silent (default), `1` = time for data-chunk 
       loading is printed. 
@@ -107,6 +223,14 @@ class TensorTrainer (BaseTrainer):   # TODO class description
                                    selections = selections , 
                                    tree_names = tree_names , 
                                    chunk_size = chunk_size ,
+                                   sampling   = sampling   ,
+                                   fill       = fill       ,
+                                   streaming  = streaming  ,
+                                   step_size  = step_size  ,
+                                   library = library ,
+                                   num_workers = num_workers ,
+                                   cache_dir  = cache_dir  ,
+                                   cache_size = cache_size ,
                                    verbose = verbose )
 
   def prepare_dataset ( self , 
@@ -141,6 +265,7 @@ class TensorTrainer (BaseTrainer):   # TODO class description
                     validation_split = 0.0 ,
                     callbacks = None ,
                     produce_report = True ,
+                    shuffle_buffer = None ,
                     verbose = 0 ) -> dict:   # TODO complete docstring
     """...
     
@@ -156,11 +281,22 @@ class TensorTrainer (BaseTrainer):   # TODO class description
       ... (`1`, by default).
 
     validation_split : `float`, optional
-      ... (`0.0`, by default).
+      ... (`0.0`, by default). Not supported if streaming, since the 
+      data-chunk held in memory is part of the streamed ROOT files.
 
     callbacks : function, optional
       ... (`None`, by default).
 
+    shuffle_buffer : `int`, optional
+      Number of instances of the shuffle buffer of the streaming input 
+      pipeline (`None`, by default). If passed, the training batches are 
+      gathered on the fly from the (possibly memory-mapped) arrays, or from 
+      the ROOT files if streaming, following row indices reshuffled at each 
+      epoch, so that memory usage is bounded by the buffer and the batch 
+      composition varies from epoch to epoch. If `None` is selected, the 
+      training-set is converted to tensors and cached, and the batches are 
+      the same at each epoch.
+
     verbose : {0, 1, 2}, optional
       Verbosity mode. `0` = silent (default), `1` = training progress bar 
       is shown, `2`= one line per training epoch is shown.
@@ -194,6 +330,13 @@ class TensorTrainer (BaseTrainer):   # TODO class description
       raise TypeError ( f"The fraction of train-set used for validation should"
                         f" be a float, instead {type(validation_split)} passed." )
 
+    if shuffle_buffer is not None:
+      try:
+        shuffle_buffer = self._params.get ( "shuffle_buffer", int(shuffle_buffer) )
+      except:
+        raise TypeError ( f"The size of the shuffle buffer should be an integer,"
+                          f" instead {type(shuffle_buffer)} passed." )
+
     ## Data-value control
     if batch_size <= 0:
       raise ValueError ("error")   # TODO insert error message
@@ -204,6 +347,11 @@ class TensorTrainer (BaseTrainer):   # TODO class description
     if (validation_split < 0.0) or (validation_split > 1.0):
       raise ValueError ("error")   # TODO insert error message
 
+    if self._streaming and (validation_split > 0.0):
+      raise ValueError ( "Validation not supported in streaming mode: the data-chunk held "
+                         "in memory is also streamed for training, `validation_split` "
+                         "should be set to 0." )
+
     self._batch_size = batch_size
     self._validation_split = validation_split
 
@@ -213,11 +361,15 @@ class TensorTrainer (BaseTrainer):   # TODO class description
     steps_per_epoch = max ( 1, int (trainset_size / batch_size) )
 
     ## Training dataset
-    trainset = ( self.X_scaled [:trainset_size] , 
-                 self.Y_scaled [:trainset_size] , 
-                 self._w_X     [:trainset_size] ,
-                 self._w_Y     [:trainset_size] )
-    train_ds = self._create_dataset ( trainset, batch_size = batch_size )
+    if self._streaming:
+      train_ds = self._create_streaming_dataset ( batch_size = batch_size, shuffle_buffer = shuffle_buffer )
+      steps_per_epoch = None   # whole ROOT files per epoch
+    else:
+      trainset = ( self.X_scaled [:trainset_size] , 
+                   self.Y_scaled [:trainset_size] , 
+                   self._w_X     [:trainset_size] ,
+                   self._w_Y     [:trainset_size] )
+      train_ds = self._create_dataset ( trainset, batch_size = batch_size, shuffle_buffer = shuffle_buffer )
 
     ## Validation dataset
     if validation_split != 0.0:
@@ -229,6 +381,17 @@ class TensorTrainer (BaseTrainer):   # TODO class description
     else:
       val_ds = None
 
+    ## Data sharding across the replicas of the distribution strategy
+    if self._strategy.num_replicas_in_sync > 1:
+      options = tf.data.Options()
+      options.experimental_distribute.auto_shard_policy = tf.data.experimental.AutoShardPolicy.DATA
+      train_ds = train_ds.with_options (options)
+      if val_ds is not None:
+        val_ds = val_ds.with_options (options)
+      if (verbose > 0): 
+        print ( f"[INFO] Training distributed over {self._strategy.num_replicas_in_sync} replicas "
+                f"(global batch-size: {batch_size})" )
+
     ## Callbacks settings
     if callbacks:
       callbacks = [callbacks]
@@ -272,7 +435,7 @@ class TensorTrainer (BaseTrainer):   # TODO class description
     return history.history
 
   @staticmethod
-  def _create_dataset ( data, batch_size = 100 ) -> tf.data.Dataset:   # TODO complete docstring
+  def _create_dataset ( data, batch_size = 100, shuffle_buffer = None ) -> tf.data.Dataset:   # TODO complete docstring
     """...
     
     Parameters
@@ -283,6 +446,12 @@ class TensorTrainer (BaseTrainer):   # TODO class description
     batch_size : `int`, optional
       ... (`100`, by default).
 
+    shuffle_buffer : `int`, optional
+      Number of rows within the shuffle buffer (`None`, by default). If 
+      passed, the row indices are shuffled within windows of this size, 
+      whose boundaries and order change at each epoch, and the batches are 
+      gathered on the fly from the arrays by parallel calls.
+
     Returns
     -------
     dataset : `tf.data.Dataset`
@@ -296,7 +465,54 @@ class TensorTrainer (BaseTrainer):   # TODO class description
     """
     physical_devices = tf.config.list_physical_devices ("GPU")
 
-    if ( len (physical_devices) > 0 ):
+    def set_shapes (*batch):
+      return tuple ( tf.ensure_shape ( b, (batch_size,) + d.shape[1:] ) for b, d in zip (batch, data) )
+
+    ## Streaming pipeline: shuffled row indices, batches gathered without copying the arrays
+    if shuffle_buffer is not None:
+      num_rows = len (data[0])
+      window = max ( batch_size, shuffle_buffer // batch_size * batch_size )
+
+      def index_batches():   # called again at each epoch
+        offset = np.random.randint (window)   # window boundaries moved at each epoch
+        starts = np.arange (0, num_rows, window)
+        np.random.shuffle (starts)
+        for start in starts:
+          rows = start + np.random.permutation ( min (window, num_rows - start) )
+          rows = (rows + offset) % num_rows
+          for i in range ( 0, len(rows) - batch_size + 1, batch_size ):
+            yield rows[i:i+batch_size]
+
+      def get_rows (idx):
+        idx = np.sort (idx)   # ordered reads within the batch
+        return tuple ( np.asarray (d[idx], dtype = NP_FLOAT) for d in data )
+
+      dataset = tf.data.Dataset.from_generator ( index_batches, output_signature = tf.TensorSpec ( (batch_size,), tf.int64 ) )
+      dataset = dataset.map ( lambda idx: tf.numpy_function ( get_rows, [idx], [TF_FLOAT] * len(data) ) ,
+                              num_parallel_calls = tf.data.AUTOTUNE, deterministic = False )
+      dataset = dataset.map (set_shapes)
+      dataset = dataset.prefetch ( tf.data.AUTOTUNE )
+      return dataset
+
+    ## Memory-mapped arrays (e.g. attached): batches sliced on the fly, without copies
+    if isinstance (data[0], np.memmap) and ( len (physical_devices) == 0 ):
+      num_batches = len (data[0]) // batch_size
+
+      def get_batch (i):
+        batch = slice ( i * batch_size, (i+1) * batch_size )
+        return tuple ( np.asarray (d[batch], dtype = NP_FLOAT) for d in data )
+
+      dataset = tf.data.Dataset.range (num_batches)
+      dataset = dataset.map ( lambda i: tf.numpy_function ( get_batch, [i], [TF_FLOAT] * len(data) ) ,
+                              num_parallel_calls = tf.data.AUTOTUNE )
+      dataset = dataset.map (set_shapes)
+      dataset = dataset.prefetch ( tf.data.AUTOTUNE )
+      return dataset
+
+    ## Data kept on host if distributed, and split across the replicas by Keras
+    distributed = ( tf.distribute.get_strategy() . num_replicas_in_sync > 1 )
+
+    if ( len (physical_devices) > 0 ) and not distributed:
       with tf.device ("/gpu:0"):
         X   = tf.cast ( tf.convert_to_tensor(data[0]), dtype = TF_FLOAT )
         Y   = tf.cast ( tf.convert_to_tensor(data[1]), dtype = TF_FLOAT )
@@ -315,6 +531,65 @@ class TensorTrainer (BaseTrainer):   # TODO class description
     dataset = dataset.prefetch ( tf.data.AUTOTUNE )
     return dataset
 
+  def _create_streaming_dataset ( self, batch_size = 100, shuffle_buffer = None ) -> tf.data.Dataset:
+    """Create a `tf.data.Dataset` streaming batches from the ROOT files.
+
+    Each chunk read from disk is preprocessed with the transformers fitted 
+    on the data-chunk, and then split into batches. Only one chunk at a 
+    time is kept in memory. The rows left over by each chunk are carried 
+    into the next one, and only the last incomplete batch of each pass 
+    over the files is dropped.
+    
+    Parameters
+    ----------
+    batch_size : `int`, optional
+      Number of instances per batch (`100`, by default).
+
+    shuffle_buffer : `int`, optional
+      Number of instances within the shuffle buffer (`None`, by default). 
+      If passed, the batches are shuffled through a buffer of this size 
+      (the chunks are already reshuffled at each pass over the files).
+
+    Returns
+    -------
+    dataset : `tf.data.Dataset`
+      Dataset yielding `(X, Y, w_X, w_Y)` batches.
+
+    See Also
+    --------
+    lb_pidsim_train.trainers.DataHandler.iterate_datachunks :
+      Iterate over the ROOT files chunk by chunk.
+    """
+    def generator():
+      rest = None
+      for X, Y, w in self.iterate_datachunks():
+        X = self._scaler_X . transform (X) if self._scaler_X else X
+        Y = self._scaler_Y . transform (Y) if self._scaler_Y else Y
+        w = w . reshape (len(w), -1) . astype (NP_FLOAT)
+        w_X = self._reweight_datachunk (X, w)
+        arrays = [ X . astype (NP_FLOAT), Y . astype (NP_FLOAT), w_X, w ]
+        if rest is not None:   # rows left over by the previous chunk
+          arrays = [ np.concatenate ( [r, a], axis = 0 ) for r, a in zip (rest, arrays) ]
+        num_rows = len (arrays[0]) - len (arrays[0]) % batch_size
+        for i in range ( 0, num_rows, batch_size ):
+          yield tuple ( a [i:i+batch_size] for a in arrays )
+        rest = [ a [num_rows:] for a in arrays ]
+
+    output_signature = ( tf.TensorSpec ( shape = (batch_size, self.X.shape[1]) , dtype = TF_FLOAT ) ,
+                         tf.TensorSpec ( shape = (batch_size, self.Y.shape[1]) , dtype = TF_FLOAT ) ,
+                         tf.TensorSpec ( shape = (batch_size, 1) , dtype = TF_FLOAT ) ,
+                         tf.TensorSpec ( shape = (batch_size, 1) , dtype = TF_FLOAT ) )
+
+    dataset = tf.data.Dataset.from_generator ( generator, output_signature = output_signature )
+    if shuffle_buffer is not None:
+      dataset = dataset.shuffle ( max (1, shuffle_buffer // batch_size), reshuffle_each_iteration = True )
+    dataset = dataset.prefetch ( tf.data.AUTOTUNE )
+    return dataset
+
+  def _reweight_datachunk (self, X, w) -> np.ndarray:
+    """Return the weights to assign to the input-set of a streamed chunk."""
+    return np.copy (w)
+
   def _report_params (self, report) -> None:
     report.add_markdown ("---")
     report.add_markdown ('<h2 align="center">Hyperparameters and other details</h2>')
@@ -330,6 +605,11 @@ class TensorTrainer (BaseTrainer):   # TODO class description
   def _training_plots (self, report, history) -> None:
     raise NotImplementedError ("error")   # TODO insert error message
 
+  @property
+  def strategy (self) -> tf.distribute.Strategy:
+    """Distribution strategy used for training."""
+    return self._strategy
+
   @property
   def model (self) -> tf.keras.Model:
     """`tf.keras.Model` after the training procedure."""
@@ -0,0 +1,216 @@
+#from __future__ import annotations
+
+import numpy as np
+
+
+class CondHistograms:
+  """Histograms of several variables within the bins of a set of
+  conditioning variables.
+
+  The conditioning variables (e.g. momentum, pseudorapidity and number
+  of tracks) are digitized once and combined into a flat bin index, which
+  is shared by all the variables and all the samples (e.g. generated and
+  reference ones) filled: each histogram requires a single `np.bincount`
+  call. The bin counts of all the histograms are stored within a single
+  flat buffer, so that they can be accumulated in place (e.g. within
+  shared memory by parallel workers) and then split into views with
+  `histograms`.
+
+  Parameters
+  ----------
+  cond_bins : `list` of array_like
+    Bin edges (also irregular) of each conditioning variable.
+
+  var_bins : `list` of array_like
+    Bin edges (also irregular) of each variable to histogram.
+
+  num_samples : `int`, optional
+    Number of samples filled sharing the conditioning variables (`1`,
+    by default).
+
+  Notes
+  -----
+  As for `numpy.histogramdd`, the bins are half-open intervals, except for
+  the last one that also includes the right edge, while the values outside
+  the edges are ignored.
+
+  Examples
+  --------
+  >>> import numpy as np
+  >>> x = np.random.uniform (0, 1, size = (1000,2))
+  >>> y = np.random.normal (size = (1000,3))
+  >>> from lb_pidsim_train.utils import CondHistograms
+  >>> hist = CondHistograms ( [ [0, 0.5, 1], [0, 0.2, 1] ], [ np.linspace (-3, 3, 11) ] * 3 )
+  >>> counts = hist.fill (x, [y])
+  >>> print ( hist.histograms (counts) [0] . shape )
+  (2, 2, 10)
+  """
+  def __init__ (self, cond_bins, var_bins, num_samples = 1) -> None:
+    self._cond_bins = [ np.asarray (b, dtype = np.float64) for b in cond_bins ]
+    self._var_bins  = [ np.asarray (b, dtype = np.float64) for b in var_bins ]
+
+    ## Data-type control
+    try:
+      self._num_samples = int ( num_samples )
+    except:
+      raise TypeError ("The number of samples should be an integer.")
+
+    ## Layout of the flat buffer
+    self._cond_shape = tuple ( len(b) - 1 for b in self._cond_bins )
+    num_cond_bins = int ( np.prod (self._cond_shape) )
+    sizes = [ num_cond_bins * (len(b) - 1) for b in self._var_bins ]
+    self._offsets = np.cumsum ( [0] + sizes )
+
+  def cond_index (self, x_cond) -> np.ndarray:
+    """Return the flat bin index of the conditioning variables
+    (`-1`, for the values outside the bin edges).
+
+    Parameters
+    ----------
+    x_cond : array_like
+      Array containing the conditioning variables, with shape
+      `(n_samples, len(cond_bins))`.
+
+    Returns
+    -------
+    index : `np.ndarray`
+      Flat bin index of each row, in C-order of the conditioning bins.
+    """
+    x_cond = np.asarray (x_cond)
+    index = np.zeros ( len(x_cond), dtype = np.intp )
+    outside = np.zeros ( len(x_cond), dtype = bool )
+    for i, edges in enumerate (self._cond_bins):
+      idx = _digitize (x_cond[:,i], edges)
+      outside |= ( idx < 0 )
+      index *= len(edges) - 1
+      index += idx
+    index[outside] = -1
+    return index
+
+  def fill (self, x_cond, samples, w = None, out = None) -> np.ndarray:
+    """Fill the histograms of all the variables and samples.
+
+    Parameters
+    ----------
+    x_cond : array_like
+      Array containing the conditioning variables, with shape
+      `(n_samples, len(cond_bins))`.
+
+    samples : `list` of array_like
+      Arrays containing the variables to histogram, with shape
+      `(n_samples, len(var_bins))`, one per sample (e.g. generated
+      and reference ones).
+
+    w : array_like, optional
+      An array of weights, of the same length as `x_cond` (`None`,
+      by default).
+
+    out : `np.ndarray`, optional
+      Flat `np.float64` buffer of length `size` where the bin counts are
+      accumulated (`None`, by default). If `None` is selected, a new
+      buffer is allocated.
+
+    Returns
+    -------
+    out : `np.ndarray`
+      Flat buffer containing the bin counts.
+    """
+    if len(samples) != self._num_samples:
+      raise ValueError ( f"The number of samples filled ({len(samples)}) and "
+                         f"the one expected ({self._num_samples}) don't match." )
+    if out is None:
+      out = np.zeros ( self.size, dtype = np.float64 )
+    counts = out.reshape (self._num_samples, -1)
+
+    cond_index = self.cond_index (x_cond)
+    cond_outside = ( cond_index < 0 )
+    if w is not None:
+      w = np.ravel (w) . astype (np.float64)
+
+    for i, edges in enumerate (self._var_bins):
+      nbins = len(edges) - 1
+      start, stop = self._offsets[i], self._offsets[i+1]
+      for s, Y in enumerate (samples):
+        index = _digitize (np.asarray (Y)[:,i], edges)
+        outside = cond_outside | ( index < 0 )
+        index += cond_index * nbins
+        index[outside] = stop - start   # overflow bin, then dropped
+        counts[s, start:stop] += np.bincount ( index, weights = w, minlength = stop - start + 1 ) [:-1]
+    return out
+
+  def histograms (self, counts, sample = 0) -> list:
+    """Split the flat buffer of bin counts into the histograms of a sample.
+
+    Parameters
+    ----------
+    counts : `np.ndarray`
+      Flat buffer containing the bin counts, as returned by `fill`.
+
+    sample : `int`, optional
+      Index of the sample (`0`, by default).
+
+    Returns
+    -------
+    histos : `list` of `np.ndarray`
+      Views of the bin counts of each variable, with shape
+      `(*cond_shape, n_var_bins)`.
+    """
+    counts = np.asarray (counts) . reshape (self._num_samples, -1) [sample]
+    return [ counts[start:stop] . reshape ( *self._cond_shape, len(edges) - 1 )
+             for start, stop, edges in zip (self._offsets[:-1], self._offsets[1:], self._var_bins) ]
+
+  @property
+  def cond_shape (self) -> tuple:
+    """Number of bins of each conditioning variable."""
+    return self._cond_shape
+
+  @property
+  def num_samples (self) -> int:
+    """Number of samples filled sharing the conditioning variables."""
+    return self._num_samples
+
+  @property
+  def size (self) -> int:
+    """Length of the flat buffer of bin counts."""
+    return int ( self._num_samples * self._offsets[-1] )
+
+
+def _digitize (x, edges) -> np.ndarray:
+  """Bin index of `x` within `edges`, right edge included in the last
+  bin (`-1`, for the values outside the edges and NaN)."""
+  nbins = len(edges) - 1
+  index = np.searchsorted (edges, x, side = "right") - 1
+  index[x == edges[-1]] = nbins - 1
+  index[(index < 0) | (index >= nbins)] = -1
+  return index
+
+
+
+if __name__ == "__main__":
+  from time import time
+
+  cond_bins = [ [ 3e3, 4e3, 5e3, 6e3, 9e3, 15e3, 25e3, 50e3, 100e3, 200e3 ] ,
+                [ 1.5, 2.5, 3.0, 3.5, 4.0, 5.5 ] ,
+                [ 0, 50, 100, 200, 1000 ] ]
+  var_bins = [ np.linspace (-5, 5, 100) ] * 8
+
+  x = np.c_ [ np.random.exponential (20e3, int(1e6)) ,
+              np.random.uniform (1.5, 5.5, int(1e6)) ,
+              np.random.uniform (0, 500, int(1e6)) ]
+  y_gen = np.random.normal (size = (int(1e6), 8))
+  y_ref = np.random.normal (size = (int(1e6), 8))
+  w = np.random.uniform (0, 1, int(1e6))
+
+  ## One np.histogramdd per variable and sample
+  start = time()
+  histos = [ np.histogramdd ( np.c_ [x, y[:,i]], bins = cond_bins + [var_bins[i]], weights = w ) [0]
+             for i in range(8) for y in [y_gen, y_ref] ]
+  print ( f"np.histogramdd : {time()-start:.3f} s" )
+
+  ## Conditioning variables digitized once
+  start = time()
+  engine = CondHistograms ( cond_bins, var_bins, num_samples = 2 )
+  counts = engine.fill ( x, [y_gen, y_ref], w = w )
+  print ( f"CondHistograms : {time()-start:.3f} s" )
+  h_gen, h_ref = engine.histograms (counts, 0), engine.histograms (counts, 1)
+  print ( f"max difference : {max ( np.abs (h - g) . max() for h, g in zip (histos, [h for pair in zip (h_gen, h_ref) for h in pair]) ):.2e}" )
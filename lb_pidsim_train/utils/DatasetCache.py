@@ -0,0 +1,249 @@
+#from __future__ import annotations
+
+import os
+import json
+import time
+import pickle
+import shutil
+import hashlib
+import uuid
+import numpy as np
+
+UNITS = { "B": 1, "kB": 1e3, "MB": 1e6, "GB": 1e9, "TB": 1e12 }
+"""Multipliers for the disk budget units."""
+
+COMPLETE_FLAG = ".complete"
+"""File marking a cache entry as completely written."""
+
+TMP_SUFFIX = ".tmp"
+"""Suffix of the directories of entries being written."""
+
+OLD_SUFFIX = ".old"
+"""Suffix of the directories of replaced entries being removed."""
+
+
+class DatasetCache:
+  """On-disk cache of ready-to-train datasets.
+
+  Each entry is a directory named after the hash of the configuration
+  that produced it, containing the arrays as `.npy` files (loaded back
+  as memory-maps) and any other object as pickle files. Entries can be
+  nested (e.g. the preprocessed arrays within the raw dataset entry) by
+  passing keys as `"parent/child"`, so that evicting or replacing a
+  dataset also drops everything derived from it. Entries are written to
+  a temporary directory and renamed into place, so that readers never see
+  a partially written entry. The least recently used top-level entries
+  are removed when the cache exceeds the disk budget.
+
+  Parameters
+  ----------
+  cache_dir : `str`
+    Directory hosting the cache entries.
+
+  max_size : `int` or `str`, optional
+    Disk budget of the cache, as number of bytes or memory size
+    (e.g. `"20 GB"`, by default).
+
+  max_age : `float`, optional
+    Time (in seconds) after which the entries not used anymore are
+    removed (`None`, by default). If `None` is selected, the entries
+    are removed only to meet the disk budget.
+
+  Examples
+  --------
+  >>> import numpy as np
+  >>> from lb_pidsim_train.utils import DatasetCache
+  >>> cache = DatasetCache ("./cache", max_size = "1 GB")
+  >>> key = cache.hash ( dict (files = ["a.root"], chunk_size = 1000) )
+  >>> cache.store ( key, X = np.zeros ((1000, 3), dtype = np.float32) )
+  >>> print ( cache.load (key) ["X"] . shape )
+  (1000, 3)
+  """
+  def __init__ (self, cache_dir, max_size = "20 GB", max_age = None) -> None:
+    self._cache_dir = cache_dir
+    self._max_size = _parse_size (max_size)
+    self._max_age = max_age
+    os.makedirs (self._cache_dir, exist_ok = True)
+
+  @staticmethod
+  def hash (config) -> str:
+    """Return the key of a configuration, given as JSON-serializable `dict`."""
+    dump = json.dumps (config, sort_keys = True, default = str)
+    return hashlib.sha1 ( dump.encode() ) . hexdigest() [:16]
+
+  def load (self, key, mmap_mode = "c") -> dict:
+    """Load a cache entry, returning `None` if not available.
+
+    Parameters
+    ----------
+    key : `str`
+      Key of the cache entry.
+
+    mmap_mode : {None, 'r', 'r+', 'c'}, optional
+      Memory-map mode used to open the arrays (`'c'`, by default). With
+      the default copy-on-write mode the arrays can be modified in memory
+      without affecting the files on disk.
+
+    Returns
+    -------
+    entry : `dict`
+      Arrays and objects stored within the cache entry.
+    """
+    dirname = os.path.join (self._cache_dir, key)
+    if not os.path.exists ( os.path.join (dirname, COMPLETE_FLAG) ):
+      return None
+
+    entry = dict()
+    try:
+      for fname in os.listdir (dirname):
+        name, ext = os.path.splitext (fname)
+        path = os.path.join (dirname, fname)
+        if ext == ".npy":
+          entry[name] = np.load (path, mmap_mode = mmap_mode)
+        elif ext == ".pkl":
+          with open (path, "rb") as file:
+            entry[name] = pickle.load (file)
+      self._touch (key)
+    except FileNotFoundError:   # entry replaced or evicted meanwhile
+      return None
+    return entry
+
+  def store (self, key, **items) -> None:
+    """Store arrays (as `.npy` files) and objects (as pickle files)
+    within a cache entry, then evict the least recently used entries
+    exceeding the disk budget. An existing entry is replaced as a whole,
+    nested entries included, since they derive from the old items.
+
+    Parameters
+    ----------
+    key : `str`
+      Key of the cache entry.
+
+    **items : `np.ndarray` or object
+      Items to store, named after the keyword.
+    """
+    dirname = os.path.join (self._cache_dir, key)
+    token = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    tmpname, oldname = f"{dirname}{TMP_SUFFIX}{token}", f"{dirname}{OLD_SUFFIX}{token}"
+    os.makedirs (tmpname)
+
+    for name, item in items.items():
+      if isinstance (item, np.ndarray):
+        np.save ( os.path.join (tmpname, f"{name}.npy"), item )
+      else:
+        with open ( os.path.join (tmpname, f"{name}.pkl"), "wb" ) as file:
+          pickle.dump (item, file)
+    open ( os.path.join (tmpname, COMPLETE_FLAG), "w" ) . close()
+
+    ## Swap the new entry in, dropping the old one with its nested entries
+    try:
+      os.rename (dirname, oldname)
+    except FileNotFoundError:
+      oldname = None
+    try:
+      os.rename (tmpname, dirname)
+    except OSError:   # parent entry replaced or concurrent writer won
+      shutil.rmtree (tmpname, ignore_errors = True)
+    if oldname is not None:
+      shutil.rmtree (oldname, ignore_errors = True)
+
+    if os.path.exists (dirname):
+      self._touch (key)
+    self._evict ( keep = key.split("/")[0] )
+
+  def remove (self, key) -> None:
+    """Remove a cache entry, with its nested entries."""
+    dirname = os.path.join (self._cache_dir, key)
+    oldname = f"{dirname}{OLD_SUFFIX}{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    try:
+      os.rename (dirname, oldname)   # readers miss the entry from now on
+    except FileNotFoundError:
+      return
+    shutil.rmtree (oldname, ignore_errors = True)
+
+  def clear (self) -> None:
+    """Remove all the cache entries."""
+    for name in os.listdir (self._cache_dir):
+      shutil.rmtree ( os.path.join (self._cache_dir, name), ignore_errors = True )
+
+  def _touch (self, key) -> None:
+    """Mark the top-level entry of `key` as the most recently used."""
+    now = time.time()
+    os.utime ( os.path.join (self._cache_dir, key.split("/")[0]), (now, now) )
+
+  def _evict (self, keep = None) -> None:
+    """Remove the expired entries, then the least recently used ones 
+    until the disk budget is met."""
+    entries = list()
+    for name in os.listdir (self._cache_dir):
+      path = os.path.join (self._cache_dir, name)
+      if (TMP_SUFFIX in name) or (OLD_SUFFIX in name): continue   # being written or removed
+      if os.path.isdir (path):
+        entries . append ( ( os.path.getmtime (path), _dir_size (path), path, name ) )
+
+    tot_size = sum ( size for _, size, _, _ in entries )
+    expiry = time.time() - self._max_age if self._max_age is not None else -np.inf
+    for mtime, size, path, name in sorted (entries):
+      if (tot_size <= self._max_size) and (mtime >= expiry): break
+      if name == keep: continue
+      shutil.rmtree (path, ignore_errors = True)
+      tot_size -= size
+
+  @property
+  def cache_dir (self) -> str:
+    """Directory hosting the cache entries."""
+    return self._cache_dir
+
+  @property
+  def max_size (self) -> int:
+    """Disk budget of the cache (in bytes)."""
+    return self._max_size
+
+  @property
+  def max_age (self) -> float:
+    """Time (in seconds) after which the unused entries are removed."""
+    return self._max_age
+
+  @property
+  def size (self) -> int:
+    """Disk space currently used by the cache (in bytes)."""
+    return _dir_size (self._cache_dir)
+
+
+def _parse_size (size) -> int:
+  """Convert a memory size (e.g. `"20 GB"`) to number of bytes."""
+  if isinstance (size, str):
+    value, unit = size.split()
+    if unit not in UNITS.keys():
+      raise ValueError ( f"The memory unit should be chosen in {list(UNITS.keys())}, '{unit}' passed." )
+    return int ( float(value) * UNITS[unit] )
+  try:
+    return int (size)
+  except:
+    raise TypeError ("The disk budget should be an integer or a memory size string.")
+
+
+def _dir_size (dirname) -> int:
+  """Return the disk space used by the files within `dirname` (in bytes)."""
+  size = 0
+  for root, _, files in os.walk (dirname):
+    for fname in files:
+      size += os.path.getsize ( os.path.join (root, fname) )
+  return size
+
+
+
+if __name__ == "__main__":
+  ## Store and load an entry
+  cache = DatasetCache ("./cache", max_size = "5 MB")
+  key = cache.hash ( dict (files = ["a.root"], chunk_size = 1000) )
+  cache.store ( key, X = np.random.normal (size = (1000, 3)) . astype (np.float32), info = {"rows": 1000} )
+  entry = cache.load (key)
+  print ( key, type(entry["X"]), entry["X"].shape, entry["info"] )
+
+  ## Least recently used eviction
+  for chunk_size in [1e5, 2e5, 3e5]:
+    new_key = cache.hash ( dict (files = ["a.root"], chunk_size = chunk_size) )
+    cache.store ( new_key, X = np.zeros ( (int(chunk_size), 3), dtype = np.float32 ) )
+    print ( f"Cache size: {cache.size/1e6:.1f} MB, entries: {sorted (os.listdir (cache.cache_dir))}" )
+  cache.clear()
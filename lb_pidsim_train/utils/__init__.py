@@ -1,7 +1,10 @@
 from .argparser              import argparser
-from .data_from_trees        import data_from_trees
-from .getBinCounts           import getBinCounts
+from .data_from_trees        import data_from_trees, arrays_from_trees
+from .stream_from_files      import stream_from_files
+from .getBinCounts           import getBinCounts, getBinRanges
 from .nan_filter             import nan_filter
 from .preprocessor           import preprocessor
 from .pre_preprocessing_step import pre_preprocessing_step
-from .getModelSummary        import getModelSummary
\ No newline at end of file
+from .getModelSummary        import getModelSummary
+from .DatasetCache           import DatasetCache
+from .CondHistograms         import CondHistograms
\ No newline at end of file
@@ -3,13 +3,21 @@
 import uproot
 import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from lb_pidsim_train.utils.nan_filter import nan_filter
 
 
 def data_from_trees ( trees ,
                       branches ,
                       cut = None ,
                       max_ntrees = None ,
-                      chunk_size = None ) -> pd.DataFrame:
+                      chunk_size = None ,
+                      sampling = "window" ,
+                      fill = False ,
+                      step_size = "100 MB" ,
+                      num_workers = None ,
+                      decompression_executor = None ,
+                      interpretation_executor = None ) -> pd.DataFrame:
   """Stratified data shuffling from list of `uproot.TTree`.
 
   The number of entries picked from each `uproot.TTree` is proportional to 
@@ -17,6 +25,12 @@ def data_from_trees ( trees ,
   if `tree_1` has 900 entries and `tree_2` has 100, requiring a `chunk_size` 
   of 100 will return 90 entries picked randomly form `tree_1` and 10 picked 
   randomly from `tree_2`. 
+
+  The entries are picked from each tree according to the `sampling` 
+  strategy: a single contiguous window starting at a random entry 
+  (`"window"`), a random subset of the tree clusters (`"baskets"`), or 
+  a random subset of the tree entries (`"entries"`). Only the clusters 
+  containing the picked entries are read from disk.
   
   Parameters
   ----------
@@ -37,7 +51,41 @@ def data_from_trees ( trees ,
   chunk_size : `int`, optional
     Total number of data rows picked from trees (`None`, by default).
     Note: it may not correspond with the actual length of the output 
-    dataframe, since the filtering is applied as final step.
+    dataframe, since the filtering is applied as final step, unless 
+    `fill` is enabled.
+
+  sampling : {'window', 'baskets', 'entries'}, optional
+    Strategy used to pick entries from each tree. With `'window'` 
+    (default) a contiguous slice of entries is read, with `'baskets'` 
+    whole clusters of baskets are drawn at random until the required 
+    number of entries is reached, while with `'entries'` the entries are 
+    drawn at random without replacement and only the clusters including 
+    at least one of them are read. The latter gives the least correlated 
+    samples, at the cost of reading more baskets for small chunks.
+
+  fill : `bool`, optional
+    If `True`, `chunk_size` refers to the rows passing the `cut`: each 
+    tree is read in batches until its share of selected rows is collected, 
+    sizing each batch on the selection efficiency measured so far. The 
+    efficiencies are kept in memory and reused to plan the first batch 
+    of later calls (`False`, by default).
+
+  step_size : `int` or `str`, optional
+    Number of entries or memory size of the temporary arrays read at a 
+    time from each tree (`"100 MB"`, by default).
+
+  num_workers : `int`, optional
+    Number of threads used to read the trees concurrently (`None`, by 
+    default). If `None` or `1` is selected, the trees are read one at a 
+    time. Since the uproot decompression releases the GIL, the I/O phase 
+    scales with the number of cores.
+
+  decompression_executor : `concurrent.futures.Executor`, optional
+    Executor used by uproot to decompress the baskets (`None`, by default).
+
+  interpretation_executor : `concurrent.futures.Executor`, optional
+    Executor used by uproot to interpret the baskets as arrays (`None`, 
+    by default).
 
   Returns
   -------
@@ -48,7 +96,7 @@ def data_from_trees ( trees ,
 
   See Also
   --------
-  uproot.models.TTree.arrays
+  uproot.models.TTree.iterate
 
   Examples
   --------
@@ -73,6 +121,234 @@ def data_from_trees ( trees ,
   8 -33.957113 -23.001362  22.853348
   9 -33.957113 -23.001362  22.853348
   """
+  def load (tree, quota):
+    chunks = list()
+
+    def read (ranges, indices, max_rows):
+      num_selected = 0
+      for df in _read_window ( tree = tree , 
+                               ranges = ranges , 
+                               indices = indices , 
+                               branches = branches , 
+                               cut = cut , 
+                               step_size = step_size , 
+                               library = "pd" , 
+                               decompression_executor  = decompression_executor  ,
+                               interpretation_executor = interpretation_executor ):
+        chunks . append ( df.iloc [:max (0, max_rows - num_selected)] )
+        num_selected += len (df)
+      return num_selected
+
+    _load_tree (tree, quota, read, sampling, cut, fill)
+    if len(chunks) == 0:
+      return pd.DataFrame ( columns = branches )
+    return pd.concat (chunks, ignore_index = True)
+
+  windows = _tree_quotas (trees, max_ntrees, chunk_size, exact = fill)
+  data = _map_windows (load, windows, num_workers)
+
+  data = pd.concat (data, ignore_index = True)
+
+  return data
+
+
+def arrays_from_trees ( trees ,
+                        X_vars ,
+                        Y_vars ,
+                        w_var = None ,
+                        cut = None ,
+                        max_ntrees = None ,
+                        chunk_size = None ,
+                        sampling = "window" ,
+                        fill = False ,
+                        when_nan = 0. ,
+                        step_size = "10 MB" ,
+                        num_workers = None ,
+                        decompression_executor = None ,
+                        interpretation_executor = None ) -> tuple:
+  """Stratified data shuffling from list of `uproot.TTree` into NumPy arrays.
+
+  Same sampling strategy of `data_from_trees`, but the branches are read 
+  as NumPy arrays (bypassing pandas) and written straight into preallocated 
+  `np.float32` buffers for the input-set, the output-set and the weights. 
+  The NaN elements are replaced in place, so that no further full-size 
+  copies of the dataset are allocated.
+
+  Parameters
+  ----------
+  trees : `list` of `uproot.TTree`
+    List of `uproot.TTree` from which to pick data.
+
+  X_vars : `str` or `list` of `str`
+    Branch names of the input variables within the trees.
+
+  Y_vars : `str` or `list` of `str`
+    Branch names of the output variables within the trees.
+
+  w_var : `str` or `list` of `str`, optional
+    Branch name of the weight variable, if available, within the trees
+    (`None`, by default). A list should contain a single name.
+
+  cut : `str`, optional
+    Boolean expression to filter the trees (`None`, by default).
+
+  max_ntrees : `int`, optional
+    Maximum number of trees from which to pick data (`None`, by default).
+
+  chunk_size : `int`, optional
+    Total number of data rows picked from trees (`None`, by default).
+    Note: it may not correspond with the actual length of the output 
+    arrays, since the filtering is applied as final step, unless `fill` 
+    is enabled.
+
+  sampling : {'window', 'baskets', 'entries'}, optional
+    Strategy used to pick entries from each tree (`'window'`, by default).
+    See `data_from_trees` for details.
+
+  fill : `bool`, optional
+    If `True`, the trees are read in batches until `chunk_size` rows 
+    passing the `cut` are collected (`False`, by default). See 
+    `data_from_trees` for details.
+
+  when_nan : `float`, optional
+    Value with which to replace NaN elements (`0.`, by default).
+
+  step_size : `int` or `str`, optional
+    Number of entries or memory size of the temporary arrays read at a 
+    time from each tree before being copied into the buffers (`"10 MB"`, 
+    by default).
+
+  num_workers : `int`, optional
+    Number of threads used to read the trees concurrently (`None`, by 
+    default). Each thread writes directly into its own region of the 
+    buffers.
+
+  decompression_executor : `concurrent.futures.Executor`, optional
+    Executor used by uproot to decompress the baskets (`None`, by default).
+
+  interpretation_executor : `concurrent.futures.Executor`, optional
+    Executor used by uproot to interpret the baskets as arrays (`None`, 
+    by default).
+
+  Returns
+  -------
+  X : `np.ndarray`
+    Array containing the input-set.
+
+  Y : `np.ndarray`
+    Array containing the output-set.
+
+  w : `np.ndarray`
+    Array containing the weights (array of ones, if not available).
+
+  See Also
+  --------
+  lb_pidsim_train.utils.data_from_trees :
+    Stratified data shuffling from list of `uproot.TTree`.
+
+  Examples
+  --------
+  >>> import uproot
+  >>> events = uproot.open ("../data/Zmumu.root:events")
+  >>> from lb_pidsim_train.utils import arrays_from_trees
+  >>> X, Y, w = arrays_from_trees ([events], ['px1', 'py1'], 'pz1', 'E1', chunk_size = 10)
+  >>> print (X.shape, Y.shape, w.shape, X.dtype)
+  (10, 2) (10, 1) (10, 1) float32
+  """
+  ## List data-type promotion
+  if isinstance (X_vars, str):
+    X_vars = [X_vars]
+  if isinstance (Y_vars, str):
+    Y_vars = [Y_vars]
+  if isinstance (w_var, str):
+    w_var = [w_var]
+  if (w_var is not None) and (len(w_var) > 1):
+    raise ValueError ("A single weight variable should be passed.")
+
+  branches = X_vars + Y_vars
+  if w_var is not None:
+    branches += w_var
+
+  windows = _tree_quotas (trees, max_ntrees, chunk_size, exact = fill)
+
+  ## Buffers allocation
+  sizes = [ quota for _, quota in windows ]
+  offsets = np.cumsum ( [0] + sizes )
+  max_rows = int ( offsets[-1] )
+  X = np.empty ( shape = (max_rows, len(X_vars)), dtype = np.float32 )
+  Y = np.empty ( shape = (max_rows, len(Y_vars)), dtype = np.float32 )
+  w = np.ones  ( shape = (max_rows, 1), dtype = np.float32 )
+
+  ## Data load (each window fills its own region of the buffers)
+  def load (tree, quota, offset):
+    num_rows = offset
+
+    def read (ranges, indices, max_rows):
+      nonlocal num_rows
+      num_selected = 0
+      for arrays in _read_window ( tree = tree , 
+                                   ranges = ranges , 
+                                   indices = indices , 
+                                   branches = branches , 
+                                   cut = cut , 
+                                   step_size = step_size , 
+                                   library = "np" , 
+                                   decompression_executor  = decompression_executor  ,
+                                   interpretation_executor = interpretation_executor ):
+        n_sel = len ( arrays[branches[0]] )
+        n = min ( n_sel, max (0, max_rows - num_selected) )
+        for buffer, variables in zip ( [X, Y, w], [X_vars, Y_vars, w_var] ):
+          if variables is None: continue
+          for j, var in enumerate (variables):
+            buffer [num_rows:num_rows+n, j] = arrays[var][:n]
+        num_rows += n
+        num_selected += n_sel
+        del arrays
+      return num_selected
+
+    _load_tree (tree, quota, read, sampling, cut, fill)
+    return num_rows - offset
+
+  windows = [ win + (offset,) for win, offset in zip (windows, offsets[:-1]) ]
+  filled = _map_windows (load, windows, num_workers)
+
+  ## Compact the regions and drop the unused rows (selections applied)
+  num_rows = 0
+  for offset, n in zip (offsets[:-1], filled):
+    if offset != num_rows:
+      for buffer in [X, Y, w]:
+        buffer [num_rows:num_rows+n] = buffer [offset:offset+n]
+    num_rows += n
+
+  if num_rows < max_rows:
+    for buffer in [X, Y, w]:
+      buffer . resize ( (num_rows, buffer.shape[1]), refcheck = False )
+
+  nan_filter (X, when_nan = when_nan, inplace = True)
+  nan_filter (Y, when_nan = when_nan, inplace = True)
+  return X, Y, w
+
+
+SAMPLINGS = ["window", "baskets", "entries"]
+"""Strategies available to pick entries from the trees."""
+
+CUT_ALIAS = "__selection__"
+"""Alias of the boolean cut, read along with the branches when sampling entries."""
+
+
+FILL_SAFETY = 1.1
+"""Over-reading factor applied to the estimated entries needed to fill a tree quota."""
+
+MIN_FILL_ENTRIES = 1000
+"""Minimum number of entries read per batch to fill a tree quota."""
+
+_EFFICIENCIES = dict()
+"""Selection efficiencies measured per (file, tree, cut), reused to plan the reads."""
+
+
+def _tree_quotas (trees, max_ntrees = None, chunk_size = None, exact = False) -> list:
+  """Return the list of `(tree, num_entries)` to load. If `exact` is 
+  `True`, the quotas of the picked trees sum up to `chunk_size`."""
   ## Total entries
   tot_entries = 0
   for t in trees:
@@ -95,28 +371,244 @@ def data_from_trees ( trees ,
   else:
     chunk_size = int ( tot_entries )
 
-  data = list()
   indices = np.random.permutation (len(trees)) [:max_ntrees]
-  for i in indices:
-    tree = trees[i]
-
-    ## Entry start-stop computation
-    num_entries = tree.num_entries
-    frac = num_entries / tot_entries
-    tree_chunk = int (frac * chunk_size)
-    entry_start = np.random.randint ( 0, max (1, num_entries - tree_chunk) )
-    entry_stop  = entry_start + tree_chunk
-
-    ## Data load
-    data . append ( tree.arrays ( expressions = branches ,
-                                  cut = cut ,
-                                  entry_start = entry_start ,
-                                  entry_stop  = entry_stop  ,
-                                  library = "pd" ) )
+  picked = [ trees[i] for i in indices ]
 
-  data = pd.concat (data, ignore_index = True)
+  if not exact:
+    return [ ( t, int (t.num_entries / tot_entries * chunk_size) ) for t in picked ]
 
-  return data
+  ## Largest remainder apportionment among the picked trees
+  entries = np.array ( [ t.num_entries for t in picked ], dtype = np.float64 )
+  shares = chunk_size * entries / max ( entries.sum(), 1. )
+  quotas = np.floor (shares) . astype (np.int64)
+  missing = chunk_size - quotas.sum()
+  if missing > 0:
+    quotas [ np.argsort (quotas - shares) [:missing] ] += 1
+  return [ ( t, int(q) ) for t, q in zip (picked, quotas) ]
+
+
+def _load_tree (tree, quota, read, sampling = "window", cut = None, fill = False) -> int:
+  """Pick entries from `tree` and pass them to `read (ranges, indices, max_rows)`, 
+  returning the number of selected rows. If `fill` is `True`, batches are read 
+  until `quota` selected rows are collected, each one sized on the selection 
+  efficiency measured so far."""
+  sampler = _TreeSampler (tree, sampling, quota)
+  if not fill:
+    ranges, indices = sampler.draw (quota)
+    return min ( read (ranges, indices, quota), quota )
+
+  key = ( tree.file.file_path, tree.object_path, cut )
+  efficiency = _EFFICIENCIES.get (key, 1.)
+
+  num_read = 0
+  num_selected = 0
+  num_rows = 0
+  while (num_rows < quota) and (not sampler.exhausted):
+    missing = quota - num_rows
+    if efficiency < 1.:
+      request = int ( np.ceil (FILL_SAFETY * missing / efficiency) )
+      request = max (request, MIN_FILL_ENTRIES)
+    else:
+      request = missing
+    ranges, indices = sampler.draw (request)
+    num_read += _window_size (ranges, indices)
+    selected = read (ranges, indices, missing)
+    num_selected += selected
+    num_rows += min (selected, missing)
+    efficiency = max (num_selected, 1) / num_read
+
+  if num_read > 0:
+    _EFFICIENCIES[key] = efficiency
+  return num_rows
+
+
+class _TreeSampler:
+  """Draw disjoint sets of entries from a `uproot.TTree`, according to 
+  one of the `SAMPLINGS` strategies. Subsequent draws never return the 
+  same entry twice."""
+  def __init__ (self, tree, sampling = "window", num_entries = 0) -> None:
+    if sampling not in SAMPLINGS:
+      raise ValueError ( f"`sampling` should be chosen in {SAMPLINGS}, '{sampling}' passed." )
+    self._sampling = sampling
+    self._num_entries = tree.num_entries
+    self._remaining = tree.num_entries
+
+    if sampling == "window":
+      ## Contiguous entries from a random start, then wrap around
+      self._start = np.random.randint ( 0, max (1, self._num_entries - num_entries) )
+      self._cursor = self._start
+      self._wrapped = False
+    elif sampling == "baskets":
+      ## Clusters in random order
+      offsets = _cluster_offsets (tree)
+      order = np.random.permutation ( len(offsets) - 1 )
+      self._clusters = [ ( int(offsets[c]), int(offsets[c+1]) ) for c in order ]
+    else:
+      ## Entries left in each cluster, and the ones already drawn
+      self._offsets = _cluster_offsets (tree)
+      self._left = np.diff (self._offsets)
+      self._drawn = dict()
+      ## Generator seeded from the global state, so that `np.random.seed` holds
+      self._rng = np.random.default_rng ( np.random.randint (2**31 - 1) )
+
+  @property
+  def exhausted (self) -> bool:
+    """Whether all the tree entries have been drawn."""
+    return self._remaining == 0
+
+  def draw (self, num_entries) -> tuple:
+    """Return the `ranges` to read and the sorted `indices` to pick within 
+    them (`None`, if all the entries of `ranges` are picked)."""
+    num_entries = min ( int(num_entries), self._remaining )
+    self._remaining -= num_entries
+    if self._sampling == "window":
+      return self._draw_window (num_entries), None
+    elif self._sampling == "baskets":
+      return self._draw_baskets (num_entries), None
+    else:
+      return self._draw_entries (num_entries)
+
+  def _draw_window (self, num_entries) -> list:
+    ranges = list()
+    while num_entries > 0:
+      if (not self._wrapped) and (self._cursor == self._num_entries):
+        self._cursor = 0
+        self._wrapped = True
+      stop = self._start if self._wrapped else self._num_entries
+      n = min (num_entries, stop - self._cursor)
+      ranges . append ( (self._cursor, self._cursor + n) )
+      self._cursor += n
+      num_entries -= n
+    return _merge_ranges (ranges)
+
+  def _draw_baskets (self, num_entries) -> list:
+    ranges = list()
+    while num_entries > 0:
+      entry_start, entry_stop = self._clusters . pop (0)
+      n = min (num_entries, entry_stop - entry_start)
+      ranges . append ( (entry_start, entry_start + n) )
+      if entry_start + n < entry_stop:
+        self._clusters . insert ( 0, (entry_start + n, entry_stop) )
+      num_entries -= n
+    return _merge_ranges (ranges)
+
+  def _draw_entries (self, num_entries) -> tuple:
+    if num_entries == 0:
+      return list(), np.zeros (0, dtype = np.int64)
+
+    ## Entries per cluster, then entries within each cluster
+    counts = self._rng.multivariate_hypergeometric (self._left, num_entries)
+    ranges = list()
+    indices = list()
+    for c in np.flatnonzero (counts):
+      size = self._offsets[c+1] - self._offsets[c]
+      drawn = self._drawn.get (c)
+      if drawn is None:
+        local = self._rng.choice ( size, size = counts[c], replace = False )
+        self._drawn[c] = local
+      else:
+        free = np.setdiff1d ( np.arange (size), drawn, assume_unique = True )
+        local = self._rng.choice ( free, size = counts[c], replace = False )
+        self._drawn[c] = np.concatenate ( [drawn, local] )
+      self._left[c] -= counts[c]
+      indices . append ( self._offsets[c] + np.sort (local) )
+      ranges . append ( ( int(self._offsets[c]), int(self._offsets[c+1]) ) )
+    return _merge_ranges (ranges), np.concatenate (indices)
+
+
+def _cluster_offsets (tree) -> np.ndarray:
+  """Return the entry offsets of the clusters of baskets shared by all the branches."""
+  if tree.num_entries == 0:
+    return np.zeros (1, dtype = np.int64)
+  return np.asarray ( tree.common_entry_offsets(), dtype = np.int64 )
+
+
+def _merge_ranges (ranges) -> list:
+  """Sort the `(entry_start, entry_stop)` ranges and merge the contiguous ones."""
+  merged = list()
+  for entry_start, entry_stop in sorted (ranges):
+    if (len(merged) > 0) and (merged[-1][1] == entry_start):
+      merged[-1] = ( merged[-1][0], entry_stop )
+    else:
+      merged . append ( (entry_start, entry_stop) )
+  return merged
+
+
+def _window_size (ranges, indices = None) -> int:
+  """Return the maximum number of rows loaded from a window."""
+  if indices is not None:
+    return len (indices)
+  return sum ( entry_stop - entry_start for entry_start, entry_stop in ranges )
+
+
+def _read_window ( tree , 
+                   ranges , 
+                   indices , 
+                   branches , 
+                   cut = None , 
+                   step_size = "100 MB" , 
+                   library = "np" , 
+                   **kwargs ):
+  """Iterate over the `ranges` of `tree`, yielding the entries listed in 
+  `indices` (all of them, if `None`) that pass the `cut`."""
+  ## Contiguous ranges: selection applied by uproot
+  if indices is None:
+    for entry_start, entry_stop in ranges:
+      for arrays in tree.iterate ( expressions = branches ,
+                                   cut = cut ,
+                                   entry_start = entry_start ,
+                                   entry_stop  = entry_stop  ,
+                                   step_size = step_size ,
+                                   library = library , 
+                                   **kwargs ):
+        yield arrays
+    return
+
+  ## Random entries: cut read as a column and applied after the pick
+  expressions = branches
+  aliases = None
+  if cut is not None:
+    expressions = list ( branches if branches is not None else tree.keys() ) + [CUT_ALIAS]
+    aliases = { CUT_ALIAS: cut }
+
+  for entry_start, entry_stop in ranges:
+    entry = entry_start
+    for arrays in tree.iterate ( expressions = expressions ,
+                                 aliases = aliases ,
+                                 entry_start = entry_start ,
+                                 entry_stop  = entry_stop  ,
+                                 step_size = step_size ,
+                                 library = library , 
+                                 **kwargs ):
+      n = len (arrays) if library == "pd" else len ( next (iter (arrays.values())) )
+      lo, hi = np.searchsorted ( indices, [entry, entry + n] )
+      keep = indices[lo:hi] - entry
+      entry += n
+      if cut is not None:
+        mask = np.asarray ( arrays[CUT_ALIAS], dtype = bool )
+        keep = keep [mask[keep]]
+      if library == "pd":
+        arrays = arrays . drop ( columns = [CUT_ALIAS], errors = "ignore" )
+        yield arrays . iloc[keep] . reset_index (drop = True)
+      else:
+        yield { k: v[keep] for k, v in arrays.items() if k != CUT_ALIAS }
+
+
+def _map_windows (func, windows, num_workers = None) -> list:
+  """Apply `func` to each window, using a thread pool if required."""
+  ## Data-type control
+  if num_workers is not None:
+    try:
+      num_workers = int ( num_workers )
+    except:
+      raise TypeError ("The number of workers should be an integer.")
+
+  if (num_workers is None) or (num_workers <= 1) or (len(windows) <= 1):
+    return [ func (*win) for win in windows ]
+
+  with ThreadPoolExecutor ( max_workers = min (num_workers, len(windows)) ) as executor:
+    futures = [ executor.submit (func, *win) for win in windows ]
+    return [ f.result() for f in futures ]
 
 
 
@@ -130,3 +622,31 @@ if __name__ == "__main__":
   branches = ['px1', 'py1', 'pz1']
   df = data_from_trees (trees, branches, chunk_size = 10)
   print (df)
+
+  ## Tree -> dataframe (random entries)
+  df = data_from_trees (trees, branches, chunk_size = 10, sampling = "entries")
+  print (df)
+
+  ## Tree -> dataframe (chunk filled with selected rows)
+  df = data_from_trees (trees, branches, cut = "px1 > 0", chunk_size = 100, fill = True)
+  print ( len(df), _EFFICIENCIES )
+
+  ## Tree -> arrays (peak memory comparison)
+  import tracemalloc
+
+  tracemalloc.start()
+  df = data_from_trees (trees, branches + ['E1'], chunk_size = None)
+  X = nan_filter ( df[['px1', 'py1']] . to_numpy() ) . astype (np.float32)
+  Y = nan_filter ( df[['pz1']] . to_numpy() ) . astype (np.float32)
+  w = df[['E1']] . to_numpy() . astype (np.float32)
+  _, peak_pd = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  del df, X, Y, w
+
+  tracemalloc.start()
+  X, Y, w = arrays_from_trees (trees, ['px1', 'py1'], ['pz1'], ['E1'], chunk_size = None)
+  _, peak_np = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+
+  print ( f"Peak memory (pandas path) : {peak_pd/1e3:.1f} kB" )
+  print ( f"Peak memory (numpy path)  : {peak_np/1e3:.1f} kB" )
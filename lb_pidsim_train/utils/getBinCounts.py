@@ -2,12 +2,20 @@
 
 import numpy as np
 
+CHUNK_SIZE = 65536
+"""Number of rows binned at a time, bounding the temporary memory."""
+
+EDGE_TOL = 1e-6
+"""Distance from the bin edges (in bin-width units) below which the bin index is checked,
+widened according to the precision of the input data-type."""
+
 
 def getBinCounts ( x_obs , 
                    x_exp , 
                    bins  = 100  ,
                    w_obs = None , 
-                   w_exp = None ) -> tuple:
+                   w_exp = None , 
+                   ranges = None ) -> tuple:
   """Return the bin counts of the two input datasets.
 
   Parameters
@@ -30,6 +38,12 @@ def getBinCounts ( x_obs ,
     An array of weights, of the same length as `x_exp`. Each value in `x_exp` 
     only contributes its associated weight towards the bin count (instead of 1).
 
+  ranges : array_like, optional
+    Lower and upper range of the bins for each feature, with shape 
+    `(n_features, 2)` (`None`, by default). If `None` is selected, the 
+    ranges are computed from the two datasets with `getBinRanges`, 
+    otherwise the values outside the ranges are ignored.
+
   Returns
   -------
   n_obs : `np.ndarray`
@@ -38,10 +52,20 @@ def getBinCounts ( x_obs ,
   n_exp : `np.ndarray`
     Bin counts of the expected dataset.
 
+  Notes
+  -----
+  All the features are binned in a single pass: the bin indices of the 
+  i-th feature are offset by `i * bins`, so that one `np.bincount` call 
+  per chunk of rows fills the histograms of all the features. The input 
+  arrays are not copied and, as for `numpy.histogram`, the bin edges and 
+  positions are computed in the result data-type of the inputs, so that 
+  `np.float32` samples are binned as `numpy.histogram` does.
+
   See Also
   --------
   numpy.histogram :
-    Numpy function used to compute the bin counts of the input datasets.
+    Numpy function reproduced (equal-width bins, right edge included in 
+    the last bin) to compute the bin counts of the input datasets.
 
   lb_pidsim_train.metrics.KL_div : 
     The bin counts are used to compute the Kullback–Leibler divergence.
@@ -55,9 +79,9 @@ def getBinCounts ( x_obs ,
   lb_pidsim_train.metrics.chi2_test : 
     The bin counts are used to perform the chi-squared test.
   """
-  ## Input samples --> Numpy arrays
-  x_obs = np.array ( x_obs )
-  x_exp = np.array ( x_exp )
+  ## Input samples --> Numpy arrays (no copy)
+  x_obs = np.asarray ( x_obs )
+  x_exp = np.asarray ( x_exp )
 
   ## Promotion to 2-D arrays
   if len (x_obs.shape) == 1:
@@ -79,33 +103,111 @@ def getBinCounts ( x_obs ,
   if w_obs is None: w_obs = 1.
   if w_exp is None: w_exp = 1.
 
-  ## Scalar weights --> vector weights
-  if isinstance ( w_obs, (int, float) ):
-    w_obs = w_obs * np.ones ( len(x_obs) )
-  if isinstance ( w_exp, (int, float) ):
-    w_exp = w_exp * np.ones ( len(x_exp) )
-
-  ## Input weights --> Numpy arrays
-  w_obs = np.array ( w_obs )
-  w_exp = np.array ( w_exp )
+  ## Input weights --> normalized Numpy arrays
+  w_obs = np.broadcast_to ( np.ravel (w_obs) . astype (np.float64) / len(x_obs), (len(x_obs),) )
+  w_exp = np.broadcast_to ( np.ravel (w_exp) . astype (np.float64) / len(x_exp), (len(x_exp),) )
+
+  ## Common binning per feature
+  if ranges is None:
+    ranges = getBinRanges (x_obs, x_exp)
+    check_range = False
+  else:
+    ranges = np.asarray (ranges, dtype = np.float64) . reshape (-1, 2)
+    if len(ranges) != x_obs.shape[1]:
+      raise ValueError ("The bin ranges should be passed for each feature.")
+    check_range = True
+
+  ## Bin edges in the result data-type of the inputs (as numpy.histogram)
+  dtype = np.result_type (x_obs, x_exp)
+  if not np.issubdtype (dtype, np.inexact):
+    dtype = np.float64
+  minval, maxval = ranges[:,0] . astype (dtype), ranges[:,1] . astype (dtype)
 
   ## Binned PDFs computation
-  n_obs, n_exp = list(), list()  
-  for i in range (x_obs.shape[1]):  # loop over features
-    minval = min ( min(x_obs[:,i]), min(x_exp[:,i]) )
-    maxval = max ( max(x_obs[:,i]), max(x_exp[:,i]) )
-
-    h_obs, _ = np.histogram ( x_obs[:,i], 
-                              bins = bins, range = [minval, maxval], 
-                              weights = w_obs / len(x_obs[:,i]) )
-    h_exp, _ = np.histogram ( x_exp[:,i], 
-                              bins = bins, range = [minval, maxval], 
-                              weights = w_exp / len(x_exp[:,i]) )
-    n_obs . append ( h_obs )
-    n_exp . append ( h_exp )
-  
-  return np.array(n_obs), np.array(n_exp)
+  n_obs = _batched_bincount (x_obs, w_obs, minval, maxval, bins, check_range)
+  n_exp = _batched_bincount (x_exp, w_exp, minval, maxval, bins, check_range)
+  return n_obs, n_exp
+
+
+def getBinRanges (x_obs, x_exp) -> np.ndarray:
+  """Return the common bin range of the two input datasets for each feature.
+
+  Parameters
+  ----------
+  x_obs : array_like
+    Array containing the observed dataset.
+
+  x_exp : array_like
+    Array containing the expected dataset.
+
+  Returns
+  -------
+  ranges : `np.ndarray`
+    Array of shape `(n_features, 2)` containing the minimum and maximum 
+    values of each feature within the two datasets. As for `numpy.histogram`, 
+    constant features are given a unit range.
+  """
+  x_obs = np.asarray ( x_obs )
+  x_exp = np.asarray ( x_exp )
+  if len (x_obs.shape) == 1:
+    x_obs = x_obs [:, np.newaxis]
+  if len (x_exp.shape) == 1:
+    x_exp = x_exp [:, np.newaxis]
 
+  ## Vectorized min/max per feature
+  minval = np.minimum ( x_obs.min (axis = 0), x_exp.min (axis = 0) ) . astype (np.float64)
+  maxval = np.maximum ( x_obs.max (axis = 0), x_exp.max (axis = 0) ) . astype (np.float64)
+  if not ( np.all (np.isfinite (minval)) and np.all (np.isfinite (maxval)) ):
+    raise ValueError ("The two samples should contain finite values only.")
+  same = ( minval == maxval )
+  minval [same] -= 0.5   # as numpy.histogram for constant features
+  maxval [same] += 0.5
+  return np.c_ [minval, maxval]
+
+
+def _batched_bincount (x, w, minval, maxval, bins, check_range = False, chunk_size = CHUNK_SIZE) -> np.ndarray:
+  """Weighted bin counts of all the columns of `x` with a single `np.bincount` 
+  per chunk of rows, offsetting the bin indices of the i-th column by `i * bins`.
+  Edges and positions are computed in the data-type of `minval` and `maxval`."""
+  num_rows, num_cols = x.shape
+  width = maxval - minval
+  offsets = np.arange (num_cols) * bins
+  counts = np.zeros ( num_cols * bins, dtype = np.float64 )
+
+  ## Bin edges, to correct the round-off of the computed indices
+  edges = np.concatenate ( [ np.linspace (lo, hi, bins + 1, dtype = minval.dtype) for lo, hi in zip (minval, maxval) ] )
+  edge_offsets = np.arange (num_cols) * (bins + 1)
+
+  ## Round-off of positions and edges (in bin-width units) for the input precision
+  scale = np.maximum ( np.abs (minval), np.abs (maxval) ) / width
+  tol = EDGE_TOL + 4 * np.finfo (minval.dtype) . eps * bins * (1 + scale)
+
+  for start in range (0, num_rows, chunk_size):
+    stop = min (start + chunk_size, num_rows)
+    x_chunk = x[start:stop]
+    pos = ( x_chunk - minval ) / width * bins   # as numpy.histogram, chunk only
+    weights = np.broadcast_to ( w[start:stop, np.newaxis], pos.shape )
+    if check_range:   # values outside the ranges (or NaN) in the first bin with null weight
+      inside = ( x_chunk >= minval ) & ( x_chunk <= maxval )
+      np.copyto (pos, 0., where = ~inside)
+      weights = np.where (inside, weights, 0.)
+    indices = pos . astype (np.intp)
+    np.minimum (indices, bins - 1, out = indices)   # right edge in the last bin
+
+    ## Round-off correction (as numpy.histogram) only close to the bin edges
+    pos -= indices + 0.5
+    rows, cols = np.nonzero ( np.abs (pos, out = pos) > 0.5 - tol )
+    if len(rows) > 0:
+      x_near = x_chunk [rows, cols]
+      i_near = indices [rows, cols]
+      i_near -= ( x_near < edges [i_near + edge_offsets[cols]] )
+      i_near += ( x_near >= edges [i_near + edge_offsets[cols] + 1] ) & ( i_near != bins - 1 )
+      indices [rows, cols] = np.clip (i_near, 0, bins - 1)
+
+    indices += offsets
+    counts += np.bincount ( indices.ravel(), weights = weights.ravel(), minlength = num_cols * bins )
+
+  return counts . reshape (num_cols, bins)
 
 
 if __name__ == "__main__":
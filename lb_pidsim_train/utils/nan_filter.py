@@ -3,7 +3,7 @@
 import numpy as np
 
 
-def nan_filter (x, when_nan = 0.) -> np.ndarray:
+def nan_filter (x, when_nan = 0., inplace = False) -> np.ndarray:
   """Replace NaN elements within `x` with the `when_nan` value.
 
   Parameters
@@ -14,6 +14,11 @@ def nan_filter (x, when_nan = 0.) -> np.ndarray:
     when_nan : `float`, optional
       Value with which to replace NaN elements within `x` (`0.`, by default).
 
+    inplace : `bool`, optional
+      If `True`, the NaN elements are replaced directly within `x`, that 
+      should be a floating-point `np.ndarray`, preserving its data-type and 
+      avoiding any full-size copy (`False`, by default).
+
   Returns
   -------
     x_filtered : array_like
@@ -31,15 +36,22 @@ def nan_filter (x, when_nan = 0.) -> np.ndarray:
   >>> print (filt_arr)
   [1. 0. 0. 0. 0.]
   """
-  ## Input array --> Numpy array
-  x = np.array (x) . astype (np.float64)
-
   ## Data-type control
   try:
     when_nan = float (when_nan)
   except:
     raise TypeError ("The value replacing NaN elements should be a float.")
 
+  ## In-place filter application
+  if inplace:
+    if not ( isinstance (x, np.ndarray) and np.issubdtype (x.dtype, np.floating) ):
+      raise TypeError ("In-place filtering requires a floating-point `np.ndarray`.")
+    np.copyto ( x, when_nan, where = ~np.isfinite (x) )
+    return x
+
+  ## Input array --> Numpy array
+  x = np.array (x) . astype (np.float64)
+
   ## Filter application
   x_finite = np.isfinite (x)
   x_nan = np.full_like (x, when_nan)
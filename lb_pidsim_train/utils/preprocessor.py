@@ -10,7 +10,8 @@ STRATEGIES = ["pass-through", "minmax", "standard", "simple-quantile", "weighted
 def preprocessor ( data ,
                    weights = None ,
                    strategies = "standard", 
-                   cols_to_transform = None ) -> LbColTransformer:
+                   cols_to_transform = None ,
+                   fit = True ) -> LbColTransformer:
   """Scikit-Learn transformer for data preprocessing.
   
   Parameters
@@ -29,6 +30,13 @@ def preprocessor ( data ,
     transformation (`None`, by default). If `None` is selected, 
     all the data columns are preprocessed.
 
+  fit : `bool`, optional
+    If `False`, the transformer is returned unfitted, so that it can be 
+    fitted chunk by chunk calling the `partial_fit` method (`True`, by 
+    default). In that case `data` is only used to infer the number of 
+    columns, and the `'simple-quantile'` strategy relies on the 
+    `WeightedQuantileTransformer` (with unit weights) that supports it.
+
   Returns
   -------
   scaler : `lb_pidsim_train.utils.LbColTransformer`
@@ -122,9 +130,10 @@ def preprocessor ( data ,
         n_quantiles = int ( strategy.split("-")[2] )
       else:
         n_quantiles = 1000 
-      scaler = QuantileTransformer ( n_quantiles = n_quantiles , 
-                                     subsample = int (1e8) ,
-                                     output_distribution = "normal" )
+      quantile_cls = QuantileTransformer if fit else WeightedQuantileTransformer   # partial_fit support
+      scaler = quantile_cls ( n_quantiles = n_quantiles , 
+                              subsample = int (1e8) ,
+                              output_distribution = "normal" )
     elif "-".join(strategy.split("-")[:2]) == "weighted-quantile":
       if len(strategy.split("-")) == 3:
         n_quantiles = int ( strategy.split("-")[2] )
@@ -151,7 +160,7 @@ def preprocessor ( data ,
   else:
     final_scaler = LbColTransformer ( transformers )
   
-  final_scaler . fit ( data, sample_weight = weights )
+  if fit: final_scaler . fit ( data, sample_weight = weights )
   return final_scaler
 
 
@@ -188,4 +197,14 @@ if __name__ == "__main__":
   print ("\t\t\t\t\t+------------+")
   print ("\t\t\t\t\t|   ERROR    |")
   print ("\t\t\t\t\t+------------+")
+  print (err, "\n")
+
+  ## Preprocessing fitted chunk by chunk
+  chunked = preprocessor ( data, strategies = ["standard","minmax"], cols_to_transform = [(0,2),3], fit = False )
+  for chunk, w_chunk in zip ( np.array_split (data, 4), np.array_split (w, 4) ):
+    chunked . partial_fit ( chunk, sample_weight = w_chunk )
+  err = np.max ( abs (chunked.transform (data) - data_scaled) )
+  print ("\t\t\t\t\t+------------------+")
+  print ("\t\t\t\t\t|   PARTIAL_FIT    |")
+  print ("\t\t\t\t\t+------------------+")
   print (err)
@@ -0,0 +1,105 @@
+#from __future__ import annotations
+
+import uproot
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+
+def stream_from_files ( files ,
+                        branches ,
+                        cut = None ,
+                        step_size = "100 MB" ,
+                        shuffle_files = True ,
+                        num_workers = None ):
+  """Out-of-core data streaming from list of ROOT files.
+
+  The ROOT trees are iterated chunk by chunk through `uproot.iterate`, so
+  that only one chunk (whose size is controlled by `step_size`) is kept
+  in memory at a time. The files are visited in random order, if required,
+  while the entries within each chunk are yielded as stored on disk.
+
+  Parameters
+  ----------
+  files : `dict` or `list` of `str`
+    ROOT files to iterate over, formatted as accepted by `uproot.iterate`
+    (e.g. `{"file.root": "tree"}` or `["file.root:tree"]`).
+
+  branches : `str` or `list` of `str`
+    Column names of the trees from which to pick data.
+
+  cut : `str`, optional
+    Boolean expression to filter the trees (`None`, by default).
+
+  step_size : `int` or `str`, optional
+    Number of entries or memory size (e.g. `"100 MB"`) of each chunk
+    read from disk (`"100 MB"`, by default).
+
+  shuffle_files : `bool`, optional
+    Whether to iterate over the files in random order (`True`, by default).
+
+  num_workers : `int`, optional
+    Number of threads used by uproot to decompress the baskets of each 
+    chunk (`None`, by default). If `None` or `1` is selected, the baskets 
+    are decompressed in the main thread.
+
+  Yields
+  ------
+  data : `pd.DataFrame`
+    Dataframe containing a chunk of entries picked from `files`. The
+    column labels correspond with `branches`.
+
+  See Also
+  --------
+  uproot.iterate
+
+  lb_pidsim_train.utils.data_from_trees :
+    Stratified data shuffling from list of `uproot.TTree`.
+
+  Examples
+  --------
+  >>> from lb_pidsim_train.utils import stream_from_files
+  >>> files = {"../data/Zmumu.root": "events"}
+  >>> branches = ['px1', 'py1', 'pz1']
+  >>> for df in stream_from_files (files, branches, step_size = 1000):
+  ...   print (len(df))
+  1000
+  1000
+  304
+  """
+  ## List data-type promotion
+  if isinstance (files, str):
+    files = [files]
+  if isinstance (files, dict):
+    files = [ {fname: tname} for fname, tname in files.items() ]
+
+  ## Files ordering
+  if shuffle_files:
+    indices = np.random.permutation (len(files))
+    files = [ files[i] for i in indices ]
+
+  ## Decompression executor
+  if (num_workers is not None) and (int (num_workers) > 1):
+    executor = ThreadPoolExecutor ( max_workers = int (num_workers) )
+  else:
+    executor = None
+
+  try:
+    for chunk in uproot.iterate ( files = files ,
+                                  expressions = branches ,
+                                  cut = cut ,
+                                  step_size = step_size ,
+                                  decompression_executor = executor ,
+                                  library = "pd" ):
+      yield chunk . reset_index (drop = True)
+  finally:
+    if executor is not None: executor.shutdown()
+
+
+
+if __name__ == "__main__":
+  ## Iterate over ROOT file
+  files = {"../data/Zmumu.root": "events"}
+  branches = ['px1', 'py1', 'pz1']
+  for df in stream_from_files (files, branches, step_size = 1000):
+    print (df.shape)
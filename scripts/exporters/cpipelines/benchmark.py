@@ -0,0 +1,68 @@
+import os
+import ctypes
+import numpy as np
+
+from time import time
+from argparse import ArgumentParser
+
+
+parser = ArgumentParser()
+parser . add_argument ( "--inputfile" , "-i" , help = "Compiled pipeline (shared object)"         , required = True )
+parser . add_argument ( "--particle"  , "-p" , help = "Particle name (e.g. Pion)"                 , required = True )
+parser . add_argument ( "--nrows"     , "-n" , help = "Number of tracks"                          , type = int , default = 100000 )
+parser . add_argument ( "--nloop"     , "-l" , help = "Number of tracks for the per-track calls"  , type = int , default = 10000 )
+parser . add_argument ( "--seed"      ,        help = "Seed of the latent-space generator"        , type = int , default = 42 )
+args = parser.parse_args()
+
+dll = ctypes.CDLL ( os.path.abspath (args.inputfile) )
+float_p = ctypes.POINTER (ctypes.c_float)
+
+N_INPUT, N_RANDOM, N_OUTPUT = 5, 64*4, 15
+
+pipe = getattr (dll, f"{args.particle.lower()}_pipe")
+pipe.argtypes = [float_p, float_p, float_p]
+pipe_batch = getattr (dll, f"{args.particle.lower()}_pipe_batch")
+pipe_batch.argtypes = [float_p, float_p, float_p, ctypes.c_int64]
+pipe_batch_rng = getattr (dll, f"{args.particle.lower()}_pipe_batch_rng")
+pipe_batch_rng.argtypes = [float_p, float_p, ctypes.c_int64, ctypes.c_uint64, ctypes.c_uint64]
+pipe_rng = getattr (dll, f"{args.particle.lower()}_pipe_rng")
+pipe_rng.argtypes = [float_p, float_p]
+dll.pipeline_set_seed.argtypes = [ctypes.c_uint64, ctypes.c_uint64]
+
+## Input tracks (p, eta, nTracks, charge, isMuon)
+n = args.nrows
+rng = np.random.default_rng (args.seed)
+data = np.empty ( (n, N_INPUT), dtype = np.float32 )
+data[:,0] = rng.normal (50e3, 0.5e3, n)
+data[:,1] = rng.uniform (2, 5, n)
+data[:,2] = rng.integers (20, 200, n)
+data[:,3] = rng.choice ([-1., 1.], n)
+data[:,4] = rng.integers (0, 2, n)
+rnd = rng.standard_normal ( (n, N_RANDOM), dtype = np.float32 )
+out = np.empty ( (n, N_OUTPUT), dtype = np.float32 )
+
+## Per-track entry point
+nloop = min (args.nloop, n)
+start = time()
+for i in range (nloop):
+  pipe ( out[i] . ctypes.data_as (float_p), data[i] . ctypes.data_as (float_p), rnd[i] . ctypes.data_as (float_p) )
+timing = { "per-track" : nloop / (time() - start) }
+
+dll.pipeline_set_seed (args.seed, 0)
+start = time()
+for i in range (nloop):
+  pipe_rng ( out[i] . ctypes.data_as (float_p), data[i] . ctypes.data_as (float_p) )
+timing["per-track (Philox)"] = nloop / (time() - start)
+
+## Batched entry points
+start = time()
+pipe_batch ( out . ctypes.data_as (float_p), data . ctypes.data_as (float_p), rnd . ctypes.data_as (float_p), n )
+timing["batch"] = n / (time() - start)
+
+start = time()
+pipe_batch_rng ( out . ctypes.data_as (float_p), data . ctypes.data_as (float_p), n, args.seed, 0 )
+timing["batch (Philox)"] = n / (time() - start)
+
+print ( f"[INFO] {args.particle} pipeline, OMP_NUM_THREADS = {os.environ.get ('OMP_NUM_THREADS', 'default')}" )
+for name, rate in timing.items():
+  print ( f"{name:>20s} : {rate:12.0f} tracks/s  (x{rate / timing['per-track']:.1f})" )
@@ -4,18 +4,17 @@ import pickle
 import ctypes
 import numpy as np 
 import pandas as pd
-import tensorflow as tf
 
-from tqdm import tqdm 
-from functools import partial
 from argparse import ArgumentParser
-from lb_pidsim_train.preprocessing import LbColTransformer
+from lb_pidsim_train.inference import FullPipe
 
 
 parser = ArgumentParser()
 parser . add_argument ( "--inputfile" , "-i" , help = "Input filename"             , required = True )
 parser . add_argument ( "--particle"  , "-p" , help = "Particle name (e.g. Pion)"  , required = True ) 
 parser . add_argument ( "--slot"      , "-s" , help = "Slot (e.g. 2016-MagUp-dta)" , required = True )
+parser . add_argument ( "--nrows"     , "-n" , help = "Number of tracks to check"  , type = int , default = 1000000 )
+parser . add_argument ( "--seed"      ,        help = "Check the internal latent-space generator with this seed" , type = int , default = None )
 args = parser.parse_args() 
 
 with open ("../../training/config/config.yml") as file:
@@ -24,21 +23,6 @@ with open ("../../training/config/config.yml") as file:
 MODEL_DIR = f"{config['model_dir']}/latest_models"
 
 
-class GanPipe:
-  def __init__ (self, step, part, slot):
-    model_path = f"{MODEL_DIR}/{step}_{part}_{slot}_latest" 
-    self.tX = LbColTransformer ( pickle.load ( open ( f"{model_path}/transform_X.pkl", "rb" ) ) )
-    self.tY = LbColTransformer ( pickle.load ( open ( f"{model_path}/transform_Y.pkl", "rb" ) ) )
-    self.model = tf.keras.models.load_model ( f"{model_path}/saved_generator" )
-
-  def predict (self, X, random):
-    return self.tY.inverse_transform (
-                                       self.model.predict (
-                                         np.concatenate ( (self.tX.transform(X), random), axis = 1 )
-                                                          )
-                                     )
-                                     
-
 class isMuonPipe:
   def __init__ (self, part, slot):
     model_path = f"{MODEL_DIR}/isMuon_{part}_{slot}_latest" 
@@ -48,32 +32,10 @@ class isMuonPipe:
     return self.pipe.predict_proba(X)[:,1] 
 
 
-class FullPipe:
-  def __init__ (self, part, slot):
-    self.rich  = GanPipe ("Rich", part, slot) 
-    self.muon  = GanPipe ("Muon", part, slot) 
-    self.gpid  = GanPipe ("GlobalPID", part, slot) 
-    self.gmuid = GanPipe ("GlobalMuonId", part, slot) 
-
-  def predict (self, X, random):
-    richdll = self.rich.predict ( X[:,:4], random[:, 0o000:0o100] )
-    muondll = self.muon.predict ( X[:,:4], random[:, 0o100:0o200] )
-    muondll = np.where ( np.c_[X[:,4]], np.c_[muondll[:,0], muondll[:,0] - muondll[:,1]], -1000 )   # Muon error code
-
-    gpidX = np.concatenate( [X[:,:4], richdll, X[:,-1:], muondll], axis = 1 )
-    gpid = self.gpid.predict ( gpidX, random[:, 0o200:0o300] )
-
-    gmuidX = np.concatenate ( [X[:,:4], richdll, muondll], axis = 1 )
-    gmuid = self.gmuid.predict ( gmuidX, random[:,0o300:0o400] )
-
-    return np.concatenate ( [richdll, muondll, gpid, gmuid], axis = 1 )
-
-
-
 ismuon_pipe = isMuonPipe (args.particle, args.slot)
-pipe = FullPipe (args.particle, args.slot)
+pipe = FullPipe.load (MODEL_DIR, args.particle, args.slot)   # single graph, preprocessing included
 
-n = 10000
+n = args.nrows
 p = np.random.normal (50e3, 0.5e3, n)
 eta = np.random.uniform (2, 5, (n,2)) . mean (axis = -1)
 nTracks = np.random.uniform (20, 200, (n,2)) . mean (axis = -1) . astype (np.int32)
@@ -83,8 +45,8 @@ ismuon_eff = ismuon_pipe.predict (np.c_[p, eta, nTracks, charge])
 mu_rnd = np.random.uniform (0, 1, n) 
 ismuon = np.where (mu_rnd < ismuon_eff, 1, 0 )
 
-data = np.c_ [p, eta, nTracks, charge, ismuon]
-rnd  = np.random.normal (0, 1, (n, 64*4) )
+## Contiguous single-precision buffers shared by Python and C
+data = np.ascontiguousarray ( np.c_ [p, eta, nTracks, charge, ismuon], dtype = np.float32 )
 
 basedir = os.environ["PWD"]
 dll = ctypes.CDLL ( os.path.join (basedir, args.inputfile) )
@@ -92,52 +54,56 @@ print (dll)
 
 float_p = ctypes.POINTER (ctypes.c_float) 
 
+ismuon_batch = getattr (dll, f"IsMuon{args.particle}_batch")
+ismuon_batch.argtypes = [float_p, float_p, ctypes.c_int64]
+pipe_batch = getattr (dll, f"{args.particle.lower()}_pipe_batch")
+pipe_batch.argtypes = [float_p, float_p, float_p, ctypes.c_int64]
+pipe_batch_rng = getattr (dll, f"{args.particle.lower()}_pipe_batch_rng")
+pipe_batch_rng.argtypes = [float_p, float_p, ctypes.c_int64, ctypes.c_uint64, ctypes.c_uint64]
+dll.latent_normal_batch.argtypes = [float_p, ctypes.c_int64, ctypes.c_uint64, ctypes.c_uint64]
+
+
+def philox_normal (seed, track, size = 64*4):
+  """NumPy replica of `latent_normal` in pipeline.C (Philox4x64 + Box-Muller)."""
+  bits = np.random.Philox (key = seed, counter = track << 64) . random_raw (size)
+  u = ( (bits >> np.uint64(11)) . astype (np.float64) + 0.5 ) / 2**53
+  radius, phi = np.sqrt ( -2 * np.log (u[0::2]) ), 2 * np.pi * u[1::2]
+  z = np.empty (size)
+  z[0::2], z[1::2] = radius * np.cos (phi), radius * np.sin (phi)
+  return z
+
+
+if args.seed is None:
+  rnd = np.random.default_rng() . standard_normal ( (n, 64*4), dtype = np.float32 )
+else:
+  rnd = np.empty ( (n, 64*4), dtype = np.float32 )
+  dll.latent_normal_batch ( rnd . ctypes.data_as (float_p), n, args.seed, 0 )
+  for track in np.random.choice (n, min (n, 100), replace = False):
+    if not np.allclose ( rnd[track], philox_normal (args.seed, int(track)), rtol = 1e-5, atol = 1e-5 ):
+      raise Exception ("C and NumPy latent-space generators inconsistent")
 
 pyout = pipe.predict (data, rnd)
 
-counts = {th:0 for th in ['1e-2','1e-3','1e-4','1e-5']}
-
-errors = list()   # debug
-progress_bar = partial (tqdm, total = n, desc = f"Checking {args.particle}/{args.slot}")
-for data_row, rnd_row, pyout_row, ismuoneff_row in progress_bar ( zip (data, rnd, pyout, ismuon_eff) ):
-  in_f  = data_row.astype (ctypes.c_float)
-  out_f = np.zeros (15, dtype = ctypes.c_float)
-  rnd_f = rnd_row.astype (ctypes.c_float) 
-
-  getattr (dll, f"IsMuon{args.particle}") (
-                                            out_f . ctypes.data_as (float_p), 
-                                            in_f  . ctypes.data_as (float_p) 
-                                          )
-
-  abserr = abs (out_f[0] - ismuoneff_row)
-  # if abserr > 1e-2:
-  #   print ( np.c_ [out_f[0], ismuoneff_row, abserr] ) 
-  #   raise Exception ("C and Python muon_eff implementations inconsistent")
-
-  for th in counts.keys():
-    counts[th] += 1 if abserr > float(th) else 0 
-
-  getattr (dll, f"{args.particle.lower()}_pipe")(
-                                                  out_f . ctypes.data_as (float_p), 
-                                                  in_f  . ctypes.data_as (float_p), 
-                                                  rnd_f . ctypes.data_as (float_p)
-                                                )
-   
-  relerr = abs (out_f - pyout_row) / ( 1 + abs (pyout_row) )
-  for th in counts.keys():
-    counts[th] += np.count_nonzero (relerr > float(th))
-
-  # if np.any (relerr > 1e-2):
-  #   print ( np.c_ [out_f, pyout_row, relerr, relerr < 1e-3] ) 
-  #   raise Exception ("C and Python implementation were found inconsistent")
-
-  errors.append (np.concatenate ([np.array([abserr]), relerr], axis = 0))   # debug
-
-df = pd.DataFrame (errors, columns = ["isMuon"] + [f"Rich_{i}" for i in range(4)] + [f"Muon_{i}" for i in range(2)] + [f"GlobalPID_{i}" for i in range(7)] + [f"GlobalMuonId_{i}" for i in range(2)])
-print (df.describe())   # debug
+c_ismuon = np.empty (n, dtype = np.float32)
+c_out = np.empty_like (pyout, dtype = np.float32)
+ismuon_batch ( c_ismuon . ctypes.data_as (float_p), data . ctypes.data_as (float_p), n )
+if args.seed is None:
+  pipe_batch ( c_out . ctypes.data_as (float_p), data . ctypes.data_as (float_p), rnd . ctypes.data_as (float_p), n )
+else:   # only the kinematic inputs are passed
+  pipe_batch_rng ( c_out . ctypes.data_as (float_p), data . ctypes.data_as (float_p), n, args.seed, 0 )
+
+## Absolute error on isMuon efficiency, relative errors on the pipeline outputs
+errors = np.empty ( (n, 1 + pyout.shape[1]) )
+errors[:,0]  = np.abs (c_ismuon - ismuon_eff)
+errors[:,1:] = np.abs (c_out - pyout) / ( 1 + np.abs (pyout) )
+
+columns = ["isMuon"] + [f"Rich_{i}" for i in range(4)] + [f"Muon_{i}" for i in range(2)] + [f"GlobalPID_{i}" for i in range(7)] + [f"GlobalMuonId_{i}" for i in range(2)]
+quantiles = [0.5, 0.9, 0.99, 0.999, 1.0]
+df = pd.DataFrame ( np.quantile (errors, quantiles, axis = 0), index = [f"q{q}" for q in quantiles], columns = columns )
+print ( f"Error quantiles for {args.particle}/{args.slot} ({n} tracks)" )
+print (df.T)
 
 print ("SUCCESS")
 print ("All entries satisfy a compatibility requirement at 1e-2")
-for k in sorted (counts.keys()):
-  v = counts[k]
-  print (f"{v/pyout.size*100:.5f}% fails a compatibility check at {k}")
+for th in ['1e-2','1e-3','1e-4','1e-5']:
+  print (f"{np.count_nonzero (errors > float(th)) / errors.size * 100:.5f}% fails a compatibility check at {th}")
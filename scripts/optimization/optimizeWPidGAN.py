@@ -77,7 +77,9 @@ trainer = GanTrainer ( name = model_name ,
                        export_dir  = "{}/optimization_studies/{}" . format (config["model_dir"], args.model) ,
                        export_name = model_name ,
                        report_dir  = "{}/optimization_studies/{}" . format (config["report_dir"], args.model) ,
-                       report_name = model_name )
+                       report_name = model_name ,
+                       strategy    = config.get ("strategy") ,
+                       num_devices = config.get ("num_devices") )
 
 # +-----------------------------+
 # |    Client initialization    | 
@@ -136,35 +138,53 @@ for iTrial in range(50):
     file_list = datasets[args.model][args.particle][args.sample]
     file_list = [ f"{data_dir}/{file_name}" for file_name in file_list ]
 
-    trainer . feed_from_root_files ( root_files = file_list , 
-                                     X_vars = variables[args.model]["X_vars"][slot] , 
-                                     Y_vars = variables[args.model]["Y_vars"][slot] , 
-                                     w_var  = variables[args.model]["w_vars"][slot] if sw_avail else None , 
-                                     selections = selections[args.model][slot] , 
-                                     tree_names = None if calib_sample else "make_tuple" , 
-                                     chunk_size = hp["chunk_size"] , 
-                                     verbose = 1 )
-
-    if args.model == "Muon":   # Compute MuonLL to replace MuonMuLL
-      trainer._datachunk["MuonLL"] = trainer._datachunk["probe_Brunel_MuonMuLL"] - \
-                                     trainer._datachunk["probe_Brunel_MuonBgLL"]
-      trainer._Y_vars[-1] = "MuonLL"
-      columns = trainer.X_vars + trainer.Y_vars + trainer.w_var if trainer.w_var else trainer.X_vars + trainer.Y_vars
-      trainer._datachunk = trainer._datachunk[columns]
+    X_preprocessing = variables[args.model]["X_preprocessing"][args.sample]
+    Y_preprocessing = variables[args.model]["Y_preprocessing"][args.sample]
+
+    ## Dataset shared by trials running on the same node
+    shared_config = dict ( root_files = file_list , 
+                           X_vars = variables[args.model]["X_vars"][slot] , 
+                           Y_vars = variables[args.model]["Y_vars"][slot] , 
+                           w_var  = variables[args.model]["w_vars"][slot] if sw_avail else None , 
+                           selections = selections[args.model][slot] , 
+                           chunk_size = hp["chunk_size"] , 
+                           X_preprocessing = X_preprocessing , 
+                           Y_preprocessing = Y_preprocessing , 
+                           reweighting = rw_enabled )
+    shared = trainer . attach_dataset ( model_name, config = shared_config, verbose = 1 )
+
+    if not shared:
+      trainer . feed_from_root_files ( root_files = file_list , 
+                                       X_vars = variables[args.model]["X_vars"][slot] , 
+                                       Y_vars = variables[args.model]["Y_vars"][slot] , 
+                                       w_var  = variables[args.model]["w_vars"][slot] if sw_avail else None , 
+                                       selections = selections[args.model][slot] , 
+                                       tree_names = None if calib_sample else "make_tuple" , 
+                                       chunk_size = hp["chunk_size"] , 
+                                       cache_dir  = config.get ("cache_dir") ,
+                                       cache_size = config.get ("cache_size", "20 GB") ,
+                                       verbose = 1 )
+
+      if args.model == "Muon":   # Compute MuonLL to replace MuonMuLL
+        trainer._Y_vars[-1] = "MuonLL"
+        if not trainer.from_cache:   # cached data-chunk already includes MuonLL
+          trainer._datachunk["MuonLL"] = trainer._datachunk["probe_Brunel_MuonMuLL"] - \
+                                         trainer._datachunk["probe_Brunel_MuonBgLL"]
+          columns = trainer.X_vars + trainer.Y_vars + trainer.w_var if trainer.w_var else trainer.X_vars + trainer.Y_vars
+          trainer._datachunk = trainer._datachunk[columns]
 
     # +--------------------------+
     # |    Data preprocessing    |
     # +--------------------------+
 
-    X_preprocessing = variables[args.model]["X_preprocessing"][args.sample]
-    Y_preprocessing = variables[args.model]["Y_preprocessing"][args.sample]
-
-    trainer . prepare_dataset ( X_preprocessing = X_preprocessing , 
-                                Y_preprocessing = Y_preprocessing , 
-                                X_vars_to_preprocess = trainer.X_vars ,
-                                Y_vars_to_preprocess = trainer.Y_vars ,
-                                enable_reweights = rw_enabled ,
-                                verbose = 1 )
+    if not shared:
+      trainer . prepare_dataset ( X_preprocessing = X_preprocessing , 
+                                  Y_preprocessing = Y_preprocessing , 
+                                  X_vars_to_preprocess = trainer.X_vars ,
+                                  Y_vars_to_preprocess = trainer.Y_vars ,
+                                  enable_reweights = rw_enabled ,
+                                  verbose = 1 )
+      trainer . publish_dataset ( model_name, config = shared_config, verbose = 1 )
 
     # +--------------------------+
     # |    Model construction    |
@@ -222,7 +242,10 @@ for iTrial in range(50):
                       d_updt_per_batch = trial.duxb , 
                       g_updt_per_batch = trial.guxb ,
                       v_adv_dir_updt = trial.vadu ,
-                      adv_lp_penalty = trial.adv_lp )
+                      adv_lp_penalty = trial.adv_lp ,
+                      jit_compile = config.get ("jit_compile", False) ,
+                      reuse_updt_outputs = config.get ("reuse_updt_outputs", False) ,
+                      metrics_updt_freq  = config.get ("metrics_updt_freq", 1) )
 
     # +-----------------+
     # |    Callbacks    |
@@ -252,4 +275,9 @@ for iTrial in range(50):
                             validation_split = hp["validation_split"] ,
                             callbacks = [model_saver, lr_scheduler, pruner] ,
                             produce_report = False ,
+                            precision = config.get ("precision", "float32") ,
+                            shuffle_buffer = config.get ("shuffle_buffer") ,
                             verbose = 1 )
+
+## Free the memory of the shared dataset
+trainer . release_dataset ( model_name, config = shared_config, verbose = 1 )
@@ -71,7 +71,9 @@ trainer = GanTrainer ( name = model_name ,
                        export_dir  = config["model_dir"] ,
                        export_name = model_name ,
                        report_dir  = config["report_dir"] ,
-                       report_name = model_name )
+                       report_name = model_name ,
+                       strategy    = config.get ("strategy") ,
+                       num_devices = config.get ("num_devices") )
 
 # +-------------------------+
 # |    Data for training    |
@@ -94,14 +96,17 @@ trainer . feed_from_root_files ( root_files = file_list ,
                                  selections = selections[args.model][slot] , 
                                  tree_names = None if calib_sample else "make_tuple" , 
                                  chunk_size = hp["chunk_size"] , 
+                                 cache_dir  = config.get ("cache_dir") ,
+                                 cache_size = config.get ("cache_size", "20 GB") ,
                                  verbose = 1 )
 
 if args.model == "Muon":   # Compute MuonLL to replace MuonMuLL
-  trainer._datachunk["MuonLL"] = trainer._datachunk["probe_Brunel_MuonMuLL"] - \
-                                 trainer._datachunk["probe_Brunel_MuonBgLL"]
   trainer._Y_vars[-1] = "MuonLL"
-  columns = trainer.X_vars + trainer.Y_vars + trainer.w_var if trainer.w_var else trainer.X_vars + trainer.Y_vars
-  trainer._datachunk = trainer._datachunk[columns]
+  if not trainer.from_cache:   # cached data-chunk already includes MuonLL
+    trainer._datachunk["MuonLL"] = trainer._datachunk["probe_Brunel_MuonMuLL"] - \
+                                   trainer._datachunk["probe_Brunel_MuonBgLL"]
+    columns = trainer.X_vars + trainer.Y_vars + trainer.w_var if trainer.w_var else trainer.X_vars + trainer.Y_vars
+    trainer._datachunk = trainer._datachunk[columns]
 
 # +--------------------------+
 # |    Data preprocessing    |
@@ -164,7 +169,10 @@ model . compile ( d_optimizer = d_opt ,
                   g_optimizer = g_opt , 
                   d_updt_per_batch = trainer.params.get ( "d_updt_per_batch" , hp["d_updt_per_batch"] ) , 
                   g_updt_per_batch = trainer.params.get ( "g_updt_per_batch" , hp["g_updt_per_batch"] ) ,
-                  grad_penalty     = trainer.params.get ( "grad_penalty"     , hp["grad_penalty"]     ) )
+                  grad_penalty     = trainer.params.get ( "grad_penalty"     , hp["grad_penalty"]     ) ,
+                  jit_compile      = trainer.params.get ( "jit_compile"      , config.get ("jit_compile", False) ) ,
+                  reuse_updt_outputs = trainer.params.get ( "reuse_updt_outputs" , config.get ("reuse_updt_outputs", False) ) ,
+                  metrics_updt_freq  = trainer.params.get ( "metrics_updt_freq"  , config.get ("metrics_updt_freq", 1) ) )
 
 model . summary()
 
@@ -189,4 +197,6 @@ trainer . train_model ( model = model ,
                         num_epochs = hp["num_epochs"] ,
                         validation_split = hp["validation_split"] ,
                         callbacks = [model_saver, lr_scheduler] ,
+                        precision = config.get ("precision", "float32") ,
+                        shuffle_buffer = config.get ("shuffle_buffer") ,
                         verbose = 1 )
@@ -6,13 +6,14 @@ import pickle
 import numpy as np
 import tensorflow as tf
 import multiprocessing as mp
+from multiprocessing import shared_memory
 import matplotlib.pyplot as plt
 
 from tqdm import tqdm
 from itertools import product
 from html_reports import Report
 from matplotlib.patches import Patch
-from lb_pidsim_train.utils import argparser
+from lb_pidsim_train.utils import argparser, CondHistograms
 from lb_pidsim_train.trainers import DataHandler
 from lb_pidsim_train.utils import PidsimColTransformer
 
@@ -116,16 +117,31 @@ Y_gen = scaler_Y . inverse_transform ( Y_gen )
 
 num_jobs = validation[args.model][args.particle][args.sample]["num_jobs"]
 
-row_to_drop = len(Y_gen) % num_jobs
-
-X = np.vsplit ( data_handler.X[:-row_to_drop,:] , num_jobs )
-Y_gen = np.vsplit ( Y_gen[:-row_to_drop,:] , num_jobs )
-Y_ref = np.vsplit ( data_handler.Y[:-row_to_drop,:] , num_jobs )
-w = np.vsplit ( data_handler.w[:-row_to_drop] , num_jobs )
-
-datasets = list()
-for i in range (num_jobs):
-  datasets . append ( [ X[i], Y_gen[i], Y_ref[i], w[i] ] )
+def to_shared_memory (array) -> tuple:
+  """Copy an array into a shared memory block, returning the block 
+  and the specs (name, shape, dtype) to attach it from the workers."""
+  array = np.ascontiguousarray (array)
+  block = shared_memory.SharedMemory ( create = True, size = max (array.nbytes, 1) )
+  np.ndarray ( array.shape, dtype = array.dtype, buffer = block.buf ) [:] = array
+  return block, ( block.name, array.shape, array.dtype.str )
+
+def from_shared_memory (specs) -> tuple:
+  """Attach a shared memory block, returning the block and the array view."""
+  name, shape, dtype = specs
+  block = shared_memory.SharedMemory ( name = name )
+  return block, np.ndarray ( shape, dtype = dtype, buffer = block.buf )
+
+## Arrays placed once in shared memory, the workers receive only row offsets
+shared = dict()
+for key, array in [ ( "X"     , data_handler.X[:,:3] ) ,   # (p, eta, nTracks) only
+                    ( "Y_gen" , Y_gen ) ,
+                    ( "Y_ref" , data_handler.Y ) ,
+                    ( "w"     , np.ravel (data_handler.w) ) ]:
+  shared[key] = to_shared_memory (array)
+del Y_gen
+
+offsets = np.linspace ( 0, len(data_handler.X), num_jobs + 1 ) . astype (np.int64)
+datasets = [ ( i, offsets[i], offsets[i+1] ) for i in range (num_jobs) ]
 
 # +-----------------------+
 # |    Histograms info    |
@@ -160,38 +176,43 @@ boundaries = {
 # |    Fill histograms    |
 # +-----------------------+
 
-def fill_histos (data):
-  X, Y_gen, Y_ref, w = data
-  histos_gen = list()
-  histos_ref = list()
-
-  for idx, y_var in enumerate (data_handler.Y_vars):
-    histos_gen . append (
-      np.histogramdd ( np.c_ [ X[:,:3], Y_gen[:,idx] ] ,
-                       bins = [ boundaries[var] for var in binning_vars + [y_var] ] ,
-                       weights = w . flatten(),
-                     ) [0] )
-    histos_ref . append (
-      np.histogramdd ( np.c_ [ X[:,:3], Y_ref[:,idx] ] ,
-                       bins = [ boundaries[var] for var in binning_vars + [y_var] ] ,
-                       weights = w . flatten(),
-                     ) [0] )
-
-  return histos_gen, histos_ref
+engine = CondHistograms ( cond_bins = [ boundaries[var] for var in binning_vars ] ,
+                          var_bins  = [ boundaries[var] for var in data_handler.Y_vars ] ,
+                          num_samples = 2 )   # generated and reference samples
+
+## Bin counts of each job, accumulated within shared memory
+shared["counts"] = to_shared_memory ( np.zeros ( (num_jobs, engine.size), dtype = np.float64 ) )
+
+def fill_histos (job):
+  job_id, start, stop = job
+  blocks, arrays = dict(), dict()
+  for key, (_, specs) in shared.items():
+    blocks[key], arrays[key] = from_shared_memory (specs)
+  engine.fill ( arrays["X"][start:stop] ,   # (p, eta, nTracks) digitized once
+                [ arrays["Y_gen"][start:stop], arrays["Y_ref"][start:stop] ] ,
+                w = arrays["w"][start:stop] ,
+                out = arrays["counts"][job_id] )
+  del arrays
+  for block in blocks.values(): block.close()
 
 # +-------------------------------+
 # |    Multiprocessing filling    |
 # +-------------------------------+
 
 scheduler = mp.Pool (processes = num_jobs)
+for _ in scheduler.imap_unordered ( fill_histos, datasets ): pass
+scheduler.close()
+
+block, counts = from_shared_memory ( shared["counts"][1] )
+total_counts = counts.sum (axis = 0)
+hgen = engine.histograms (total_counts, sample = 0)
+href = engine.histograms (total_counts, sample = 1)
 
-hgen = None
-href = None
-for histos_gen, histos_ref in scheduler.imap_unordered (fill_histos, datasets):
-  if hgen is None: hgen = histos_gen
-  else:            hgen = [ h1 + h2 for h1, h2 in zip (hgen, histos_gen) ]
-  if href is None: href = histos_ref
-  else:            href = [ h1 + h2 for h1, h2 in zip (href, histos_ref) ]
+del counts
+block.close()
+for block, _ in shared.values():
+  block.close()
+  block.unlink()
 
 # +-----------------------------+
 # |    Validation plots info    |
@@ -248,8 +269,8 @@ def plot_histos (bin_id):
 
   # Draw the validation histograms for the studied intervals
   for y_id, (y_var, y_bin) in enumerate (zip (data_handler.Y_vars, Y_bins)):
-    entries_gen = np.array (hgen) [y_id] [bin_id]
-    entries_ref = np.array (href) [y_id] [bin_id]
+    entries_gen = hgen[y_id][bin_id]
+    entries_ref = href[y_id][bin_id]
 
     max_entries = max ( entries_ref.max(), entries_gen.max() )
     max_entries += 0.25 * max_entries